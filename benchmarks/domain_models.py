@@ -0,0 +1,35 @@
+"""
+Compare building tables from trusted artifacts with and without strict pydantic validation.
+
+    python -m benchmarks.domain_models --tables 100 --columns 400
+"""
+
+import argparse
+import time
+
+from benchmarks.synthetic import generate_artifacts
+from dbt_diagrams.domain import Table
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tables", type=int, default=100)
+    parser.add_argument("--columns", type=int, default=400)
+    args = parser.parse_args()
+
+    manifest, catalog = generate_artifacts(
+        n_models=args.tables, columns_per_model=args.columns, n_tests_per_model=0, n_macros=0
+    )
+    models = [(node, catalog["nodes"][node_id]) for node_id, node in manifest["nodes"].items()]
+
+    print(f"{args.tables} tables with {args.columns} columns each")
+    print(f"{'path':<10}{'wall time (s)':>16}")
+    for name, strict in [("fast", False), ("strict", True)]:
+        start = time.perf_counter()
+        for manifest_node, catalog_node in models:
+            Table.from_manifest_catalog_nodes(manifest_node, catalog_node, strict=strict)
+        print(f"{name:<10}{time.perf_counter() - start:>16.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Compare injecting the Mermaid snippet in a large, single line dbt docs index.html with
+`add_mermaid_lib_to_html` and the previous line by line rewrite.
+
+    python -m benchmarks.html_injection --size-mb 10 --runs 10
+"""
+
+import argparse
+import os
+from pathlib import Path
+import tempfile
+import time
+
+from dbt_diagrams.mermaid import MERMAID_SNIPPET_PATH, add_mermaid_lib_to_html
+
+
+def _line_by_line(target_dir: Path):
+    source_index_path = f"{target_dir}/index.html"
+    target_index_path = f"{target_dir}/new_index.html"
+
+    with open(source_index_path, "r") as index_html, open(
+        target_index_path, "w"
+    ) as new_index_html, open(MERMAID_SNIPPET_PATH, "r") as mermaid_snippet_f:
+        mermaid_snippet = mermaid_snippet_f.read()
+        for line in index_html:
+            if "</body>" in line:
+                new_index_html.write(line.replace("</body>", f"{mermaid_snippet}</body>"))
+            else:
+                new_index_html.write(line)
+
+    os.remove(source_index_path)
+    os.rename(target_index_path, source_index_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size-mb", type=int, default=10)
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    # dbt ships its docs app as one minified line of JS inside index.html.
+    index_html = f"<html><head><script>{'x' * args.size_mb * 1024 * 1024}</script></head>"
+    index_html += "<body></body></html>"
+
+    print(f"{args.size_mb}MB index.html, {args.runs} runs")
+    print(f"{'path':<16}{'first run (s)':>16}{'rerun (s)':>16}")
+    with tempfile.TemporaryDirectory(prefix="dbt_diagrams_bench") as tmp_dir:
+        target_dir = Path(tmp_dir)
+        for name, inject in [("line by line", _line_by_line), ("splice", add_mermaid_lib_to_html)]:
+            first_run = rerun = 0.0
+            for _ in range(args.runs):
+                (target_dir / "index.html").write_text(index_html)
+                start = time.perf_counter()
+                inject(target_dir)
+                first_run += time.perf_counter() - start
+                start = time.perf_counter()
+                inject(target_dir)
+                rerun += time.perf_counter() - start
+            print(f"{name:<16}{first_run / args.runs:>16.4f}{rerun / args.runs:>16.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Compare the available JSON backends on the jaffle_shop artifacts and on a synthetic
+manifest of about 100MB. Install the `fast` extras to include msgspec.
+
+    python -m benchmarks.json_backends --models 14000
+"""
+
+import argparse
+from pathlib import Path
+import tempfile
+import time
+from typing import Callable
+
+from benchmarks.synthetic import write_artifacts
+from dbt_diagrams import json_backend
+from dbt_diagrams.input_validators import DbtArtifactType, verify_and_read, verify_and_read_subset
+
+JAFFLE_SHOP_MANIFEST = (
+    Path(__file__).parent.parent / "tests" / "fixtures" / "jaffle_shop" / "manifest.json"
+)
+
+
+def _best_of(runs: int, f: Callable[[], object]) -> float:
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        f()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def _compare_backends(manifest_path: Path, runs: int):
+    size_mb = manifest_path.stat().st_size / 1024**2
+    print(f"\nmanifest: {manifest_path} ({size_mb:.1f} MB), best of {runs} runs")
+    print(f"{'backend':<10}{'loads (s)':>14}{'dumps (s)':>14}{'read (s)':>14}{'subset (s)':>14}")
+    content = manifest_path.read_bytes()
+    for name in json_backend.available_backends():
+        backend = json_backend.set_backend(name)
+        loaded = json_backend.loads(content)
+        timings = [
+            _best_of(runs, lambda: json_backend.loads(content)),
+            _best_of(runs, lambda: backend.dumps(loaded)),
+            _best_of(runs, lambda: verify_and_read(manifest_path, DbtArtifactType.MANIFEST)),
+            _best_of(runs, lambda: verify_and_read_subset(manifest_path, DbtArtifactType.MANIFEST)),
+        ]
+        print(f"{name:<10}" + "".join(f"{t:>14.4f}" for t in timings))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--models", type=int, default=14000)
+    parser.add_argument("--columns", type=int, default=30)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    _compare_backends(JAFFLE_SHOP_MANIFEST, args.runs * 10)
+    with tempfile.TemporaryDirectory(prefix="dbt_diagrams_bench") as tmp_dir:
+        manifest_path, _ = write_artifacts(
+            Path(tmp_dir), n_models=args.models, columns_per_model=args.columns
+        )
+        _compare_backends(manifest_path, args.runs)
+
+
+if __name__ == "__main__":
+    main()
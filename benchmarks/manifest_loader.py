@@ -0,0 +1,63 @@
+"""
+Compare plain `json.load` and the full artifact reader with the selective reader.
+
+    python -m benchmarks.manifest_loader --models 5000
+"""
+
+import argparse
+import json
+from pathlib import Path
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict
+
+from benchmarks.synthetic import write_artifacts
+from dbt_diagrams.input_validators import DbtArtifactType, verify_and_read, verify_and_read_subset
+
+
+def _measure(loader: Callable[[Path, DbtArtifactType], Dict[str, Any]], path: Path):
+    start = time.perf_counter()
+    loader(path, DbtArtifactType.MANIFEST)
+    wall_time = time.perf_counter() - start
+
+    # Separate run for memory, as tracing allocations slows down the loader itself.
+    tracemalloc.start()
+    loader(path, DbtArtifactType.MANIFEST)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return wall_time, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--models", type=int, default=2000)
+    parser.add_argument("--columns", type=int, default=30)
+    parser.add_argument("--macros", type=int, default=5000)
+    parser.add_argument("--manifest", type=Path, help="Benchmark an existing manifest instead.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="dbt_diagrams_bench") as tmp_dir:
+        manifest_path = (
+            args.manifest
+            or write_artifacts(
+                Path(tmp_dir),
+                n_models=args.models,
+                columns_per_model=args.columns,
+                n_macros=args.macros,
+            )[0]
+        )
+        size_mb = manifest_path.stat().st_size / 1024**2
+        print(f"manifest: {manifest_path} ({size_mb:.1f} MB)")
+        print(f"{'loader':<24}{'wall time (s)':>16}{'peak memory (MB)':>20}")
+        for name, loader in [
+            ("json.load", lambda path, _: json.loads(path.read_text())),
+            ("verify_and_read", verify_and_read),
+            ("verify_and_read_subset", verify_and_read_subset),
+        ]:
+            wall_time, peak = _measure(loader, manifest_path)
+            print(f"{name:<24}{wall_time:>16.3f}{peak / 1024**2:>20.1f}")
+
+
+if __name__ == "__main__":
+    main()
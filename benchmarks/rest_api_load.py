@@ -0,0 +1,121 @@
+"""
+Load test a running REST API (`dbt-diagrams rest-api`) by uploading dbt artifacts from
+many clients at the same time. Reports throughput, latency percentiles and status codes,
+where 503 responses show the API applying backpressure.
+
+    dbt-diagrams rest-api --port 8000 &
+    python -m benchmarks.rest_api_load --requests 500 --clients 32 --models 2000
+"""
+
+import argparse
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import statistics
+import tempfile
+import time
+from typing import Dict, Tuple
+import urllib.error
+import urllib.request
+import uuid
+
+from benchmarks.synthetic import write_artifacts
+
+JAFFLE_SHOP = Path(__file__).parent.parent / "tests" / "fixtures" / "jaffle_shop"
+
+
+def _multipart_body(files: Dict[str, bytes], fields: Dict[str, str]) -> Tuple[bytes, str]:
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, value in fields.items():
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode()
+        )
+    for name, content in files.items():
+        parts.append(
+            f"--{boundary}\r\nContent-Disposition: form-data; "
+            f'name="{name}"; filename="{name}.json"\r\n'
+            "Content-Type: application/json\r\n\r\n".encode()
+        )
+        parts.append(content)
+        parts.append(b"\r\n")
+    parts.append(f"--{boundary}--\r\n".encode())
+    return b"".join(parts), f"multipart/form-data; boundary={boundary}"
+
+
+def _post(url: str, body: bytes, content_type: str) -> Tuple[int, float]:
+    request = urllib.request.Request(
+        url, data=body, method="POST", headers={"Content-Type": content_type}
+    )
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    return status, time.perf_counter() - start
+
+
+def _percentile(values, percentile: float) -> float:
+    return (
+        statistics.quantiles(values, n=100, method="inclusive")[int(percentile) - 1]
+        if len(values) > 1
+        else values[0]
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--url", default="http://localhost:8000/generate")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument(
+        "--output-format", default="mermaid", choices=["mermaid", "markdown", "svg"]
+    )
+    parser.add_argument("--response-format", default="json", choices=["json", "zip"])
+    parser.add_argument(
+        "--models", type=int, help="Upload synthetic artifacts instead of jaffle_shop."
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="dbt_diagrams_bench") as tmp_dir:
+        target_dir = JAFFLE_SHOP
+        if args.models:
+            target_dir = Path(tmp_dir)
+            write_artifacts(target_dir, n_models=args.models)
+        body, content_type = _multipart_body(
+            {
+                "manifest": (target_dir / "manifest.json").read_bytes(),
+                "catalog": (target_dir / "catalog.json").read_bytes(),
+            },
+            {"output_format": args.output_format, "response_format": args.response_format},
+        )
+
+    print(
+        f"{args.requests} requests from {args.clients} clients, "
+        f"{len(body) / 1024**2:.1f} MB per request"
+    )
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.clients) as executor:
+        results = list(
+            executor.map(lambda _: _post(args.url, body, content_type), range(args.requests))
+        )
+    wall_time = time.perf_counter() - start
+
+    statuses = Counter(status for status, _ in results)
+    latencies = [latency for status, latency in results if status == 200]
+    print(f"status codes: {dict(sorted(statuses.items()))}")
+    print(f"throughput:   {statuses[200] / wall_time:.1f} successful requests/s")
+    if latencies:
+        print(
+            "latency (s):  "
+            f"p50 {_percentile(latencies, 50):.3f}  "
+            f"p95 {_percentile(latencies, 95):.3f}  "
+            f"p99 {_percentile(latencies, 99):.3f}  "
+            f"max {max(latencies):.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Measure how long it takes to start the CLI, using `python -X importtime`. Reports the
+import time of `dbt_diagrams.cli`, the modules that take longest to import and the
+wall time of `dbt-diagrams --version`.
+
+    python -m benchmarks.startup_time --runs 10
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+
+DEFAULT_MODULE = "dbt_diagrams.cli"
+
+
+def import_times(module: str = DEFAULT_MODULE) -> Dict[str, Tuple[int, int]]:
+    """Self and cumulative import time in microseconds per module imported by `module`."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        if self_us.strip().isdigit():
+            times[name.strip()] = (int(self_us), int(cumulative_us))
+    return times
+
+
+def _version_wall_time() -> float:
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "-m", DEFAULT_MODULE, "--version"], capture_output=True, check=True
+    )
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--module", default=DEFAULT_MODULE)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    runs = [import_times(args.module) for _ in range(args.runs)]
+    cumulative: List[float] = [times[args.module][1] / 1000 for times in runs]
+    print(
+        f"import {args.module}: median {statistics.median(cumulative):.1f} ms, "
+        f"min {min(cumulative):.1f} ms over {args.runs} runs"
+    )
+    version_times = [_version_wall_time() * 1000 for _ in range(args.runs)]
+    print(f"dbt-diagrams --version: median {statistics.median(version_times):.1f} ms wall time")
+
+    print(f"\n{'module':<50}{'self (ms)':>12}{'cumulative (ms)':>18}")
+    slowest = sorted(runs[-1].items(), key=lambda item: item[1][0], reverse=True)
+    for name, (self_us, cumulative_us) in slowest[: args.top]:
+        print(f"{name:<50}{self_us / 1000:>12.1f}{cumulative_us / 1000:>18.1f}")
+
+
+if __name__ == "__main__":
+    main()
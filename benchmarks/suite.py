@@ -0,0 +1,351 @@
+"""
+Benchmark the main stages of dbt-diagrams on synthetic projects of increasing size:
+reading artifacts, building ERDs, injecting them in doc blocks, writing them to the
+manifest and injecting Mermaid in the docs `index.html`. Records wall time (best of
+`--repeat` runs) and peak traced memory per stage and size. Runs offline. With `--svg`,
+SVG rendering is benchmarked as well, provided Playwright and Chromium are installed.
+
+Some stages replace a simpler implementation, which is benchmarked alongside them
+(see `MUST_BEAT` and `FAST_BACKEND_MUST_BEAT`). The suite fails when such a stage is
+slower than what it replaces for the largest project, where it matters most.
+
+Write results to JSON and compare a later run against them to spot regressions:
+
+    python -m benchmarks.suite --sizes 100,1000,5000 --output baseline.json
+    python -m benchmarks.suite --sizes 100,1000,5000 --baseline baseline.json
+"""
+
+import argparse
+import asyncio
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+import importlib.util
+import json
+from pathlib import Path
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+
+from benchmarks.synthetic import write_artifacts
+from dbt_diagrams import __version__, json_backend
+from dbt_diagrams.artifact_writers import patch_json_file
+from dbt_diagrams.input_validators import DbtArtifactType, verify_and_read, verify_and_read_subset
+from dbt_diagrams.mermaid import (
+    add_mermaid_lib_to_html,
+    mermaid_erds_from_manifest_and_catalog,
+    update_docs_with_rendered_mermaid_erds,
+)
+
+# About the size of the index.html of recent dbt versions.
+INDEX_HTML_SIZE = 1600 * 1024
+# Per benchmark, the benchmark of the implementation it replaces and has to beat.
+MUST_BEAT = {"patch_manifest": "dump_manifest"}
+# Only msgspec and orjson clearly beat `json.load`. The standard library reader is about
+# on par with it, so comparing them would fail at random on timing noise.
+FAST_BACKEND_MUST_BEAT = {"read_subset_manifest": "json_load_manifest"}
+
+
+@dataclass
+class Result:
+    benchmark: str
+    size: int
+    wall_time: float
+    peak_memory: Optional[int]
+
+
+def _measure(run: Callable[[Any], Any], setup: Callable[[], Any], repeat: int) -> Result:
+    """Best wall time of `repeat` runs, and peak memory of a separate traced run."""
+    wall_time = float("inf")
+    for _ in range(repeat):
+        arg = setup()
+        start = time.perf_counter()
+        run(arg)
+        wall_time = min(wall_time, time.perf_counter() - start)
+
+    arg = setup()
+    tracemalloc.start()
+    run(arg)
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return Result("", 0, wall_time, peak_memory)
+
+
+def _write_index_html(path: Path):
+    filler = "<div>dbt docs</div>\n" * (INDEX_HTML_SIZE // 20)
+    path.write_text(f"<!DOCTYPE html><html><head></head><body>{filler}</body></html>")
+
+
+def _docs_copy(manifest: Dict[str, Any]) -> Dict[str, Any]:
+    # Doc injection updates entries in place, so every run gets its own copies.
+    return {
+        section: {unique_id: dict(entry) for unique_id, entry in manifest[section].items()}
+        for section in ["nodes", "docs"]
+    }
+
+
+def _svg_tier_available() -> Optional[str]:
+    """Reason to skip the SVG tier, if any."""
+    if importlib.util.find_spec("playwright") is None:
+        return "Playwright is not installed (see the `svg` extras)"
+
+    from playwright.sync_api import sync_playwright
+
+    # `get_browser` tries to install Chromium when it can't be launched, which needs
+    # network access.
+    with sync_playwright() as p:
+        try:
+            p.chromium.launch().close()
+        except Exception:
+            return "Chromium can't be launched (run `playwright install chromium`)"
+    return None
+
+
+def _measure_svgs(diagrams: Dict[str, str], repeat: int) -> Result:
+    from dbt_diagrams.output_writers import as_svgs, get_browser
+
+    async def _run() -> float:
+        wall_time = float("inf")
+        async with get_browser() as browser:
+            for _ in range(repeat):
+                start = time.perf_counter()
+                await as_svgs(diagrams, browser)
+                wall_time = min(wall_time, time.perf_counter() - start)
+        return wall_time
+
+    # Rendering happens in the browser, so there is no Python memory to trace.
+    return Result("", 0, asyncio.run(_run()), None)
+
+
+def run_suite(
+    sizes: List[int],
+    repeat: int = 3,
+    columns: int = 20,
+    struct_column_ratio: float = 0.2,
+    svg_diagrams: int = 0,
+) -> List[Result]:
+    results = []
+
+    def record(benchmark: str, size: int, result: Result):
+        result.benchmark, result.size = benchmark, size
+        results.append(result)
+        memory = f"{result.peak_memory / 1024**2:.1f}" if result.peak_memory is not None else "-"
+        print(f"{benchmark:<20}{size:>8}{result.wall_time:>16.4f}{memory:>20}")
+
+    print(f"{'benchmark':<20}{'models':>8}{'wall time (s)':>16}{'peak memory (MB)':>20}")
+    for size in sizes:
+        with tempfile.TemporaryDirectory(prefix="dbt_diagrams_bench") as tmp_dir:
+            target_dir = Path(tmp_dir)
+            manifest_path, catalog_path = write_artifacts(
+                target_dir,
+                n_models=size,
+                columns_per_model=columns,
+                n_macros=size,
+                n_diagrams=max(1, size // 20),
+                n_doc_blocks=max(1, size // 10),
+                struct_column_ratio=struct_column_ratio,
+            )
+
+            for name, read in [("read", verify_and_read), ("read_subset", verify_and_read_subset)]:
+                for artifact_type, path in [
+                    (DbtArtifactType.MANIFEST, manifest_path),
+                    (DbtArtifactType.CATALOG, catalog_path),
+                ]:
+                    record(
+                        f"{name}_{artifact_type.value}",
+                        size,
+                        _measure(lambda p: read(p, artifact_type), lambda: path, repeat),
+                    )
+
+            record(
+                "json_load_manifest",
+                size,
+                _measure(lambda p: json.loads(p.read_text()), lambda: manifest_path, repeat),
+            )
+
+            manifest = verify_and_read_subset(manifest_path, DbtArtifactType.MANIFEST)
+            catalog = verify_and_read_subset(catalog_path, DbtArtifactType.CATALOG)
+            record(
+                "build_erds",
+                size,
+                _measure(
+                    lambda _: mermaid_erds_from_manifest_and_catalog(manifest, catalog),
+                    lambda: None,
+                    repeat,
+                ),
+            )
+
+            diagrams = mermaid_erds_from_manifest_and_catalog(manifest, catalog)
+            record(
+                "inject_docs",
+                size,
+                _measure(
+                    lambda m: update_docs_with_rendered_mermaid_erds(m, diagrams),
+                    lambda: _docs_copy(manifest),
+                    repeat,
+                ),
+            )
+
+            # Writing the updated docs back to the manifest, compared to dumping it fully.
+            full_manifest = verify_and_read(manifest_path, DbtArtifactType.MANIFEST)
+            changed_docs = update_docs_with_rendered_mermaid_erds(full_manifest, diagrams)
+            replacements = {
+                (section, unique_id, field): full_manifest[section][unique_id][field]
+                for section, unique_id, field in changed_docs
+            }
+            patched_path = target_dir / "patched_manifest.json"
+            record(
+                "patch_manifest",
+                size,
+                _measure(
+                    lambda _: patch_json_file(patched_path, replacements),
+                    lambda: shutil.copy(manifest_path, patched_path),
+                    repeat,
+                ),
+            )
+            record(
+                "dump_manifest",
+                size,
+                _measure(
+                    lambda _: patched_path.write_text(json.dumps(full_manifest)),
+                    lambda: None,
+                    repeat,
+                ),
+            )
+
+            index_path = target_dir / "index.html"
+            record(
+                "inject_html",
+                size,
+                _measure(
+                    lambda _: add_mermaid_lib_to_html(target_dir),
+                    lambda: _write_index_html(index_path),
+                    repeat,
+                ),
+            )
+
+            if svg_diagrams:
+                selected = dict(list(diagrams.items())[:svg_diagrams])
+                record("render_svgs", size, _measure_svgs(selected, repeat))
+
+    return results
+
+
+def _compare(results: List[Result], baseline_path: Path, max_regression: float) -> bool:
+    """Print the change compared to a baseline and return whether any exceeds the maximum."""
+    baseline = {
+        (r["benchmark"], r["size"]): r for r in json.loads(baseline_path.read_text())["results"]
+    }
+    print(f"\nCompared to {baseline_path}")
+    print(f"{'benchmark':<20}{'models':>8}{'wall time':>12}{'peak memory':>14}")
+    regressed = False
+    for result in results:
+        previous = baseline.get((result.benchmark, result.size))
+        if previous is None:
+            continue
+
+        changes: List[Optional[float]] = []
+        for current_value, previous_value in [
+            (result.wall_time, previous["wall_time"]),
+            (result.peak_memory, previous["peak_memory"]),
+        ]:
+            if current_value is None or not previous_value:
+                changes.append(None)
+            else:
+                changes.append(current_value / previous_value - 1)
+        regressed |= any(c is not None and c > max_regression for c in changes)
+        formatted = [f"{c:+.0%}" if c is not None else "-" for c in changes]
+        print(f"{result.benchmark:<20}{result.size:>8}{formatted[0]:>12}{formatted[1]:>14}")
+    return regressed
+
+
+def _check_must_beat(results: List[Result]) -> bool:
+    """
+    Print the benchmarks that are slower than what they replace for the largest
+    project and return whether there are any.
+    """
+    largest = max(r.size for r in results)
+    wall_times = {r.benchmark: r.wall_time for r in results if r.size == largest}
+    must_beat = dict(MUST_BEAT)
+    if json_backend.current_backend().name != json_backend.STDLIB_BACKEND:
+        must_beat.update(FAST_BACKEND_MUST_BEAT)
+    slower = False
+    for benchmark, replaced in must_beat.items():
+        if benchmark not in wall_times or replaced not in wall_times:
+            continue
+        if wall_times[benchmark] >= wall_times[replaced]:
+            slower = True
+            print(
+                f"{benchmark} is slower than {replaced} for {largest} models: "
+                f"{wall_times[benchmark]:.4f}s against {wall_times[replaced]:.4f}s"
+            )
+    return slower
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--sizes", default="100,1000,5000", help="Comma separated model counts.")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--columns", type=int, default=20)
+    parser.add_argument("--struct-column-ratio", type=float, default=0.2)
+    parser.add_argument("--svg", action="store_true", help="Benchmark SVG rendering as well.")
+    parser.add_argument("--svg-diagrams", type=int, default=10)
+    parser.add_argument("--output", type=Path, help="Write results as JSON to this file.")
+    parser.add_argument("--baseline", type=Path, help="Compare to results written earlier.")
+    parser.add_argument(
+        "--max-regression",
+        type=float,
+        default=0.25,
+        help="Exit with an error when time or memory grows by more than this fraction "
+        "compared to the baseline.",
+    )
+    args = parser.parse_args()
+
+    svg_diagrams = 0
+    if args.svg:
+        skip_reason = _svg_tier_available()
+        if skip_reason:
+            print(f"Skipping SVG rendering: {skip_reason}.")
+        else:
+            svg_diagrams = args.svg_diagrams
+
+    print(
+        f"dbt-diagrams {__version__}, Python {platform.python_version()}, "
+        f"JSON backend {json_backend.current_backend().name}\n"
+    )
+    results = run_suite(
+        [int(size) for size in args.sizes.split(",")],
+        args.repeat,
+        args.columns,
+        args.struct_column_ratio,
+        svg_diagrams,
+    )
+
+    if args.output:
+        args.output.write_text(
+            json.dumps(
+                {
+                    "dbt_diagrams_version": __version__,
+                    "python_version": platform.python_version(),
+                    "platform": platform.platform(),
+                    "json_backend": json_backend.current_backend().name,
+                    "created_at": datetime.now(timezone.utc).isoformat(),
+                    "results": [asdict(result) for result in results],
+                },
+                indent=2,
+            )
+        )
+    slower = _check_must_beat(results)
+    if args.baseline and _compare(results, args.baseline, args.max_regression):
+        sys.exit(1)
+    if slower:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
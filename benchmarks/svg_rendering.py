@@ -0,0 +1,73 @@
+"""
+Compare batch SVG rendering (`as_svgs`) with the previous approach of opening a page
+and navigating to a temporary HTML file for every diagram. Requires the `svg` extras.
+
+    python -m benchmarks.svg_rendering --diagrams 20
+"""
+
+import argparse
+import asyncio
+import tempfile
+import time
+from typing import Dict
+
+from benchmarks.synthetic import generate_artifacts
+from dbt_diagrams.mermaid import mermaid_erds_from_manifest_and_catalog
+from dbt_diagrams.output_writers import MERMAID_BUNDLE_PATH, MERMAID_CDN_URL, as_svgs, get_browser
+
+
+async def _per_diagram_navigation(mermaid_diagrams: Dict[str, str], browser) -> Dict[str, str]:
+    mermaid_src = MERMAID_BUNDLE_PATH.as_uri() if MERMAID_BUNDLE_PATH.exists() else MERMAID_CDN_URL
+    svgs = {}
+    with tempfile.TemporaryDirectory(prefix="dbt_diagrams_bench") as tmp_dir:
+        for idx, (diagram_name, diagram) in enumerate(mermaid_diagrams.items()):
+            html_path = f"{tmp_dir}/{idx}.html"
+            with open(html_path, "w") as f:
+                f.write(
+                    f'<!DOCTYPE html><html lang="en"><body><pre class="mermaid">{diagram}</pre>'
+                    f'<script src="{mermaid_src}"></script></body></html>'
+                )
+            page = await browser.new_page(viewport={"width": 800, "height": 450})
+            await page.goto(f"file://{html_path}")
+            await page.wait_for_load_state("load")
+            svg = page.locator("pre[data-processed='true']").filter(
+                has=page.locator("svg[aria-roledescription='er']")
+            )
+            await svg.screenshot(path=f"{tmp_dir}/screenshot.png")
+            svgs[diagram_name] = await svg.inner_html()
+            await page.close()
+    return svgs
+
+
+async def _main(n_diagrams: int, concurrency: int):
+    manifest, catalog = generate_artifacts(
+        n_models=n_diagrams * 5,
+        columns_per_model=10,
+        n_tests_per_model=0,
+        n_macros=0,
+        n_diagrams=n_diagrams,
+    )
+    diagrams = mermaid_erds_from_manifest_and_catalog(manifest, catalog)
+    print(f"{len(diagrams)} diagrams")
+    print(f"{'path':<24}{'wall time (s)':>16}")
+
+    async with get_browser() as browser:
+        start = time.perf_counter()
+        await _per_diagram_navigation(diagrams, browser)
+        print(f"{'per diagram navigation':<24}{time.perf_counter() - start:>16.3f}")
+
+        start = time.perf_counter()
+        await as_svgs(diagrams, browser, concurrency)
+        print(f"{'as_svgs':<24}{time.perf_counter() - start:>16.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--diagrams", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+    asyncio.run(_main(args.diagrams, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""
+Generator for synthetic dbt artifacts, used to benchmark dbt-diagrams on
+projects that are a lot bigger than the jaffle shop example.
+"""
+
+import json
+from pathlib import Path
+import random
+from typing import Any, Dict, List, Tuple
+
+MANIFEST_SCHEMA_VERSION = "https://schemas.getdbt.com/dbt/manifest/v12.json"
+CATALOG_SCHEMA_VERSION = "https://schemas.getdbt.com/dbt/catalog/v1.json"
+INVOCATION_ID = "00000000-0000-0000-0000-000000000000"
+COLUMN_TYPES = ["INT64", "STRING", "NUMERIC", "TIMESTAMP", "DATE", "BOOL"]
+
+
+def _model_name(idx: int) -> str:
+    return f"model_{idx}"
+
+
+def _struct_type(rnd: random.Random, depth: int) -> Tuple[str, List[str]]:
+    """
+    A BigQuery style STRUCT with up to `depth` levels of nested STRUCTs and ARRAYs,
+    and the names of its top level fields.
+    """
+    fields = [f"field_{f}" for f in range(rnd.randint(2, 4))]
+    field_types = []
+    for field in fields:
+        if depth > 1 and rnd.random() < 0.5:
+            field_type, _ = _struct_type(rnd, depth - 1)
+            if rnd.random() < 0.5:
+                field_type = f"ARRAY<{field_type}>"
+        else:
+            field_type = rnd.choice(COLUMN_TYPES)
+        field_types.append(f"{field} {field_type}")
+    return f"STRUCT<{', '.join(field_types)}>", fields
+
+
+def _columns(
+    rnd: random.Random, n_columns: int, struct_column_ratio: float, struct_depth: int
+) -> Tuple[Dict[str, str], Dict[str, str]]:
+    """
+    Column types of a model for the manifest and the catalog. Like BigQuery, the
+    catalog lists the top level fields of STRUCTs as columns of their own.
+    """
+    columns: Dict[str, str] = {}
+    catalog_columns: Dict[str, str] = {}
+    for c in range(n_columns):
+        col = f"col_{c}"
+        # Only draw for STRUCTs when asked, so artifacts without them stay the same.
+        if struct_column_ratio and rnd.random() < struct_column_ratio:
+            columns[col], fields = _struct_type(rnd, struct_depth)
+            catalog_columns[col] = columns[col]
+            catalog_columns.update({f"{col}.{field}": "STRING" for field in fields})
+        else:
+            columns[col] = catalog_columns[col] = rnd.choice(COLUMN_TYPES)
+    return columns, catalog_columns
+
+
+def generate_artifacts(
+    n_models: int = 100,
+    columns_per_model: int = 20,
+    n_tests_per_model: int = 3,
+    n_macros: int = 1000,
+    connections_per_model: int = 1,
+    n_diagrams: int = 10,
+    n_doc_blocks: int = 0,
+    struct_column_ratio: float = 0.0,
+    struct_depth: int = 2,
+    seed: int = 42,
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Return a (manifest, catalog) pair. Every model connects to `connections_per_model`
+    of the models that precede it, so all ERD targets exist. Besides the overview,
+    `n_doc_blocks` doc blocks refer to the diagrams. About `struct_column_ratio` of
+    all columns are STRUCTs, nested `struct_depth` levels deep.
+    """
+    rnd = random.Random(seed)
+    nodes: Dict[str, Any] = {}
+    catalog_nodes: Dict[str, Any] = {}
+    parent_map: Dict[str, Any] = {}
+
+    for idx in range(n_models):
+        name = _model_name(idx)
+        unique_id = f"model.synthetic.{name}"
+        columns, catalog_columns = _columns(
+            rnd, columns_per_model, struct_column_ratio, struct_depth
+        )
+        connections = [
+            {
+                "diagram": f"erd_{idx % n_diagrams}",
+                "target": _model_name(rnd.randrange(idx)),
+                "source_cardinality": "one",
+                "target_cardinality": "zero_or_more",
+            }
+            for _ in range(connections_per_model if idx > 0 else 0)
+        ]
+        meta = {"erd": {"connections": connections}} if connections else {}
+        nodes[unique_id] = {
+            "database": "synthetic",
+            "schema": "analytics",
+            "name": name,
+            "resource_type": "model",
+            "package_name": "synthetic",
+            "unique_id": unique_id,
+            "alias": name,
+            "description": f"Model {idx}\n\n```mermaid[erd='erd_{idx % n_diagrams}']```",
+            "columns": {
+                col: {"name": col, "description": f"Column {col}", "meta": {}, "data_type": None}
+                for col in columns
+            },
+            "meta": meta,
+            "config": {"materialized": "table", "meta": meta},
+            "raw_code": "select 1 as col\n" * 50,
+            "compiled_code": "select 1 as col\n" * 50,
+            "depends_on": {"macros": [], "nodes": []},
+        }
+        parent_map[unique_id] = []
+        catalog_nodes[unique_id] = {
+            "metadata": {"type": "BASE TABLE", "schema": "analytics", "name": name},
+            "columns": {
+                col: {"type": col_type, "index": c, "name": col, "comment": None}
+                for c, (col, col_type) in enumerate(catalog_columns.items())
+            },
+            "stats": {},
+            "unique_id": unique_id,
+        }
+
+        for t in range(n_tests_per_model):
+            test_id = f"test.synthetic.not_null_{name}_{t}"
+            nodes[test_id] = {
+                "database": "synthetic",
+                "schema": "analytics_dbt_test__audit",
+                "name": f"not_null_{name}_{t}",
+                "resource_type": "test",
+                "package_name": "synthetic",
+                "unique_id": test_id,
+                "alias": f"not_null_{name}_{t}",
+                "description": "",
+                "columns": {},
+                "meta": {},
+                "raw_code": "{{ test_not_null(**_dbt_generic_test_kwargs) }}",
+                "compiled_code": "select * from x where col is null\n" * 10,
+            }
+            parent_map[test_id] = [unique_id]
+
+    macros = {
+        f"macro.synthetic.macro_{m}": {
+            "name": f"macro_{m}",
+            "resource_type": "macro",
+            "macro_sql": "{% macro foo() %}select 1{% endmacro %}\n" * 20,
+            "depends_on": {"macros": []},
+        }
+        for m in range(n_macros)
+    }
+
+    manifest = {
+        "metadata": {
+            "dbt_schema_version": MANIFEST_SCHEMA_VERSION,
+            "invocation_id": INVOCATION_ID,
+        },
+        "nodes": nodes,
+        "sources": {},
+        "macros": macros,
+        "docs": {
+            "doc.synthetic.__overview__": {
+                "name": "__overview__",
+                "block_contents": "```mermaid[erd='erd_0']```",
+            },
+            **{
+                f"doc.synthetic.doc_{d}": {
+                    "name": f"doc_{d}",
+                    "block_contents": f"Doc block {d}\n\n"
+                    + "Some documentation. " * 20
+                    + f"\n\n```mermaid[erd='erd_{d % n_diagrams}']```\n\n"
+                    + "More documentation. " * 20,
+                }
+                for d in range(n_doc_blocks)
+            },
+        },
+        "exposures": {},
+        "parent_map": parent_map,
+        "child_map": {k: [] for k in parent_map},
+    }
+    catalog = {
+        "metadata": {
+            "dbt_schema_version": CATALOG_SCHEMA_VERSION,
+            "invocation_id": INVOCATION_ID,
+        },
+        "nodes": catalog_nodes,
+        "sources": {},
+        "errors": None,
+    }
+    return manifest, catalog
+
+
+def write_artifacts(target_dir: Path, **kwargs) -> Tuple[Path, Path]:
+    manifest, catalog = generate_artifacts(**kwargs)
+    target_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = target_dir / "manifest.json"
+    catalog_path = target_dir / "catalog.json"
+    with open(manifest_path, "w") as f:
+        json.dump(manifest, f)
+    with open(catalog_path, "w") as f:
+        json.dump(catalog, f)
+    return manifest_path, catalog_path
@@ -0,0 +1,61 @@
+"""
+Schemas of the parts of dbt artifacts that dbt-diagrams reads, for manifest
+v4 up to v12 and catalog v1. Everything that isn't listed here is skipped while
+reading artifacts.
+
+These are TypedDicts, so loaded artifacts remain plain dicts. With msgspec
+installed, artifacts are decoded and type checked against them straight from
+bytes, without ever allocating the skipped parts.
+"""
+
+from typing import Any, Dict, Optional, TypedDict
+
+
+class ArtifactHeader(TypedDict, total=False):
+    metadata: Dict[str, Any]
+
+
+class ManifestColumn(TypedDict, total=False):
+    name: str
+    data_type: Optional[str]
+
+
+class _RequiredManifestNode(TypedDict):
+    name: str
+    resource_type: str
+    package_name: str
+    unique_id: str
+
+
+class ManifestNode(_RequiredManifestNode, total=False):
+    alias: str
+    database: Optional[str]
+    schema: str
+    columns: Dict[str, ManifestColumn]
+    # Only `erd` is used. Its content is validated by `domain.MetaERDSection`.
+    meta: Dict[str, Any]
+    description: str
+
+
+class ManifestDoc(TypedDict):
+    block_contents: str
+
+
+class Manifest(TypedDict):
+    metadata: Dict[str, Any]
+    nodes: Dict[str, ManifestNode]
+    docs: Dict[str, ManifestDoc]
+
+
+class CatalogColumn(TypedDict, total=False):
+    name: str
+    type: Optional[str]
+
+
+class CatalogNode(TypedDict, total=False):
+    columns: Dict[str, CatalogColumn]
+
+
+class Catalog(TypedDict):
+    metadata: Dict[str, Any]
+    nodes: Dict[str, CatalogNode]
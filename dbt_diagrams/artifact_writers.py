@@ -0,0 +1,72 @@
+import os
+from pathlib import Path
+import re
+import shutil
+from typing import Any, Dict, Tuple
+
+from dbt_diagrams import json_backend
+from dbt_diagrams.json_scanner import locate_values
+
+
+def patch_json_file(file_path: Path, replacements: Dict[Tuple[str, ...], Any]):
+    """
+    Replace the values at the given key paths of a JSON file, leaving every other
+    byte of the file as is. The file is streamed to a temp file with the new values
+    spliced in and then atomically moved in place of the original. This avoids
+    serialising a complete (potentially huge) manifest again just to change a few
+    doc strings.
+    """
+    if not replacements:
+        return
+
+    with open(file_path, encoding="utf-8") as f:
+        doc = f.read()
+
+    # Keys are compared after JSON decoding them, so keys with escapes (like the
+    # `\u00e9` that dbt writes for non-ASCII characters) are found as well.
+    # Values that are not on one of the paths are decoded to skip them.
+    with json_backend.gc_paused():
+        spans = locate_values(doc, replacements.keys())
+    if missing := set(replacements.keys()) - set(spans.keys()):
+        raise ValueError(
+            f"Could not find {', '.join('.'.join(p) for p in sorted(missing))} in {file_path}."
+        )
+
+    tmp_path = file_path.with_name(f"{file_path.name}.tmp")
+    with open(tmp_path, "wb") as tmp_file:
+        position = 0
+        for path, (start, end) in sorted(spans.items(), key=lambda span: span[1][0]):
+            tmp_file.write(doc[position:start].encode())
+            tmp_file.write(json_backend.dumps(replacements[path]))
+            position = end
+        tmp_file.write(doc[position:].encode())
+
+    os.replace(tmp_path, file_path)
+
+
+COPY_CHUNK_SIZE = 1024 * 1024
+
+
+def write_with_inlined_files(
+    template_path: Path, output_path: Path, inlined_files: Dict[bytes, Path]
+):
+    """
+    Write `template_path` to `output_path` with every occurrence of a placeholder in
+    `inlined_files` replaced by the raw bytes of the matching file. Inlined files are
+    copied over in chunks, so memory usage doesn't grow with their size.
+    """
+    with open(template_path, "rb") as f:
+        template = f.read()
+
+    placeholders = re.compile(b"|".join(re.escape(p) for p in inlined_files.keys()))
+    tmp_path = output_path.with_name(f"{output_path.name}.tmp")
+    with open(tmp_path, "wb") as output_file:
+        position = 0
+        for placeholder in placeholders.finditer(template):
+            output_file.write(template[position : placeholder.start()])
+            with open(inlined_files[placeholder.group()], "rb") as inlined_file:
+                shutil.copyfileobj(inlined_file, output_file, COPY_CHUNK_SIZE)
+            position = placeholder.end()
+        output_file.write(template[position:])
+
+    os.replace(tmp_path, output_path)
@@ -0,0 +1,177 @@
+from dataclasses import dataclass, field
+from pathlib import Path
+import time
+import traceback
+from typing import Dict, List, Optional
+
+from dbt_diagrams.incremental import IncrementalRenderState
+from dbt_diagrams.input_validators import DbtArtifacts
+from dbt_diagrams.mermaid import diagram_fingerprints, to_mermaid_erds_from_artifacts
+
+
+@dataclass
+class ProjectErds:
+    """
+    ERDs of a single dbt project, ready to be written to `output_dir`, and the time
+    spent on every step. For incremental runs, `diagrams` only holds the diagrams
+    (or their parts) that changed, `changed` their names and `state` the state they
+    were planned against.
+    """
+
+    name: str
+    output_dir: Path
+    diagrams: Dict[str, str] = field(default_factory=dict)
+    state: Optional[IncrementalRenderState] = None
+    fingerprints: Dict[str, str] = field(default_factory=dict)
+    changed: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    load_time: float = 0.0
+    build_time: float = 0.0
+    write_time: float = 0.0
+    error: Optional[str] = None
+    error_traceback: Optional[str] = None
+
+
+def project_name(target_dir: Path) -> str:
+    """
+    Name of the dbt project a target dir belongs to, used as its output subdirectory.
+    That is the name of the project dir for the default `<project>/target` layout.
+    """
+    resolved = target_dir.resolve()
+    return resolved.parent.name if resolved.name == "target" else resolved.name
+
+
+def build_project_erds(
+    name: str,
+    manifest_path: Path,
+    catalog_path: Optional[Path],
+    output_dir: Path,
+    output_format: str,
+    strict: bool = False,
+    incremental: bool = False,
+    max_entities: Optional[int] = None,
+) -> ProjectErds:
+    """
+    Read the artifacts of a project and build its ERDs. For `incremental` runs, only
+    the diagrams that changed since the previous run to `output_dir` are built.
+    """
+    project = ProjectErds(name=name, output_dir=output_dir)
+
+    start = time.perf_counter()
+    artifacts = DbtArtifacts.from_files(manifest_path, catalog_path, only_required_fields=True)
+    project.load_time = time.perf_counter() - start
+
+    build_erds(
+        project,
+        artifacts,
+        output_format,
+        strict,
+        IncrementalRenderState.load(output_dir) if incremental else None,
+        max_entities,
+    )
+    return project
+
+
+def build_erds(
+    project: ProjectErds,
+    artifacts: DbtArtifacts,
+    output_format: str,
+    strict: bool = False,
+    state: Optional[IncrementalRenderState] = None,
+    max_entities: Optional[int] = None,
+):
+    """
+    Build the ERDs of a project from already loaded artifacts. With a `state`, only
+    the diagrams that changed compared to it are built. With `max_entities`, larger
+    diagrams are split into parts.
+    """
+    start = time.perf_counter()
+    changed: Optional[List[str]] = None
+    if state is not None:
+        project.state = state
+        project.fingerprints = diagram_fingerprints(
+            artifacts.manifest, artifacts.catalog, max_entities=max_entities
+        )
+        changed, project.removed = state.plan(output_format, project.fingerprints)
+        project.changed = changed
+
+    project.diagrams = to_mermaid_erds_from_artifacts(
+        artifacts.manifest,
+        artifacts.catalog,
+        strict=strict,
+        diagrams=changed,
+        max_entities=max_entities,
+    )
+    if state is not None and changed:
+        # Parts of changed diagrams that won't be written again.
+        state.remove_stale_parts(output_format, changed, project.diagrams)
+    project.build_time = time.perf_counter() - start
+
+
+def _build_target_dir_erds(
+    name: str,
+    target_dir: Path,
+    output_dir: Path,
+    output_format: str,
+    strict: bool,
+    incremental: bool,
+    max_entities: Optional[int],
+) -> ProjectErds:
+    # Runs in a worker process, so errors are returned instead of raised to keep
+    # them from taking down the other projects.
+    try:
+        manifest_path, catalog_path = DbtArtifacts.paths_in_target_dir(target_dir)
+        return build_project_erds(
+            name,
+            manifest_path,
+            catalog_path,
+            output_dir,
+            output_format,
+            strict,
+            incremental,
+            max_entities,
+        )
+    except Exception as e:
+        return ProjectErds(
+            name=name, output_dir=output_dir, error=str(e), error_traceback=traceback.format_exc()
+        )
+
+
+def build_projects_erds(
+    target_dirs: List[Path],
+    output_dir: Path,
+    output_format: str,
+    strict: bool = False,
+    incremental: bool = False,
+    max_workers: Optional[int] = None,
+    max_entities: Optional[int] = None,
+) -> List[ProjectErds]:
+    """
+    Build the ERDs of many dbt projects in parallel, one process per project and at
+    most `max_workers` (CPU count by default) at the same time. Every project writes
+    to its own subdirectory of `output_dir`. Projects that fail have their `error` set.
+    """
+    names = [project_name(target_dir) for target_dir in target_dirs]
+    if duplicates := sorted({n for n in names if names.count(n) > 1}):
+        raise ValueError(
+            f"Multiple target dirs belong to a project named {', '.join(duplicates)}. "
+            "Every project needs a unique name as it is used as output directory."
+        )
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            executor.submit(
+                _build_target_dir_erds,
+                name,
+                target_dir,
+                output_dir / name,
+                output_format,
+                strict,
+                incremental,
+                max_entities,
+            )
+            for name, target_dir in zip(names, target_dirs)
+        ]
+        return [future.result() for future in futures]
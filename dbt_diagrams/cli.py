@@ -1,33 +1,56 @@
-import asyncio
 from functools import wraps
-import json
 import os
 from pathlib import Path
 import subprocess
 import sys
+import time
 import traceback
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Set
 import click
-import yaml
-from dbt_diagrams.input_validators import DbtArtifactType, verify_and_read
 from dbt_diagrams import __version__
 
-from dbt_diagrams.mermaid import (
-    add_mermaid_lib_to_html,
-    to_mermaid_erds_from_dbt_target_dir,
-    to_mermaid_erds_from_file,
-    update_docs_with_rendered_mermaid_erds,
-)
-from dbt_diagrams.output_writers import write_as_markdown, write_as_mmd, write_as_svg
+if TYPE_CHECKING:
+    from dbt_diagrams.batch import ProjectErds
+    from dbt_diagrams.output_writers import PagePool
+    from dbt_diagrams.profiling import Profiler
+    from dbt_diagrams.render_cache import SvgRenderCache
+
+# The CLI runs in pre-commit hooks and the like, so it has to start fast. Everything
+# beyond click is imported by the commands that need it, and the option defaults
+# below are duplicated from the modules that define them.
+DEFAULT_SVG_CONCURRENCY = 4
+DEFAULT_CACHE_DIR = Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")) / "dbt-diagrams"
+DEFAULT_MAX_CONCURRENT_REQUESTS = 8
+DEFAULT_MAX_QUEUED_REQUESTS = 32
+DEFAULT_API_CACHE_MAX_BYTES = 256 * 1024**2
 
 
 def coro(f):
     @wraps(f)
     def wrapper(*args, **kwargs):
+        import asyncio
+
         return asyncio.run(f(*args, **kwargs))
 
     return wrapper
 
 
+def _report_profile(profiler: "Profiler", json_path: Optional[Path]):
+    if not profiler.stages:
+        return
+
+    click.echo(f"\n{profiler.table()}")
+    if profiler.slowest_stage and profiler.cprofile_path:
+        click.echo(
+            f"cProfile stats of the slowest stage, {profiler.slowest_stage.name}, are "
+            f"written to {profiler.cprofile_path}"
+        )
+    if json_path:
+        import json
+
+        json_path.write_text(json.dumps(profiler.as_dict(), indent=2))
+
+
 def exit_with_error(msg: str):
     click.secho(msg, fg="red")
     sys.exit(1)
@@ -35,14 +58,40 @@ def exit_with_error(msg: str):
 
 @click.group
 @click.option("--debug", "-d", is_flag=True)
+@click.option(
+    "--profile",
+    is_flag=True,
+    help="Print the time and peak memory of every pipeline stage when done. Tracing memory "
+    "slows the run down.",
+)
+@click.option(
+    "--profile-json",
+    required=False,
+    help="Also write the stage timings as JSON to this file. Implies --profile.",
+    type=click.Path(file_okay=True, dir_okay=False, path_type=Path),
+)
+@click.option(
+    "--profile-cprofile",
+    required=False,
+    help="Write cProfile stats of the slowest stage to this file, to inspect with pstats or "
+    "snakeviz. Implies --profile.",
+    type=click.Path(file_okay=True, dir_okay=False, path_type=Path),
+)
 @click.version_option(version=__version__)
 @click.pass_context
-def cli(ctx, debug):
+def cli(ctx, debug, profile, profile_json, profile_cprofile):
     # ensure that ctx.obj exists and is a dict (in case `cli()` is called
     # by means other than the `if __name__ == "main"` block below)
     ctx.ensure_object(dict)
     ctx.obj["debug"] = debug
 
+    if profile or profile_json or profile_cprofile:
+        from dbt_diagrams.profiling import Profiler
+
+        profiler = ctx.with_resource(Profiler(cprofile_path=profile_cprofile))
+        # Runs after the command, also when it fails, but before the profiler stops.
+        ctx.call_on_close(lambda: _report_profile(profiler, profile_json))
+
 
 @cli.command()
 @coro
@@ -51,8 +100,10 @@ def cli(ctx, debug):
     "--dbt-target-dir",
     "-dbt-td",
     required=False,
-    help="Directory containing dbt manifest and optional catalog file(s).",
-    type=click.Path(exists=True, file_okay=False, dir_okay=True),
+    multiple=True,
+    help="Directory containing dbt manifest and optional catalog file(s). Repeat to render "
+    "the ERDs of multiple dbt projects at once, each to a subdirectory of the output directory.",
+    type=click.Path(exists=True, file_okay=False, dir_okay=True, path_type=Path),
 )
 @click.option(
     "--manifest",
@@ -80,15 +131,80 @@ def cli(ctx, debug):
     "-o",
     required=False,
     help="Output directory.",
-    type=click.Path(exists=True, file_okay=False, dir_okay=True),
+    type=click.Path(exists=True, file_okay=False, dir_okay=True, path_type=Path),
     default=Path(),
 )
-async def render_erds(ctx, dbt_target_dir, manifest, catalog, format, output_dir):
+@click.option(
+    "--strict",
+    is_flag=True,
+    help="Validate all dbt artifact tables and columns instead of only the ERD definitions.",
+)
+@click.option(
+    "--concurrency",
+    required=False,
+    help="Maximum number of diagrams that are rendered in parallel for SVG output.",
+    type=click.IntRange(min=1),
+    default=DEFAULT_SVG_CONCURRENCY,
+)
+@click.option(
+    "--cache-dir",
+    required=False,
+    help="Directory to cache rendered SVG diagrams in.",
+    type=click.Path(file_okay=False, dir_okay=True, path_type=Path),
+    default=DEFAULT_CACHE_DIR,
+)
+@click.option("--no-cache", is_flag=True, help="Always render SVG diagrams from scratch.")
+@click.option(
+    "--incremental",
+    is_flag=True,
+    help="Only write diagrams that changed since the previous incremental run to the "
+    "output directory, and remove diagrams that no longer exist.",
+)
+@click.option(
+    "--watch",
+    is_flag=True,
+    help="Keep running and render the ERDs again every time the manifest or catalog changes.",
+)
+@click.option(
+    "--jobs",
+    "-j",
+    required=False,
+    help="Maximum number of dbt projects that are processed in parallel when multiple target "
+    "dirs are given. Defaults to the number of CPUs.",
+    type=click.IntRange(min=1),
+)
+@click.option(
+    "--max-entities",
+    required=False,
+    help="Split diagrams with more tables into parts named <diagram>__part<N> of at most this "
+    "many tables, which render a lot faster. Stubs of tables in other parts don't count.",
+    type=click.IntRange(min=1),
+)
+async def render_erds(
+    ctx,
+    dbt_target_dir,
+    manifest,
+    catalog,
+    format,
+    output_dir,
+    strict,
+    concurrency,
+    cache_dir,
+    no_cache,
+    incremental,
+    watch,
+    jobs,
+    max_entities,
+):
     """
     Generate a Mermaid based ERD from your dbt artifacts that have been annotated
     with the right metadata. Check the code repository README for further instructions
     on metadata config.
     """
+    from dbt_diagrams.batch import build_project_erds, build_projects_erds
+    from dbt_diagrams.input_validators import DbtArtifacts
+    from dbt_diagrams.render_cache import SvgRenderCache
+
     if dbt_target_dir and (manifest or catalog):
         exit_with_error("Either define target dir or manifest but not both.")
     elif not dbt_target_dir and not (manifest or catalog):
@@ -101,49 +217,323 @@ async def render_erds(ctx, dbt_target_dir, manifest, catalog, format, output_dir
             fg="yellow",
         )
 
-    try:
+    output_format = format or "mmd"
+    batch = len(dbt_target_dir) > 1
+    cache = None if no_cache or format != "svg" else SvgRenderCache(cache_dir)
+    if watch:
+        if batch:
+            exit_with_error("--watch supports a single dbt project only.")
         if manifest:
-            diagrams = to_mermaid_erds_from_file(Path(manifest), Path(catalog) if catalog else None)
-        elif dbt_target_dir:
-            diagrams = to_mermaid_erds_from_dbt_target_dir(Path(dbt_target_dir))
+            manifest_path, catalog_path = Path(manifest), Path(catalog) if catalog else None
+        else:
+            # Also watch a catalog that doesn't exist yet.
+            manifest_path = dbt_target_dir[0] / "manifest.json"
+            catalog_path = dbt_target_dir[0] / "catalog.json"
+        await _watch_erds(
+            ctx,
+            output_dir,
+            manifest_path,
+            catalog_path,
+            format,
+            output_format,
+            strict,
+            incremental,
+            concurrency,
+            cache,
+            max_entities,
+        )
+        return
+
+    try:
+        if batch:
+            projects = build_projects_erds(
+                list(dbt_target_dir),
+                output_dir,
+                output_format,
+                strict,
+                incremental,
+                jobs,
+                max_entities,
+            )
         else:
-            exit_with_error("Neither manifest nor dbt target dir provided.")
+            if manifest:
+                manifest_path, catalog_path = Path(manifest), Path(catalog) if catalog else None
+            else:
+                manifest_path, catalog_path = DbtArtifacts.paths_in_target_dir(dbt_target_dir[0])
+            projects = [
+                build_project_erds(
+                    "",
+                    manifest_path,
+                    catalog_path,
+                    output_dir,
+                    output_format,
+                    strict,
+                    incremental,
+                    max_entities,
+                )
+            ]
     except Exception as e:
         if ctx.obj["debug"]:
             traceback.print_exc()
         exit_with_error(e)
 
-    if format == "md":
-        write_as_markdown(diagrams, output_dir)
-    elif format == "svg":
-        await write_as_svg(diagrams, output_dir)
-    else:
-        write_as_mmd(diagrams, output_dir)
+    succeeded = await _write_projects(
+        ctx, projects, format, output_format, batch, concurrency, cache, save_state=incremental
+    )
+
+    if batch:
+        _print_summary(projects)
+    if len(succeeded) < len(projects):
+        exit_with_error(f"Failed to render ERDs for {len(projects) - len(succeeded)} project(s).")
 
     click.secho(f"Finished. Output written to {output_dir.cwd()}.", fg="green")
 
 
-# Disable REST API for now because of multi-ERD support that needs to be built-in.
+async def _write_projects(
+    ctx,
+    projects: List["ProjectErds"],
+    format: Optional[str],
+    output_format: str,
+    batch: bool,
+    concurrency: int,
+    cache: Optional["SvgRenderCache"],
+    save_state: bool,
+    page_pool: Optional["PagePool"] = None,
+) -> List["ProjectErds"]:
+    """Write the diagrams of all projects that were built successfully and return those."""
+    from dbt_diagrams.output_writers import write_as_markdown, write_as_mmd, write_many_as_svg
+
+    succeeded = []
+    for project in projects:
+        prefix = f"{project.name}: " if batch else ""
+        if project.error:
+            click.secho(f"{prefix}{project.error}", fg="red")
+            if ctx.obj["debug"]:
+                click.echo(project.error_traceback)
+            continue
+
+        succeeded.append(project)
+        project.output_dir.mkdir(exist_ok=True)
+        if project.state is not None:
+            click.echo(
+                f"{prefix}{len(project.changed)} changed, "
+                f"{len(project.fingerprints) - len(project.changed)} unchanged and "
+                f"{len(project.removed)} removed diagrams."
+            )
+
+    if format == "svg":
+        # Diagrams of all projects are rendered on a single browser.
+        render_times_per_dir = await write_many_as_svg(
+            {project.output_dir: project.diagrams for project in succeeded},
+            concurrency=concurrency,
+            cache=cache,
+            page_pool=page_pool,
+        )
+        for project in succeeded:
+            prefix = f"{project.name}/" if batch else ""
+            for diagram_name, render_time in render_times_per_dir[project.output_dir].items():
+                if render_time is None:
+                    click.echo(f"Loaded {prefix}{diagram_name} from cache")
+                else:
+                    project.write_time += render_time
+                    click.echo(f"Rendered {prefix}{diagram_name} in {render_time:.2f}s")
+        if cache:
+            click.echo(f"SVG cache: {cache.hits} hits, {cache.misses} misses")
+    else:
+        write = write_as_markdown if format == "md" else write_as_mmd
+        for project in succeeded:
+            start = time.perf_counter()
+            write(project.diagrams, project.output_dir)
+            project.write_time = time.perf_counter() - start
+
+    for project in succeeded:
+        if project.state is not None:
+            project.state.remove(output_format, project.removed)
+            project.state.update(output_format, project.fingerprints)
+            if save_state:
+                project.state.save()
+
+    return succeeded
+
+
+async def _watch_erds(
+    ctx,
+    output_dir: Path,
+    manifest_path: Path,
+    catalog_path: Optional[Path],
+    format: Optional[str],
+    output_format: str,
+    strict: bool,
+    incremental: bool,
+    concurrency: int,
+    cache: Optional["SvgRenderCache"],
+    max_entities: Optional[int] = None,
+):
+    """
+    Render the ERDs of a project and render them again every time its artifacts
+    change. Artifacts that didn't change, the browser with Mermaid loaded on its pages,
+    the SVG cache and the fingerprints of all diagrams are kept between runs, so only
+    the diagrams that changed are rendered again.
+    """
+    from contextlib import AsyncExitStack
+
+    from dbt_diagrams.batch import ProjectErds, build_erds
+    from dbt_diagrams.incremental import IncrementalRenderState
+    from dbt_diagrams.input_validators import DbtArtifacts, DbtArtifactType, verify_and_read_subset
+    from dbt_diagrams.output_writers import get_browser, mermaid_page_pool
+    from dbt_diagrams.watch import ArtifactWatcher
+
+    artifact_types = {manifest_path: DbtArtifactType.MANIFEST}
+    if catalog_path:
+        artifact_types[catalog_path] = DbtArtifactType.CATALOG
+    loaded: Dict[Path, Optional[Dict[str, Any]]] = {}
+    state = (
+        IncrementalRenderState.load(output_dir)
+        if incremental
+        else IncrementalRenderState(output_dir, {})
+    )
+
+    async def render(changed_paths: Set[Path], page_pool: Optional["PagePool"]):
+        start = time.perf_counter()
+        project = ProjectErds(name="", output_dir=output_dir)
+        try:
+            for path in changed_paths:
+                loaded[path] = (
+                    verify_and_read_subset(path, artifact_types[path]) if path.exists() else None
+                )
+            manifest = loaded[manifest_path]
+            if manifest is None:
+                raise ValueError(f"{manifest_path} doesn't exists and is required as a minimum.")
+            project.load_time = time.perf_counter() - start
+            artifacts = DbtArtifacts(manifest, loaded[catalog_path] if catalog_path else None)
+            build_erds(project, artifacts, output_format, strict, state, max_entities)
+        except Exception as e:
+            # Artifacts can be missing or inconsistent while dbt is still writing them.
+            click.secho(f"{e} Waiting for the next change.", fg="yellow")
+            if ctx.obj["debug"]:
+                traceback.print_exc()
+            return
+
+        try:
+            await _write_projects(
+                ctx,
+                [project],
+                format,
+                output_format,
+                False,
+                concurrency,
+                cache,
+                incremental,
+                page_pool,
+            )
+        except Exception as e:
+            # Like a diagram that Mermaid can't render, which the next change might fix.
+            click.secho(f"Could not write ERDs: {e} Waiting for the next change.", fg="red")
+            if ctx.obj["debug"]:
+                traceback.print_exc()
+            return
+
+        click.secho(
+            f"Updated in {time.perf_counter() - start:.2f}s. Watching for changes...", fg="green"
+        )
+
+    async with AsyncExitStack() as stack:
+        page_pool = None
+        if format == "svg":
+            browser = await stack.enter_async_context(get_browser())
+            page_pool = mermaid_page_pool(browser, concurrency)
+            stack.push_async_callback(page_pool.close)
+
+        await render(set(artifact_types), page_pool)
+        async for changed_paths in ArtifactWatcher(artifact_types).changes():
+            await render(changed_paths, page_pool)
+
+
+def _print_summary(projects: List["ProjectErds"]):
+    name_width = max(len("project"), *(len(p.name) for p in projects)) + 2
+    click.echo(
+        f"\n{'project':<{name_width}}{'diagrams':>10}{'load (s)':>10}{'build (s)':>11}"
+        f"{'write (s)':>11}{'total (s)':>11}"
+    )
+    for p in projects:
+        if p.error:
+            click.echo(f"{p.name:<{name_width}}{'failed':>10}")
+        else:
+            click.echo(
+                f"{p.name:<{name_width}}{len(p.diagrams):>10}{p.load_time:>10.2f}"
+                f"{p.build_time:>11.2f}{p.write_time:>11.2f}"
+                f"{p.load_time + p.build_time + p.write_time:>11.2f}"
+            )
 
-# @cli.command()
-# @click.pass_context
-# @click.option("--host", "-h", required=False, type=str, default="0.0.0.0")
-# @click.option("--port", "-p", required=False, type=int, default=8000)
-# def rest_api(ctx, host, port):
-#     """
-#     Start REST API that exposes dbt erd generation functionality by uploading dbt artifacts.
-#     Visit the `/docs` endpoint for usage instructions.
 
-#     Check the code repository README for further instructions
-#     on metadata config.
-#     """
-#     click.echo("Starting REST API")
-#     import uvicorn
-#     from dbt_diagrams.rest_api import app
+@cli.command()
+@click.pass_context
+@click.option("--host", "-h", required=False, type=str, default="0.0.0.0")
+@click.option("--port", "-p", required=False, type=int, default=8000)
+@click.option(
+    "--max-concurrent-requests",
+    required=False,
+    help="Maximum number of requests that are processed at the same time.",
+    type=click.IntRange(min=1),
+    default=DEFAULT_MAX_CONCURRENT_REQUESTS,
+)
+@click.option(
+    "--max-queued-requests",
+    required=False,
+    help="Maximum number of requests waiting to be processed. Any more get a 503 response.",
+    type=click.IntRange(min=0),
+    default=DEFAULT_MAX_QUEUED_REQUESTS,
+)
+@click.option(
+    "--parse-workers",
+    required=False,
+    help="Number of processes that parse uploaded artifacts. Defaults to the number of CPUs.",
+    type=click.IntRange(min=1),
+)
+@click.option(
+    "--svg-pages",
+    required=False,
+    help="Number of browser pages that render SVG diagrams in parallel.",
+    type=click.IntRange(min=1),
+    default=DEFAULT_SVG_CONCURRENCY,
+)
+@click.option(
+    "--cache-max-bytes",
+    required=False,
+    help="Maximum size of built ERDs and responses kept in memory. Use 0 to disable caching.",
+    type=click.IntRange(min=0),
+    default=DEFAULT_API_CACHE_MAX_BYTES,
+)
+def rest_api(
+    ctx,
+    host,
+    port,
+    max_concurrent_requests,
+    max_queued_requests,
+    parse_workers,
+    svg_pages,
+    cache_max_bytes,
+):
+    """
+    Start REST API that exposes dbt erd generation functionality by uploading dbt artifacts.
+    Visit the `/docs` endpoint for usage instructions.
+
+    Check the code repository README for further instructions
+    on metadata config.
+    """
+    click.echo("Starting REST API")
+    import uvicorn
+    from dbt_diagrams.rest_api import create_app
 
-#     uvicorn.run(
-#         app, host=host, port=port, workers=1, log_level="debug" if ctx.obj["debug"] else "info"
-#     )
+    uvicorn.run(
+        create_app(
+            max_concurrent_requests, max_queued_requests, parse_workers, svg_pages, cache_max_bytes
+        ),
+        host=host,
+        port=port,
+        workers=1,
+        log_level="debug" if ctx.obj["debug"] else "info",
+    )
 
 
 @cli.group()
@@ -166,8 +556,28 @@ def docs(ctx):
     type=bool,
     default=True,
 )
+@click.option(
+    "--max-entities",
+    required=False,
+    help="Split diagrams with more tables into parts named <diagram>__part<N> of at most this "
+    "many tables, which render a lot faster. Stubs of tables in other parts don't count. "
+    "References to a split diagram in docs show all its parts.",
+    type=click.IntRange(min=1),
+)
 @click.argument("docs_args", nargs=-1, type=click.UNPROCESSED)
-def generate(ctx, include_columns, docs_args):
+def generate(ctx, include_columns, max_entities, docs_args):
+    import yaml
+
+    from dbt_diagrams.artifact_writers import patch_json_file
+    from dbt_diagrams.input_validators import DbtArtifacts
+    from dbt_diagrams.mermaid import (
+        add_mermaid_lib_to_html,
+        to_mermaid_erds_from_artifacts,
+        update_docs_with_rendered_mermaid_erds,
+        write_static_index_html,
+    )
+    from dbt_diagrams.profiling import span
+
     list_docs_args = list(docs_args)
     cli_target_path = next(
         iter(
@@ -185,13 +595,14 @@ def generate(ctx, include_columns, docs_args):
     # Make sure to strip out --static from the list of args passed to dbt docs generate.
     # We manually mimic the behaviour below. If we let dbt take its normal code path, we
     # can't update the manifest.json with rendered diagrams in time.
-    subprocess.run(
-        " ".join(
-            ["dbt", "docs", "generate"] + [arg for arg in list_docs_args if arg != "--static"]
-        ),
-        shell=True,
-        check=True,
-    )
+    with span("dbt_docs_generate"):
+        subprocess.run(
+            " ".join(
+                ["dbt", "docs", "generate"] + [arg for arg in list_docs_args if arg != "--static"]
+            ),
+            shell=True,
+            check=True,
+        )
     click.echo("Finished generating dbt docs. Rendering ERD's and adding Mermaid...")
 
     with open("./dbt_project.yml", "r") as dbt_project_file:
@@ -212,30 +623,29 @@ def generate(ctx, include_columns, docs_args):
     )
 
     try:
-        rendered_erds = to_mermaid_erds_from_dbt_target_dir(target_dir, include_columns)
-        manifest = verify_and_read(target_dir / "manifest.json", DbtArtifactType.MANIFEST)
-        update_docs_with_rendered_mermaid_erds(manifest, rendered_erds)
-
-        with open(target_dir / "manifest.json", "w") as w_manifest:
-            json.dump(manifest, w_manifest)
+        # Only the sections needed for ERDs and doc blocks are read. Changed docs are
+        # patched into manifest.json and the static page copies the files from disk.
+        artifacts = DbtArtifacts.from_target_dir(target_dir, only_required_fields=True)
+        rendered_erds = to_mermaid_erds_from_artifacts(
+            artifacts.manifest, artifacts.catalog, include_columns, max_entities=max_entities
+        )
+        changed_docs = update_docs_with_rendered_mermaid_erds(artifacts.manifest, rendered_erds)
+
+        # Only splice the changed docs into manifest.json instead of dumping it completely.
+        with span("write_manifest"):
+            patch_json_file(
+                target_dir / "manifest.json",
+                {
+                    (section, unique_id, field): artifacts.manifest[section][unique_id][field]
+                    for section, unique_id, field in changed_docs
+                },
+            )
 
         add_mermaid_lib_to_html(target_dir)
 
         # Mimic the behaviour of dbt docs generate --static.
         if static_docs_page:
-            manifest = verify_and_read(target_dir / "manifest.json", DbtArtifactType.MANIFEST)
-            catalog = verify_and_read(target_dir / "catalog.json", DbtArtifactType.CATALOG)
-
-            # This setup comes straight from
-            # https://github.com/mescanne/dbt-core/blob/e8c8eb2b7fc64e0db2817de0b538780d56c7fd99/core/dbt/task/generate.py#L280
-            with open(target_dir / "index.html", "r") as index_html_handle:
-                index_html = index_html_handle.read()
-
-            index_html = index_html.replace('"MANIFEST.JSON INLINE DATA"', json.dumps(manifest))
-            index_html = index_html.replace('"CATALOG.JSON INLINE DATA"', json.dumps(catalog))
-
-            with open(target_dir / "static_index.html", "w") as s_index_html_handle:
-                s_index_html_handle.write(index_html)
+            write_static_index_html(target_dir)
 
         click.secho("All done.", fg="green")
     except Exception as e:
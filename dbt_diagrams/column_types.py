@@ -0,0 +1,125 @@
+"""
+Normalisation of warehouse column types into types Mermaid accepts in an ERD, which
+are limited to letters, digits, `-`, `_`, brackets and parentheses. Every adapter
+(see `adapter_type` in the manifest metadata) has its own rules, for instance for
+the multi-word type names of Postgres. The fields of nested types like BigQuery's
+`STRUCT<...>` are left out, as they don't fit in an ERD anyway.
+
+Projects have many columns, but few distinct types, so results are memoised.
+"""
+
+from dataclasses import dataclass, field
+from functools import lru_cache
+from itertools import accumulate
+import re
+from typing import Dict, FrozenSet, Optional, Tuple
+
+# Comfortably more than the number of distinct types of large projects. Keys are the
+# type strings of the catalog, so the cache mostly holds references to those.
+MAX_CACHED_TYPES = 65536
+
+
+@dataclass(frozen=True)
+class AdapterTypeRules:
+    # Applied in order, before anything else.
+    replacements: Tuple[Tuple["re.Pattern[str]", str], ...] = ()
+    # Nested types of which the fields are left out, like STRUCT<a INT64> or
+    # STRUCT(a INTEGER), both of which become STRUCT[].
+    composites: FrozenSet[str] = field(default_factory=frozenset)
+
+
+def _aliases(aliases: Dict[str, str]) -> Tuple[Tuple["re.Pattern[str]", str], ...]:
+    return tuple(
+        (re.compile(rf"\b{re.escape(name)}\b", re.IGNORECASE), alias)
+        for name, alias in aliases.items()
+    )
+
+
+ADAPTER_TYPE_RULES: Dict[str, AdapterTypeRules] = {
+    "bigquery": AdapterTypeRules(composites=frozenset({"STRUCT"})),
+    "snowflake": AdapterTypeRules(composites=frozenset({"OBJECT", "MAP", "VECTOR"})),
+    "postgres": AdapterTypeRules(
+        replacements=_aliases(
+            {
+                "character varying": "varchar",
+                "timestamp without time zone": "timestamp",
+                "timestamp with time zone": "timestamptz",
+                "time without time zone": "time",
+                "time with time zone": "timetz",
+                "double precision": "float8",
+                "bit varying": "varbit",
+            }
+        )
+    ),
+    "duckdb": AdapterTypeRules(
+        replacements=_aliases(
+            {"timestamp with time zone": "TIMESTAMPTZ", "time with time zone": "TIMETZ"}
+        ),
+        composites=frozenset({"STRUCT", "MAP", "UNION"}),
+    ),
+}
+# For other adapters, or when the adapter is unknown.
+_DEFAULT_RULES = AdapterTypeRules(
+    composites=frozenset().union(*(r.composites for r in ADAPTER_TYPE_RULES.values()))
+)
+
+_DECIMAL = re.compile(r"DECIMAL\([^)]*\)", re.IGNORECASE)
+# Like NUMERIC(10, 2) or NUMBER(38,0).
+_PRECISION_AND_SCALE = re.compile(r"\(\s*\d+\s*,\s*\d+\s*\)")
+_NOT_ALLOWED_BY_MERMAID = re.compile(r"[^A-Za-z0-9_\-\[\]()]+")
+_BRACKETS = re.compile(r"([<>()])")
+_TRAILING_WORD = re.compile(r"\w*$")
+_DEPTH_CHANGE = {"<": 1, "(": 1, ">": -1, ")": -1}
+_MERMAID_BRACKETS = {"<": "[", "(": "(", ">": "]", ")": ")"}
+
+
+def _last_word(text: str) -> str:
+    match = _TRAILING_WORD.search(text)
+    return match[0] if match else ""
+
+
+def _collapse_composites(column_type: str, composites: FrozenSet[str]) -> str:
+    """
+    Leave out the fields of composite types and turn angle brackets into square
+    ones. Fields are skipped by looking up where the bracket depth drops below that
+    of the composite, so deeply nested types take linear time.
+    """
+    if "<" not in column_type and "(" not in column_type:
+        return column_type
+
+    # Text and brackets alternate, starting and ending with (possibly empty) text.
+    parts = _BRACKETS.split(column_type)
+    brackets = parts[1::2]
+    depths = list(accumulate(map(_DEPTH_CHANGE.__getitem__, brackets)))
+    out = [parts[0]]
+    idx = 0
+    while idx < len(brackets):
+        bracket = brackets[idx]
+        if bracket in "<(" and _last_word(out[-1]).upper() in composites:
+            out.append("[]")
+            try:
+                idx = depths.index(depths[idx] - 1, idx)
+            except ValueError:
+                # Never closed, so everything that follows is a field.
+                break
+        else:
+            out.append(_MERMAID_BRACKETS[bracket])
+        out.append(parts[2 * idx + 2])
+        idx += 1
+    return "".join(out)
+
+
+@lru_cache(maxsize=MAX_CACHED_TYPES)
+def normalize_column_type(column_type: str, adapter: Optional[str] = None) -> str:
+    """
+    Column type as it can be shown in a Mermaid ERD, for the given dbt adapter.
+    For example `ARRAY<STRUCT<a INT64>>` becomes `ARRAY[STRUCT[]]`.
+    """
+    rules = ADAPTER_TYPE_RULES.get(adapter or "", _DEFAULT_RULES)
+    for pattern, replacement in rules.replacements:
+        column_type = pattern.sub(replacement, column_type)
+
+    column_type = _DECIMAL.sub("decimal", column_type)
+    column_type = _collapse_composites(column_type, rules.composites)
+    column_type = _PRECISION_AND_SCALE.sub("", column_type)
+    return _NOT_ALLOWED_BY_MERMAID.sub("_", column_type.strip())
@@ -1,8 +1,13 @@
+from dataclasses import asdict, dataclass
 from enum import Enum
-import re
-from typing import Any, Dict, List, Optional
+from typing import Any, Collection, Dict, List, Optional, TYPE_CHECKING
 
-from pydantic import BaseModel, Field, ConfigDict
+from pydantic import BaseModel, Field, ConfigDict, TypeAdapter
+
+from dbt_diagrams.column_types import normalize_column_type
+
+if TYPE_CHECKING:
+    from dbt_diagrams.manifest_index import ManifestIndex
 
 
 class Cardinality(Enum):
@@ -44,14 +49,31 @@ class MetaERDSection(BaseModel):
     connections: List[MetaERDConnection] = Field(default_factory=list)
 
 
-class Column(BaseModel):
-    model_config = ConfigDict(extra="forbid")
+_type_adapters: Dict[type, TypeAdapter] = {}
+
+
+def validate_strictly(obj: Any):
+    """
+    Column, Table and Relation are plain dataclasses because their input is generated
+    by dbt itself and validating every column with pydantic is expensive for wide
+    tables. Use this to run full pydantic validation on them anyway.
+    """
+    if type(obj) not in _type_adapters:
+        _type_adapters[type(obj)] = TypeAdapter(type(obj))
+    _type_adapters[type(obj)].validate_python(asdict(obj))
+
+
+# The domain classes below are built from trusted dbt artifacts. Explicit __slots__
+# instead of dataclass(slots=True) to remain Python 3.9 compatible.
+@dataclass
+class Column:
+    __slots__ = ("name", "type")
 
     name: str
     type: Optional[str]
 
-    def as_mermaid_column(self) -> str:
-        type_str = f"{self.as_mermaid_type()} " if self.type else "UNKNOWN "
+    def as_mermaid_column(self, adapter: Optional[str] = None) -> str:
+        type_str = f"{self.as_mermaid_type(adapter)} " if self.type else "UNKNOWN "
         return f"\t{type_str}{self.as_mermaid_name()}"
 
     def as_mermaid_name(self) -> str:
@@ -62,22 +84,10 @@ class Column(BaseModel):
         splitted = self.name.split(".")
         return "".join([f"{x}[" for x in splitted[:-1]]) + splitted[-1] + (len(splitted) - 1) * "]"
 
-    def as_mermaid_type(self) -> Optional[str]:
-        if self.type:
-            # Type string can come in like
-            # STRUCT<a INT64, b NUMERIC> or
-            # ARRAY<STRUCT<a INT64, b NUMERIC>>
-            # We need to remove the content of the struct type
-            # because it's not allowed by Mermaid syntax.
-            if "STRUCT" in self.type:
-                cleaned_struct_type = re.sub("(.*STRUCT<)(.*?)(>.*)", r"\1\3", self.type)
-                return cleaned_struct_type.replace("<", "[").replace(">", "]")
-            elif "DECIMAL" in self.type.upper():  # Check uppercase version
-                return re.sub(r"DECIMAL\([^)]*\)", "decimal", self.type, flags=re.IGNORECASE)
-            else:
-                return self.type
-        else:
-            return None
+    def as_mermaid_type(self, adapter: Optional[str] = None) -> Optional[str]:
+        # Type strings can come in like STRUCT<a INT64, b NUMERIC> or
+        # NUMBER(38,0), which are not allowed by Mermaid syntax. See `column_types`.
+        return normalize_column_type(self.type, adapter) if self.type else None
 
     @classmethod
     def from_manifest_catalog_node_columns(
@@ -97,8 +107,9 @@ class Column(BaseModel):
         return cls(name=col_name, type=col_type)  # type: ignore [arg-type]
 
 
-class Table(BaseModel):
-    model_config = ConfigDict(extra="forbid")
+@dataclass
+class Table:
+    __slots__ = ("model_name", "rendered_name", "target_database", "target_schema", "columns")
 
     model_name: str
     rendered_name: str
@@ -106,16 +117,19 @@ class Table(BaseModel):
     target_schema: str
     columns: List[Column]
 
-    def as_mermaid_table(self, include_cols=False) -> str:
+    def as_mermaid_table(self, include_cols=False, adapter: Optional[str] = None) -> str:
         if include_cols:
-            cols = "\n\t".join([c.as_mermaid_column() for c in self.columns])
+            cols = "\n\t".join([c.as_mermaid_column(adapter) for c in self.columns])
             return f"{self.rendered_name}" + " {\n" + f"\t{cols}" + "\n\t}"
         else:
             return self.rendered_name
 
     @classmethod
     def from_manifest_catalog_nodes(
-        cls, manifest_node: Dict[str, Any], catalog_node: Optional[Dict[str, Any]] = None
+        cls,
+        manifest_node: Dict[str, Any],
+        catalog_node: Optional[Dict[str, Any]] = None,
+        strict: bool = False,
     ) -> "Table":
         catalog_node_cols = catalog_node.get("columns", {}) if catalog_node else {}
         manifest_node_cols = manifest_node.get("columns", {})
@@ -123,7 +137,7 @@ class Table(BaseModel):
         # missing_manifest_col_ids = set(catalog_node_cols.keys()) - set(manifest_node_cols.keys())
         all_col_ids = set(catalog_node_cols.keys()) | set(manifest_node_cols.keys())
 
-        return cls(
+        table = cls(
             model_name=manifest_node["name"],
             rendered_name=manifest_node["alias"],
             target_database=manifest_node["database"],
@@ -140,9 +154,22 @@ class Table(BaseModel):
             ),
         )
 
+        if strict:
+            validate_strictly(table)
 
-class Relation(BaseModel):
-    model_config = ConfigDict(extra="forbid")
+        return table
+
+
+@dataclass
+class Relation:
+    __slots__ = (
+        "diagram",
+        "source",
+        "target",
+        "source_cardinality",
+        "target_cardinality",
+        "label",
+    )
 
     diagram: str
     source: Table
@@ -164,19 +191,30 @@ class Relation(BaseModel):
             return base + ' : ""'
 
     @classmethod
-    def from_manifest_node(cls, manifest_node: dict, tables: Dict[str, Table]) -> List["Relation"]:
+    def from_manifest_node(
+        cls,
+        manifest_node: dict,
+        index: "ManifestIndex",
+        diagrams: Optional[Collection[str]] = None,
+    ) -> List["Relation"]:
+        """
+        All relations defined in the ERD section of this node. Use `diagrams` to
+        only build the relations of the given diagrams.
+        """
         try:
             source_model_name = manifest_node["name"]
-            source = tables[source_model_name]
+            source = index.table(manifest_node["unique_id"])
             erd_definition = MetaERDSection(**manifest_node["meta"].get("erd", {}))
         except KeyError:
             raise Exception(f"Source table {source_model_name} has not been parsed correctly.")
 
         output = []
         for conn in erd_definition.connections:
-            try:
-                target = tables[conn.target]
-            except KeyError:
+            if diagrams is not None and conn.diagram not in diagrams:
+                continue
+
+            target_id = index.resolve(conn.target, manifest_node.get("package_name"))
+            if target_id is None:
                 raise ValueError(
                     f"Target {conn.target} in relation originating from table "
                     f"{source_model_name} does not exist or has not been loaded."
@@ -186,7 +224,7 @@ class Relation(BaseModel):
                 Relation(
                     diagram=conn.diagram,
                     source=source,
-                    target=target,
+                    target=index.table(target_id),
                     source_cardinality=conn.source_cardinality,
                     target_cardinality=conn.target_cardinality,
                     label=conn.label,
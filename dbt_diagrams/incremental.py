@@ -0,0 +1,85 @@
+import glob
+import json
+import os
+from pathlib import Path
+from typing import Collection, Dict, List, Tuple
+
+from dbt_diagrams.partitioning import PART_SEPARATOR, is_part_of
+
+STATE_FILE_NAME = ".dbt-diagrams-state.json"
+
+
+class IncrementalRenderState:
+    """
+    Fingerprints (see `mermaid.diagram_fingerprints`) of all diagrams that were written
+    to an output directory, per output format. Stored in that same output directory, so
+    subsequent runs only need to write the diagrams that actually changed. Diagrams
+    that are split into parts (see `partitioning`) are tracked by the diagram name.
+    """
+
+    def __init__(self, output_dir: Path, fingerprints: Dict[str, Dict[str, str]]):
+        self.output_dir = output_dir
+        self.fingerprints = fingerprints
+
+    @classmethod
+    def load(cls, output_dir: Path) -> "IncrementalRenderState":
+        try:
+            with open(output_dir / STATE_FILE_NAME, "r") as f:
+                return cls(output_dir, json.load(f)["fingerprints"])
+        except (FileNotFoundError, ValueError, KeyError):
+            return cls(output_dir, {})
+
+    def save(self):
+        tmp_path = self.output_dir / f"{STATE_FILE_NAME}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"fingerprints": self.fingerprints}, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.output_dir / STATE_FILE_NAME)
+
+    def plan(self, output_format: str, fingerprints: Dict[str, str]) -> Tuple[List[str], List[str]]:
+        """
+        Return the diagrams that have to be (re)written and the diagrams that no
+        longer exist and should be removed from the output directory.
+        """
+        previous = self.fingerprints.get(output_format, {})
+        changed = [
+            diagram_name
+            for diagram_name, fingerprint in fingerprints.items()
+            if previous.get(diagram_name) != fingerprint
+            or not (
+                (self.output_dir / f"{diagram_name}.{output_format}").exists()
+                or self._written_files(diagram_name, output_format)
+            )
+        ]
+        removed = [diagram_name for diagram_name in previous if diagram_name not in fingerprints]
+        return changed, removed
+
+    def _written_files(self, diagram_name: str, output_format: str) -> List[Path]:
+        """The file of a diagram, or the files of all its parts."""
+        path = self.output_dir / f"{diagram_name}.{output_format}"
+        parts = self.output_dir.glob(
+            f"{glob.escape(diagram_name)}{PART_SEPARATOR}*.{output_format}"
+        )
+        return [
+            *([path] if path.exists() else []),
+            *(p for p in parts if is_part_of(p.name[: -len(output_format) - 1], diagram_name)),
+        ]
+
+    def remove(self, output_format: str, diagram_names: List[str]):
+        for diagram_name in diagram_names:
+            for path in self._written_files(diagram_name, output_format):
+                path.unlink(missing_ok=True)
+
+    def remove_stale_parts(
+        self, output_format: str, diagram_names: Collection[str], written: Collection[str]
+    ):
+        """
+        Remove the files of `diagram_names` that are not about to be `written`, left
+        behind when a diagram got split into a different number of parts.
+        """
+        for diagram_name in diagram_names:
+            for path in self._written_files(diagram_name, output_format):
+                if path.name[: -len(output_format) - 1] not in written:
+                    path.unlink(missing_ok=True)
+
+    def update(self, output_format: str, fingerprints: Dict[str, str]):
+        self.fingerprints[output_format] = dict(fingerprints)
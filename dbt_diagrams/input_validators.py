@@ -1,9 +1,28 @@
+from dataclasses import dataclass
 from enum import Enum
 from pathlib import Path
 import re
-from typing import Any, BinaryIO, Dict, Tuple
+from typing import Any, BinaryIO, Dict, Optional, Tuple, Union
 import json
 
+from dbt_diagrams import json_backend
+from dbt_diagrams.artifact_schemas import (
+    ArtifactHeader,
+    Catalog,
+    CatalogNode,
+    Manifest,
+    ManifestDoc,
+    ManifestNode,
+)
+from dbt_diagrams.json_scanner import (
+    ValueReader,
+    json_decoder,
+    read_object,
+    skip_value,
+    skip_whitespace,
+)
+from dbt_diagrams.profiling import span
+
 SUPPORTED_MANIFEST_VERSIONS = {"min": 4, "max": 12}
 SUPPORTED_CATALOG_VERSIONS = {"min": 1, "max": 1}
 
@@ -26,10 +45,26 @@ class DbtArtifactType(Enum):
     MANIFEST = "manifest"
 
 
-def verify_and_read_f(file: BinaryIO, artifact_type: DbtArtifactType) -> Dict[str, Any]:
-    file.seek(0)
-    loaded_file: Dict[str, Any] = json.load(file)
+# Per artifact type, the schema of the parts dbt-diagrams actually reads and, derived
+# from it, the top level sections and the fields of their entries that are kept.
+# Everything else (macros, sources, exposures, parent/child maps, compiled SQL, ...)
+# is skipped while reading.
+ARTIFACT_SCHEMAS: Dict[DbtArtifactType, Any] = {
+    DbtArtifactType.MANIFEST: Manifest,
+    DbtArtifactType.CATALOG: Catalog,
+}
+ARTIFACT_SUBSETS: Dict[DbtArtifactType, Dict[str, Tuple[str, ...]]] = {
+    DbtArtifactType.MANIFEST: {
+        "nodes": tuple(ManifestNode.__annotations__),
+        "docs": tuple(ManifestDoc.__annotations__),
+    },
+    DbtArtifactType.CATALOG: {
+        "nodes": tuple(CatalogNode.__annotations__),
+    },
+}
 
+
+def verify_schema_version(loaded_file: Dict[str, Any], artifact_type: DbtArtifactType):
     try:
         version_string, version_number = extract_schema_version(loaded_file)
     except Exception:
@@ -42,13 +77,13 @@ def verify_and_read_f(file: BinaryIO, artifact_type: DbtArtifactType) -> Dict[st
         and version_number >= SUPPORTED_CATALOG_VERSIONS["min"]
         and version_number <= SUPPORTED_CATALOG_VERSIONS["max"]
     ):
-        return loaded_file
+        return
     elif artifact_type == DbtArtifactType.MANIFEST and (
         "/manifest/" in version_string
         and version_number >= SUPPORTED_MANIFEST_VERSIONS["min"]
         and version_number <= SUPPORTED_MANIFEST_VERSIONS["max"]
     ):
-        return loaded_file
+        return
     else:
         min_version = (
             SUPPORTED_CATALOG_VERSIONS["min"]
@@ -66,6 +101,155 @@ def verify_and_read_f(file: BinaryIO, artifact_type: DbtArtifactType) -> Dict[st
         )
 
 
+def verify_and_read_f(file: BinaryIO, artifact_type: DbtArtifactType) -> Dict[str, Any]:
+    file.seek(0)
+    loaded_file: Dict[str, Any] = json_backend.loads(file.read())
+    verify_schema_version(loaded_file, artifact_type)
+    return loaded_file
+
+
 def verify_and_read(file_path: Path, artifact_type: DbtArtifactType) -> Dict[str, Any]:
-    with open(file_path, "r") as f:
-        return verify_and_read_f(f, artifact_type)  # type: ignore [arg-type]
+    with span(f"read_{artifact_type.value}"), open(file_path, "rb") as f:
+        return verify_and_read_f(f, artifact_type)
+
+
+def _select_subset(loaded_file: Dict[str, Any], artifact_type: DbtArtifactType) -> Dict[str, Any]:
+    subset = ARTIFACT_SUBSETS[artifact_type]
+    return {
+        key: (
+            {
+                unique_id: {f: entry[f] for f in subset[key] if f in entry}
+                for unique_id, entry in value.items()
+            }
+            if key in subset and isinstance(value, dict)
+            else value
+        )
+        for key, value in loaded_file.items()
+        if key in subset or key == "metadata"
+    }
+
+
+def verify_and_read_subset_f(
+    file: Union[BinaryIO, Any], artifact_type: DbtArtifactType
+) -> Dict[str, Any]:
+    """
+    Same as `verify_and_read_f`, but only keeps the parts of the artifact that are
+    listed in `ARTIFACT_SUBSETS`. The schema version is checked as soon as the
+    `metadata` section has been read, so unsupported files fail before the rest
+    of the file gets decoded.
+
+    With a fast JSON backend installed, decoding the whole file in native code and
+    dropping what isn't needed afterwards beats walking it in Python. Backends that
+    decode into types (msgspec) skip the unneeded parts during decoding and check
+    the result against `ARTIFACT_SCHEMAS`. Otherwise, the top level sections are
+    decoded one at a time by the standard library decoder and dropped right away
+    when they are not needed. The whole file is still read into memory, so this is
+    about on par with `json.load` on time and only somewhat lower on peak memory.
+    """
+    file.seek(0)
+    content = file.read()
+    backend = json_backend.current_backend()
+    if backend.loads_typed is not None:
+        try:
+            # Skipping everything but the metadata is cheap compared to decoding.
+            verify_schema_version(backend.loads_typed(content, ArtifactHeader), artifact_type)
+            with json_backend.gc_paused():
+                typed: Dict[str, Any] = backend.loads_typed(
+                    content, ARTIFACT_SCHEMAS[artifact_type]
+                )
+        except backend.decode_errors as e:
+            raise ValueError(
+                f"Provided {artifact_type.value} file is not valid JSON or doesn't match "
+                f"the supported schema: {e}"
+            )
+        return typed
+    elif backend.name != json_backend.STDLIB_BACKEND:
+        try:
+            loaded: Dict[str, Any] = json_backend.loads(content)
+        except backend.decode_errors as e:
+            raise ValueError(f"Provided {artifact_type.value} file is not valid JSON: {e}")
+        verify_schema_version(loaded, artifact_type)
+        with json_backend.gc_paused():
+            return _select_subset(loaded, artifact_type)
+
+    doc: str = content.decode("utf-8") if isinstance(content, bytes) else content
+    # Only the decoded document is walked, so don't hold on to both.
+    del content
+    subset = ARTIFACT_SUBSETS[artifact_type]
+    metadata: Optional[Dict[str, Any]] = None
+
+    def read_entry_fields(fields: Tuple[str, ...]) -> ValueReader:
+        def read_entry(_key: str, doc: str, idx: int) -> Tuple[Any, int]:
+            entry, idx = json_decoder.raw_decode(doc, idx)
+            return {f: entry[f] for f in fields if f in entry}, idx
+
+        return read_entry
+
+    def read_section(key: str, doc: str, idx: int) -> Tuple[Any, int]:
+        nonlocal metadata
+        if key == "metadata":
+            metadata, idx = json_decoder.raw_decode(doc, idx)
+            verify_schema_version({"metadata": metadata}, artifact_type)
+            return metadata, idx
+        elif key in subset and doc[idx] == "{":
+            return read_object(doc, idx, read_entry_fields(subset[key]))
+        else:
+            return skip_value(key, doc, idx)
+
+    try:
+        with json_backend.gc_paused():
+            loaded_file, _ = read_object(doc, skip_whitespace(doc, 0), read_section)
+    except (IndexError, json.JSONDecodeError) as e:
+        raise ValueError(f"Provided {artifact_type.value} file is not valid JSON: {e}")
+
+    if metadata is None:
+        verify_schema_version(loaded_file, artifact_type)
+
+    return loaded_file
+
+
+def verify_and_read_subset(file_path: Path, artifact_type: DbtArtifactType) -> Dict[str, Any]:
+    with span(f"read_{artifact_type.value}"), open(file_path, "rb") as f:
+        return verify_and_read_subset_f(f, artifact_type)
+
+
+@dataclass
+class DbtArtifacts:
+    """
+    Parsed dbt artifacts. Read them once and hand this object to every processing
+    step, instead of letting each step read (potentially huge) files from disk again.
+    """
+
+    manifest: Dict[str, Any]
+    catalog: Optional[Dict[str, Any]] = None
+
+    @classmethod
+    def from_files(
+        cls, manifest_path: Path, catalog_path: Optional[Path], only_required_fields: bool = False
+    ) -> "DbtArtifacts":
+        """
+        Use `only_required_fields` when the artifacts are only used for ERD rendering
+        and will not be written back to disk.
+        """
+        read = verify_and_read_subset if only_required_fields else verify_and_read
+        return cls(
+            manifest=read(manifest_path, DbtArtifactType.MANIFEST),
+            catalog=read(catalog_path, DbtArtifactType.CATALOG) if catalog_path else None,
+        )
+
+    @staticmethod
+    def paths_in_target_dir(target_dir: Path) -> Tuple[Path, Optional[Path]]:
+        """Paths of the manifest and, if it exists, the catalog in a dbt target dir."""
+        manifest_path = target_dir / "manifest.json"
+        catalog_path = target_dir / "catalog.json"
+        if not manifest_path.exists():
+            raise ValueError(f"{manifest_path} doesn't exists and is required as a minimum.")
+
+        return manifest_path, catalog_path if catalog_path.exists() else None
+
+    @classmethod
+    def from_target_dir(
+        cls, target_dir: Path, only_required_fields: bool = False
+    ) -> "DbtArtifacts":
+        manifest_path, catalog_path = cls.paths_in_target_dir(target_dir)
+        return cls.from_files(manifest_path, catalog_path, only_required_fields)
@@ -0,0 +1,146 @@
+"""
+JSON (de)serialisation of dbt artifacts. Uses msgspec or orjson when installed
+(see the `dbt-diagrams[fast]` extras) and falls back to the standard library.
+Set the `DBT_DIAGRAMS_JSON_BACKEND` environment variable to force a backend.
+"""
+
+from contextlib import contextmanager
+from dataclasses import dataclass
+import gc
+import json
+import os
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple, Type, Union
+
+JSON_BACKEND_ENV_VAR = "DBT_DIAGRAMS_JSON_BACKEND"
+STDLIB_BACKEND = "json"
+
+
+@dataclass(frozen=True)
+class JsonBackend:
+    name: str
+    # Take UTF-8 bytes as well as str, so files can be read without decoding them first.
+    loads: Callable[[Union[bytes, str]], Any]
+    dumps: Callable[[Any], bytes]
+    decode_errors: Tuple[Type[Exception], ...]
+    # Decodes into the given type and skips everything that isn't part of it, for
+    # backends that support this.
+    loads_typed: Optional[Callable[[Union[bytes, str], Any], Any]] = None
+
+
+def _stdlib_backend() -> JsonBackend:
+    return JsonBackend(
+        name=STDLIB_BACKEND,
+        loads=json.loads,
+        dumps=lambda obj: json.dumps(obj).encode(),
+        decode_errors=(json.JSONDecodeError, UnicodeDecodeError),
+    )
+
+
+def _orjson_backend() -> JsonBackend:
+    import orjson
+
+    return JsonBackend(
+        name="orjson",
+        loads=orjson.loads,
+        dumps=orjson.dumps,
+        decode_errors=(orjson.JSONDecodeError,),
+    )
+
+
+def _msgspec_backend() -> JsonBackend:
+    import msgspec
+
+    decoders: Dict[Any, msgspec.json.Decoder] = {}
+
+    def loads_typed(data: Union[bytes, str], type: Any) -> Any:
+        if type not in decoders:
+            decoders[type] = msgspec.json.Decoder(type)
+        return decoders[type].decode(data)
+
+    return JsonBackend(
+        name="msgspec",
+        loads=msgspec.json.decode,
+        dumps=msgspec.json.encode,
+        decode_errors=(msgspec.DecodeError,),
+        loads_typed=loads_typed,
+    )
+
+
+# In order of preference.
+_BACKEND_FACTORIES: Dict[str, Callable[[], JsonBackend]] = {
+    "msgspec": _msgspec_backend,
+    "orjson": _orjson_backend,
+    STDLIB_BACKEND: _stdlib_backend,
+}
+
+
+def _installed_backends() -> Iterator[JsonBackend]:
+    for factory in _BACKEND_FACTORIES.values():
+        try:
+            yield factory()
+        except ImportError:
+            continue
+
+
+def available_backends() -> Dict[str, JsonBackend]:
+    """All backends that can be imported, in order of preference."""
+    return {backend.name: backend for backend in _installed_backends()}
+
+
+def get_backend(name: Optional[str] = None) -> JsonBackend:
+    """The backend with the given name, or the fastest one that is installed."""
+    if name is None:
+        # Stops at the first backend that can be imported, so the others never are.
+        return next(_installed_backends())
+    elif name not in _BACKEND_FACTORIES:
+        raise ValueError(
+            f"Unknown JSON backend {name}. Choose one of {', '.join(_BACKEND_FACTORIES)}."
+        )
+
+    try:
+        return _BACKEND_FACTORIES[name]()
+    except ImportError:
+        raise ValueError(f"JSON backend {name} is not installed.")
+
+
+# Picked on first use, so importing this module doesn't import any backend yet.
+_backend: Optional[JsonBackend] = None
+
+
+def current_backend() -> JsonBackend:
+    global _backend
+    if _backend is None:
+        _backend = get_backend(os.environ.get(JSON_BACKEND_ENV_VAR))
+    return _backend
+
+
+def set_backend(name: Optional[str] = None) -> JsonBackend:
+    """Switch to the given backend, or the fastest one that is installed."""
+    global _backend
+    _backend = get_backend(name)
+    return _backend
+
+
+@contextmanager
+def gc_paused() -> Iterator[None]:
+    """
+    Decoding an artifact allocates millions of containers, none of which can be
+    garbage yet. Pausing the cyclic garbage collector in the meantime saves
+    repeatedly scanning them, which otherwise takes more time than decoding itself.
+    """
+    was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if was_enabled:
+            gc.enable()
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    with gc_paused():
+        return current_backend().loads(data)
+
+
+def dumps(obj: Any) -> bytes:
+    return current_backend().dumps(obj)
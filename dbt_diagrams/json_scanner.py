@@ -0,0 +1,115 @@
+"""
+Helpers to walk (potentially huge) JSON documents one key at a time, without
+decoding the whole document into memory at once.
+"""
+
+import json
+import re
+from typing import Any, Callable, Collection, Dict, Tuple
+
+json_decoder = json.JSONDecoder()
+_json_whitespace = re.compile(r"[ \t\n\r]*")
+_json_key = re.compile(r'"([^"\\]*)"[ \t\n\r]*:[ \t\n\r]*')
+_json_separator = re.compile(r"[ \t\n\r]*([,}])[ \t\n\r]*")
+
+# Returned by value readers for values that should not end up in the result.
+SKIPPED = object()
+
+ValueReader = Callable[[str, str, int], Tuple[Any, int]]
+
+
+def skip_whitespace(doc: str, idx: int) -> int:
+    return _json_whitespace.match(doc, idx).end()  # type: ignore [union-attr]
+
+
+def read_object(doc: str, idx: int, read_value: ValueReader) -> Tuple[Dict[str, Any], int]:
+    """
+    Walk the JSON object that starts at `idx` one key at a time. Values are
+    handed to `read_value`, which decides how (and whether) to decode them.
+    This way, only a single entry of a potentially huge section is ever
+    fully decoded in memory at the same time.
+    """
+    if not doc.startswith("{", idx):
+        raise ValueError(f"Expected JSON object at position {idx}.")
+
+    result: Dict[str, Any] = {}
+    idx = skip_whitespace(doc, idx + 1)
+    if doc.startswith("}", idx):
+        return result, idx + 1
+
+    while True:
+        # Keys without escapes are matched together with the colon in one go.
+        key_match = _json_key.match(doc, idx)
+        if key_match is not None:
+            key, idx = key_match.group(1), key_match.end()
+        else:
+            key, idx = json_decoder.raw_decode(doc, idx)
+            idx = skip_whitespace(doc, idx)
+            if not doc.startswith(":", idx):
+                raise ValueError(f"Expected ':' at position {idx}.")
+            idx = skip_whitespace(doc, idx + 1)
+
+        value, idx = read_value(key, doc, idx)
+        if value is not SKIPPED:
+            result[key] = value
+
+        separator = _json_separator.match(doc, idx)
+        if separator is None:
+            raise ValueError(f"Expected ',' or '}}' at position {idx}.")
+        elif separator.group(1) == "}":
+            return result, separator.end()
+        idx = separator.end()
+
+
+def skip_value(_key: str, doc: str, idx: int) -> Tuple[Any, int]:
+    _, idx = json_decoder.raw_decode(doc, idx)
+    return SKIPPED, idx
+
+
+class _AllValuesFound(Exception):
+    pass
+
+
+def locate_values(
+    doc: str, paths: Collection[Tuple[str, ...]]
+) -> Dict[Tuple[str, ...], Tuple[int, int]]:
+    """
+    Find the (start, end) position in `doc` of the JSON value at each of the given
+    key paths, like ("nodes", "model.my_project.orders", "description"). Paths that
+    don't exist are left out of the result. Scanning stops as soon as all paths
+    have been found. Raises a ValueError on malformed or truncated documents.
+    """
+    tree: Dict[str, Any] = {}
+    for path in paths:
+        subtree = tree
+        for key in path[:-1]:
+            subtree = subtree.setdefault(key, {})
+        subtree[path[-1]] = path
+
+    spans: Dict[Tuple[str, ...], Tuple[int, int]] = {}
+
+    def reader(subtree: Dict[str, Any]) -> ValueReader:
+        def read_value(key: str, doc: str, idx: int) -> Tuple[Any, int]:
+            if key not in subtree:
+                return skip_value(key, doc, idx)
+            elif isinstance(subtree[key], tuple):
+                _, end = json_decoder.raw_decode(doc, idx)
+                spans[subtree[key]] = (idx, end)
+                if len(spans) == len(paths):
+                    raise _AllValuesFound()
+                return SKIPPED, end
+            elif doc.startswith("{", idx):
+                _, end = read_object(doc, idx, reader(subtree[key]))
+                return SKIPPED, end
+            else:
+                return skip_value(key, doc, idx)
+
+        return read_value
+
+    if paths:
+        try:
+            read_object(doc, skip_whitespace(doc, 0), reader(tree))
+        except _AllValuesFound:
+            pass
+
+    return spans
@@ -0,0 +1,101 @@
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from dbt_diagrams.domain import Table
+
+
+class ManifestIndex:
+    """
+    Lookup tables for the nodes of a manifest and their matching catalog entries.
+    Build it once per manifest and use it for every lookup, instead of scanning
+    or re-keying all manifest nodes over and over again.
+
+    Only nodes with one of the given resource types are indexed, by default those
+    that can be referred to with `ref`: models, seeds and snapshots. Names are not
+    unique across packages, so lookups by name prefer the package the lookup
+    originates from and refuse to guess otherwise.
+
+    Use `strict` to run full pydantic validation on every table that gets built.
+    """
+
+    def __init__(
+        self,
+        manifest: Dict[str, Any],
+        catalog: Optional[Dict[str, Any]] = None,
+        resource_types: Iterable[str] = ("model", "seed", "snapshot"),
+        strict: bool = False,
+    ):
+        resource_types = set(resource_types)
+        self.strict = strict
+        # Like "bigquery" or "snowflake", which determines how column types are rendered.
+        self.adapter: Optional[str] = manifest.get("metadata", {}).get("adapter_type")
+        self.catalog_nodes: Dict[str, Any] = catalog["nodes"] if catalog else {}
+        self.nodes: Dict[str, Dict[str, Any]] = {}
+        self.erd_node_ids: List[str] = []
+        self._by_name: Dict[str, List[str]] = {}
+        self._by_alias: Dict[str, List[str]] = {}
+        self._by_package_and_name: Dict[Tuple[str, str], List[str]] = {}
+        self._tables: Dict[str, "Table"] = {}
+
+        for unique_id, node in manifest["nodes"].items():
+            if node.get("resource_type") not in resource_types:
+                continue
+
+            self.nodes[unique_id] = node
+            self._by_name.setdefault(node["name"], []).append(unique_id)
+            self._by_alias.setdefault(node.get("alias", node["name"]), []).append(unique_id)
+            self._by_package_and_name.setdefault(
+                (node.get("package_name", ""), node["name"]), []
+            ).append(unique_id)
+            if "erd" in node.get("meta", {}):
+                self.erd_node_ids.append(unique_id)
+
+    def catalog_node(self, unique_id: str) -> Optional[Dict[str, Any]]:
+        return self.catalog_nodes.get(unique_id)
+
+    def table(self, unique_id: str) -> "Table":
+        """
+        Table for the given node. Tables are only built on first use, so nodes that
+        don't take part in any ERD never get parsed.
+        """
+        if unique_id not in self._tables:
+            from dbt_diagrams.domain import Table
+
+            self._tables[unique_id] = Table.from_manifest_catalog_nodes(
+                self.nodes[unique_id], self.catalog_node(unique_id), self.strict
+            )
+        return self._tables[unique_id]
+
+    def resolve(self, reference: str, package_name: Optional[str] = None) -> Optional[str]:
+        """
+        Find the unique id of the node that `reference` refers to. A reference can
+        be a unique id (`model.my_package.orders`), a `<package>.<name>` pair, a model
+        name or an alias. Returns None in case nothing matches.
+        """
+        if reference in self.nodes:
+            return reference
+
+        if "." in reference:
+            package, name = reference.split(".", 1)
+            if match := self._pick(reference, self._by_package_and_name.get((package, name), [])):
+                return match
+
+        return self._pick(reference, self._by_name.get(reference, []), package_name) or self._pick(
+            reference, self._by_alias.get(reference, []), package_name
+        )
+
+    def _pick(
+        self, reference: str, candidates: List[str], package_name: Optional[str] = None
+    ) -> Optional[str]:
+        if len(candidates) > 1 and package_name is not None:
+            candidates = [
+                c for c in candidates if self.nodes[c].get("package_name") == package_name
+            ] or candidates
+
+        if len(candidates) > 1:
+            raise ValueError(
+                f"Reference {reference} is ambiguous. It matches {', '.join(sorted(candidates))}. "
+                "Use '<package>.<model name>' to refer to one of them."
+            )
+
+        return candidates[0] if candidates else None
@@ -1,18 +1,30 @@
 from datetime import datetime
+import hashlib
 import itertools
+import json
 import os
 from pathlib import Path
 import re
-from typing import Any, Dict, List, Optional
-
-from dbt_diagrams.domain import Relation, Table
-
+from typing import TYPE_CHECKING, Any, Collection, Dict, List, Optional, Set, Tuple
 
+from dbt_diagrams import __version__
+from dbt_diagrams.artifact_writers import write_with_inlined_files
 from dbt_diagrams.input_validators import (
+    DbtArtifacts,
     DbtArtifactType,
     extract_invocation_id,
-    verify_and_read,
+    verify_schema_version,
 )
+from dbt_diagrams.manifest_index import ManifestIndex
+from dbt_diagrams.partitioning import part_name, part_names, partition_relations
+from dbt_diagrams.profiling import span
+
+if TYPE_CHECKING:
+    # Imported where needed instead, as creating the pydantic models takes time.
+    from dbt_diagrams.domain import Relation
+
+
+_generated_at_line = re.compile(r"^[ \t]*%% generated_at: .*\n", re.MULTILINE)
 
 
 def _add_generation_header(diagram_name, diagram: str) -> str:
@@ -23,12 +35,35 @@ def _add_generation_header(diagram_name, diagram: str) -> str:
     """
 
 
-def _mermaid_erd_from_relations(relations: List[Relation], include_cols: bool = True) -> str:
+def strip_generation_timestamp(diagram: str) -> str:
+    """
+    Remove the timestamp that `_add_generation_header` adds, so identical diagrams
+    from different runs compare equal.
+    """
+    return _generated_at_line.sub("", diagram, count=1)
+
+
+def _mermaid_erd_from_relations(
+    relations: List["Relation"],
+    include_cols: bool = True,
+    adapter: Optional[str] = None,
+    stubs: Optional[Dict[str, str]] = None,
+) -> str:
+    """
+    Mermaid ERD of the given relations. Tables in `stubs` belong to another part of
+    the diagram (see `partitioning`), named by the value, and are shown without columns.
+    """
+    stubs = stubs or {}
     mentioned_tables = {
         t.model_name: t for t in itertools.chain(*([r.source, r.target] for r in relations))
     }
     tables_section = "\n".join(
-        (f"\t{t.as_mermaid_table(include_cols)}\n" for t in mentioned_tables.values())
+        (
+            f"\t%% {t.model_name} is part of {stubs[t.model_name]}\n\t{t.as_mermaid_table()}\n"
+            if t.model_name in stubs
+            else f"\t{t.as_mermaid_table(include_cols, adapter)}\n"
+            for t in mentioned_tables.values()
+        )
     )
 
     relation_section = ""
@@ -39,132 +74,309 @@ def _mermaid_erd_from_relations(relations: List[Relation], include_cols: bool =
 
 
 def mermaid_erds_from_manifest_and_catalog(
-    manifest: Dict[str, Any], catalog: Optional[Dict[str, Any]], include_cols: bool = True
+    manifest: Dict[str, Any],
+    catalog: Optional[Dict[str, Any]],
+    include_cols: bool = True,
+    strict: bool = False,
+    diagrams: Optional[Collection[str]] = None,
+    max_entities: Optional[int] = None,
 ) -> Dict[str, str]:
-    catalog_nodes = catalog["nodes"] if catalog else {}
-
-    # TODO can be optimized by not parsing all tables but just the ones we need from the
-    # relations that reference them. Not a real important optimisation though.
-    tables = {
-        t.model_name: t
-        for t in (
-            Table.from_manifest_catalog_nodes(node, catalog_nodes.get(node_id))
-            for node_id, node in manifest["nodes"].items()
-        )
-    }
-    relations = list(
-        itertools.chain(
-            *(Relation.from_manifest_node(n, tables) for n in manifest["nodes"].values())
+    """
+    Render all ERDs, or only the given `diagrams`, as Mermaid definitions. With
+    `max_entities`, diagrams with more entities are split into parts named
+    `<diagram>__part<N>` (see `partitioning`).
+    """
+    from dbt_diagrams.domain import Relation
+
+    with span("build_relations"):
+        index = ManifestIndex(manifest, catalog, strict=strict)
+        # Tables are built by the index on first use, so only models that take part
+        # in an ERD are ever parsed.
+        relations = itertools.chain(
+            *(
+                Relation.from_manifest_node(index.nodes[node_id], index, diagrams)
+                for node_id in index.erd_node_ids
+            )
         )
-    )
 
-    relations_by_diagram = itertools.groupby(relations, key=lambda r: r.diagram)
+        # Group by diagram while keeping the order in which diagrams are first mentioned.
+        relations_by_diagram: Dict[str, List[Relation]] = {}
+        for relation in relations:
+            relations_by_diagram.setdefault(relation.diagram, []).append(relation)
+
+    with span("generate_mermaid"):
+        erds = {}
+        for diagram_name, diagram_relations in relations_by_diagram.items():
+            partitions = (
+                partition_relations(diagram_relations, max_entities) if max_entities else []
+            )
+            if len(partitions) <= 1:
+                erds[diagram_name] = _add_generation_header(
+                    diagram_name,
+                    _mermaid_erd_from_relations(diagram_relations, include_cols, index.adapter),
+                )
+                continue
+
+            for number, partition in enumerate(partitions, start=1):
+                name = part_name(diagram_name, number)
+                stubs = {
+                    model_name: part_name(diagram_name, stub_number)
+                    for model_name, stub_number in partition.stubs.items()
+                }
+                erds[name] = _add_generation_header(
+                    name,
+                    _mermaid_erd_from_relations(
+                        partition.relations, include_cols, index.adapter, stubs
+                    ),
+                )
+        return erds
 
+
+def _node_fingerprint_input(index: ManifestIndex, node_id: str) -> Dict[str, Any]:
+    node = index.nodes[node_id]
+    catalog_node = index.catalog_node(node_id) or {}
     return {
-        diagram_name: _add_generation_header(
-            diagram_name, _mermaid_erd_from_relations(list(relations), include_cols)
-        )
-        for diagram_name, relations in relations_by_diagram
+        "unique_id": node_id,
+        "name": node["name"],
+        "alias": node.get("alias"),
+        "database": node.get("database"),
+        "schema": node.get("schema"),
+        "columns": {name: col.get("data_type") for name, col in node.get("columns", {}).items()},
+        "catalog_columns": {
+            name: col.get("type") for name, col in catalog_node.get("columns", {}).items()
+        },
+        "erd": node.get("meta", {}).get("erd"),
     }
 
 
-def update_docs_with_rendered_mermaid_erds(manifest: Dict[str, Any], rendered_erds: Dict[str, str]):
+def diagram_fingerprints(
+    manifest: Dict[str, Any],
+    catalog: Optional[Dict[str, Any]],
+    include_cols: bool = True,
+    max_entities: Optional[int] = None,
+) -> Dict[str, str]:
+    """
+    Per diagram, a hash of everything in the manifest and catalog that contributes to
+    it: name, alias, columns, catalog column types and ERD meta of all connected
+    models. A diagram only changes when its fingerprint changes, which allows for
+    skipping unchanged diagrams without building them. Diagrams that are split into
+    parts get a single fingerprint for all parts.
+    """
+    from dbt_diagrams.domain import MetaERDSection
+
+    with span("fingerprint_diagrams"):
+        index = ManifestIndex(manifest, catalog)
+        contributors: Dict[str, Set[str]] = {}
+        for node_id in index.erd_node_ids:
+            node = index.nodes[node_id]
+            for conn in MetaERDSection(**node["meta"].get("erd", {})).connections:
+                target_id = index.resolve(conn.target, node.get("package_name"))
+                if target_id is None:
+                    raise ValueError(
+                        f"Target {conn.target} in relation originating from table "
+                        f"{node['name']} does not exist or has not been loaded."
+                    )
+                contributors.setdefault(conn.diagram, set()).update({node_id, target_id})
+
+        return {
+            diagram_name: hashlib.sha256(
+                json.dumps(
+                    {
+                        "dbt_diagrams_version": __version__,
+                        "include_cols": include_cols,
+                        "adapter": index.adapter,
+                        "max_entities": max_entities,
+                        "nodes": [_node_fingerprint_input(index, n) for n in sorted(node_ids)],
+                    },
+                    sort_keys=True,
+                    default=str,
+                ).encode()
+            ).hexdigest()
+            for diagram_name, node_ids in contributors.items()
+        }
+
+
+_MERMAID_MARKER = "```mermaid["
+# Everything from a marker (or the start of the doc block) up to the next marker.
+# Written as an unrolled loop so it runs in linear time.
+_MERMAID_FRAGMENT = re.compile(r"(?:^|```mermaid\[)([^`]*(?:`(?!``mermaid\[)[^`]*)*)")
+# The part following a marker that refers to an ERD, like `erd='my_erd']```.
+_ERD_REFERENCE = re.compile(r".*[,erd|erd]=[\"|']([^\"']*)[\"|'].*\]")
+
+
+def insert_rendered_erds_in_doc_block(doc_block: str, rendered_erds: Dict[str, str]) -> str:
+    """
+    Strings arriving here can be any text that may contain ```mermaid```
+    Markdown code blocks that our potential candidates. Every fragment following
+    a ```mermaid[ marker that refers to an ERD is replaced by that ERD as a Mermaid
+    code block, or by a code block per part for ERDs that are split into parts.
+    """
+    if _MERMAID_MARKER not in doc_block:
+        return doc_block
+
+    def _replace(fragment_match: "re.Match[str]") -> str:
+        fragment: str = fragment_match.group(1)
+        erd_reference = _ERD_REFERENCE.match(fragment)
+        if erd_reference is None:
+            return fragment
+        diagram_name = erd_reference.group(1)
+        if diagram_name not in rendered_erds and (
+            parts := list(part_names(diagram_name, rendered_erds))
+        ):
+            return "\n\n".join(f"```mermaid\n{rendered_erds[part]}\n```" for part in parts)
+        return f"```mermaid\n{rendered_erds.get(diagram_name, '')}\n```"
+
+    return _MERMAID_FRAGMENT.sub(_replace, doc_block)
+
+
+@span("inject_docs")
+def update_docs_with_rendered_mermaid_erds(
+    manifest: Dict[str, Any], rendered_erds: Dict[str, str]
+) -> List[Tuple[str, str, str]]:
     """
     In all table and overview doc pages, insert a rendered mermaid ERD in any
     ```mermaid[erd='my_erd']``` location that refers to one of the rendered ERD's.
+    Returns the (section, unique id, field) path of every doc that changed.
 
     TODO: this currently mutates the provided manifest in place. Pretty ugly but
     more efficient as the manifest files can get pretty big (20+ MBs).
     """
-    erd_diagram_regex = re.compile(r"\[.*[,erd|erd]=[\"|']([^\"']*)[\"|'].*\]")
-
-    def insert_rendered_erds_in_doc_blocks_as_mermaid(doc_block: str) -> str:
-        """
-        Strings arriving here can be any text that may contain ```mermaid```
-        Markdown code blocks that our potential candidates.
-        """
-        mermaid_splitter = "```mermaid["
-        if len(splitted := doc_block.split(mermaid_splitter)) > 1:
-            # Split on ```mermaid so that every element in splitted is a potential
-            # ERD candiate containing a "[erd="foo"]```" like string.
-            included_erds = [
-                x
-                if (erd_name := erd_diagram_regex.match(f"[{x}")) is None
-                else f"```mermaid\n{rendered_erds.get(erd_name.group(1), '')}\n```"
-                for x in splitted
-            ]
-
-            return "".join(included_erds)
-        else:
-            return doc_block
-
-    for k, v in manifest["nodes"].items():
-        manifest["nodes"][k]["description"] = insert_rendered_erds_in_doc_blocks_as_mermaid(
-            v["description"]
-        )
+    changed = []
+    for section, field in [("nodes", "description"), ("docs", "block_contents")]:
+        for unique_id, entry in manifest[section].items():
+            doc_block = entry[field]
+            if _MERMAID_MARKER not in doc_block:
+                continue
 
-    for k, v in manifest["docs"].items():
-        manifest["docs"][k]["block_contents"] = insert_rendered_erds_in_doc_blocks_as_mermaid(
-            v["block_contents"]
-        )
+            updated_doc_block = insert_rendered_erds_in_doc_block(doc_block, rendered_erds)
+            if updated_doc_block != doc_block:
+                entry[field] = updated_doc_block
+                changed.append((section, unique_id, field))
 
+    return changed
 
-def to_mermaid_erds_from_file(
-    manifest_path: Path, catalog_path: Optional[Path], include_cols: bool = True
+
+def to_mermaid_erds_from_artifacts(
+    manifest: Dict[str, Any],
+    catalog: Optional[Dict[str, Any]],
+    include_cols: bool = True,
+    strict: bool = False,
+    diagrams: Optional[Collection[str]] = None,
+    max_entities: Optional[int] = None,
 ) -> Dict[str, str]:
     """
     Render all ERD inside manifest meta statements and return a dict with
     ERD name as key and Mermaid definition as value. Use catalog to add column info.
+    Set `strict` to validate all tables and columns with pydantic as well,
+    `diagrams` to only render a subset of all ERDs and `max_entities` to split
+    larger ERDs into parts.
+
+    Takes already loaded artifacts, so tools embedding dbt-diagrams don't need
+    to go through the file system.
     """
-    manifest = verify_and_read(manifest_path, DbtArtifactType.MANIFEST)
-    catalog = None if not catalog_path else verify_and_read(catalog_path, DbtArtifactType.CATALOG)
+    with span("verify_versions"):
+        verify_schema_version(manifest, DbtArtifactType.MANIFEST)
+        if catalog:
+            verify_schema_version(catalog, DbtArtifactType.CATALOG)
 
     if manifest and catalog and (extract_invocation_id(manifest) == extract_invocation_id(catalog)):
-        return mermaid_erds_from_manifest_and_catalog(manifest, catalog, include_cols)
+        return mermaid_erds_from_manifest_and_catalog(
+            manifest, catalog, include_cols, strict, diagrams, max_entities
+        )
     elif manifest and catalog:
         raise Exception("Provided manifest and catalog have different invocation id's.")
     elif manifest:
-        return mermaid_erds_from_manifest_and_catalog(manifest, None, include_cols)
+        return mermaid_erds_from_manifest_and_catalog(
+            manifest, None, include_cols, strict, diagrams, max_entities
+        )
     elif not manifest:
         raise Exception("Provided manifest is not supported")
     else:
         raise Exception("Internal error.")
 
 
+def to_mermaid_erds_from_file(
+    manifest_path: Path,
+    catalog_path: Optional[Path],
+    include_cols: bool = True,
+    strict: bool = False,
+) -> Dict[str, str]:
+    """
+    Same as `to_mermaid_erds_from_artifacts` but reads manifest and catalog from file.
+    """
+    artifacts = DbtArtifacts.from_files(manifest_path, catalog_path, only_required_fields=True)
+    return to_mermaid_erds_from_artifacts(
+        artifacts.manifest, artifacts.catalog, include_cols, strict
+    )
+
+
 def to_mermaid_erds_from_dbt_target_dir(
-    input_dir: Path, include_cols: bool = True
+    input_dir: Path, include_cols: bool = True, strict: bool = False
 ) -> Dict[str, str]:
     """
     Same as `to_mermaid_erd_from_file` but takes dbt target dir and tries
     to discover manifest and catalog by itself.
     """
-    manifest_path = input_dir / "manifest.json"
-    catalog_path = input_dir / "catalog.json"
-    if manifest_path.exists() and catalog_path.exists():
-        return to_mermaid_erds_from_file(manifest_path, catalog_path, include_cols)
-    elif manifest_path.exists():
-        return to_mermaid_erds_from_file(manifest_path, None, include_cols)
-    else:
-        raise ValueError(f"{manifest_path} doesn't exists and is required as a minimum.")
+    artifacts = DbtArtifacts.from_target_dir(input_dir, only_required_fields=True)
+    return to_mermaid_erds_from_artifacts(
+        artifacts.manifest, artifacts.catalog, include_cols, strict
+    )
+
+
+MERMAID_SNIPPET_PATH = Path(__file__).parent / "resources" / "mermaid_snippet.html"
+# Precedes the injected snippet, so rerunning on the same index.html is a no-op.
+_MERMAID_SNIPPET_MARKER = b"<!-- dbt-diagrams mermaid snippet -->"
 
 
+@span("inject_html")
 def add_mermaid_lib_to_html(target_dir: Path):
-    source_index_path = f"{target_dir}/index.html"
-    target_index_path = f"{target_dir}/new_index.html"
-
-    with open(source_index_path, "r") as index_html, open(
-        target_index_path, "w"
-    ) as new_index_html, open(
-        Path(__file__).parent / "resources" / "mermaid_snippet.html", "r"
-    ) as mermaid_snippet_f:
-        mermaid_snippet = mermaid_snippet_f.read()
-        new_index_html.seek(0)
-
-        for line in index_html:
-            if "</body>" in line:
-                new_index_html.write(line.replace("</body>", f"{mermaid_snippet}</body>"))
-            else:
-                new_index_html.write(line)
-
-    os.remove(source_index_path)
-    os.rename(target_index_path, source_index_path)
+    """
+    Inject the Mermaid snippet right before the last `</body>` of the dbt docs
+    `index.html`, unless it has been injected already.
+    """
+    index_path = target_dir / "index.html"
+    with open(index_path, "rb") as index_html_handle:
+        index_html = index_html_handle.read()
+
+    body_end = index_html.rfind(b"</body>")
+    if body_end == -1 or _MERMAID_SNIPPET_MARKER in index_html:
+        return
+
+    tmp_path = index_path.with_name(f"{index_path.name}.tmp")
+    with open(tmp_path, "wb") as new_index_html:
+        new_index_html.write(
+            b"".join(
+                [
+                    index_html[:body_end],
+                    _MERMAID_SNIPPET_MARKER,
+                    MERMAID_SNIPPET_PATH.read_bytes(),
+                    index_html[body_end:],
+                ]
+            )
+        )
+
+    os.replace(tmp_path, index_path)
+
+
+@span("write_static_html")
+def write_static_index_html(target_dir: Path):
+    """
+    Mimic the behaviour of dbt docs generate --static by inlining manifest and
+    catalog in a single `static_index.html` page. Both are copied from disk as is,
+    so call this after any changes to `manifest.json` have been written.
+    """
+    manifest_path = target_dir / "manifest.json"
+    catalog_path = target_dir / "catalog.json"
+    if not catalog_path.exists():
+        raise ValueError(f"{catalog_path} is required for a static docs page.")
+
+    # This setup comes straight from
+    # https://github.com/mescanne/dbt-core/blob/e8c8eb2b7fc64e0db2817de0b538780d56c7fd99/core/dbt/task/generate.py#L280
+    write_with_inlined_files(
+        target_dir / "index.html",
+        target_dir / "static_index.html",
+        {
+            b'"MANIFEST.JSON INLINE DATA"': manifest_path,
+            b'"CATALOG.JSON INLINE DATA"': catalog_path,
+        },
+    )
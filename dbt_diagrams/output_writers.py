@@ -1,13 +1,31 @@
+import asyncio
 from contextlib import asynccontextmanager
 from enum import Enum
+from functools import lru_cache
+import os
 from pathlib import Path
 import subprocess
-import tempfile
-from typing import Optional, Dict, TYPE_CHECKING, Any
+import time
+from typing import (
+    Awaitable,
+    Callable,
+    Hashable,
+    List,
+    Mapping,
+    Optional,
+    Dict,
+    TYPE_CHECKING,
+    Any,
+    Tuple,
+    TypeVar,
+)
+
+from dbt_diagrams.profiling import span
 
 if TYPE_CHECKING:
     from playwright.async_api._generated import Playwright
-    from playwright.async_api import Browser
+    from playwright.async_api import Browser, Page
+    from dbt_diagrams.render_cache import SvgRenderCache
 
 
 class OutputFormat(Enum):
@@ -16,6 +34,7 @@ class OutputFormat(Enum):
     MARKDOWN = "markdown"
 
 
+@span("write_diagrams")
 def write_as_markdown(mermaid_diagrams: Dict[str, str], out: Path):
     for diagram_name, diagram in mermaid_diagrams.items():
         with open(f"{out}/{diagram_name}.md", "w") as f:
@@ -26,6 +45,7 @@ def as_markdown(mermaid_diagram) -> str:
     return f"```mermaid\n{mermaid_diagram}\n```"
 
 
+@span("write_diagrams")
 def write_as_mmd(mermaid_diagrams: Dict[str, str], out: Path):
     for diagram_name, diagram in mermaid_diagrams.items():
         with open(f"{out}/{diagram_name}.mmd", "w") as f:
@@ -51,70 +71,258 @@ async def get_browser():
     from playwright.async_api import async_playwright
 
     async with async_playwright() as p:
-        tag_selector = """
-            {
-                // Returns the first element matching given selector in the root's subtree.
-                query(root, selector) {
-                    return root.querySelector(selector);
-                },
-                // Returns all elements matching given selector in the root's subtree.
-                queryAll(root, selector) {
-                    return Array.from(root.querySelectorAll(selector));
-                }
-            }"""
-        await p.selectors.register("tag", tag_selector)
-        browser = await _launch_browser(p)
+        with span("launch_browser"):
+            browser = await _launch_browser(p)
         yield browser
         await browser.close()
 
 
-async def as_svg(mermaid_diagram: str, provided_browser: Optional["Browser"] = None) -> Any:
-    async def _inner(tmp_html_path: str, browser: Browser) -> Any:
-        page = await browser.new_page(viewport={"width": 800, "height": 450})
-        await page.goto(f"file://{tmp_html_path}")
-        await page.wait_for_load_state("load")
-        svg = page.locator("tag=pre[data-processed='true']").filter(
-            has=page.locator("tag=svg[aria-roledescription='er']")
+DEFAULT_SVG_CONCURRENCY = 4
+
+MERMAID_VERSION = "10.9.1"
+MERMAID_THEME = "default"
+MERMAID_CDN_URL = f"https://cdn.jsdelivr.net/npm/mermaid@{MERMAID_VERSION}/dist/mermaid.min.js"
+# Vendored at build time (see `make build`) so SVG rendering works offline.
+MERMAID_BUNDLE_PATH = Path(__file__).parent / "resources" / "mermaid.min.js"
+# Set to load Mermaid from MERMAID_CDN_URL when it isn't bundled, like in a source checkout.
+MERMAID_CDN_ENV_VAR = "DBT_DIAGRAMS_MERMAID_CDN"
+
+
+@lru_cache(maxsize=1)
+def _mermaid_script_tag() -> Dict[str, str]:
+    """
+    Arguments for Playwright's `add_script_tag` that load the Mermaid runtime. The
+    bundle is read from disk only once per process.
+    """
+    if MERMAID_BUNDLE_PATH.exists():
+        return {"content": MERMAID_BUNDLE_PATH.read_text()}
+    elif os.environ.get(MERMAID_CDN_ENV_VAR):
+        return {"url": MERMAID_CDN_URL}
+
+    raise FileNotFoundError(
+        f"Mermaid {MERMAID_VERSION} is not bundled with this installation of dbt-diagrams "
+        f"(expected at {MERMAID_BUNDLE_PATH}). Run `make vendor-mermaid` in a source checkout, "
+        f"or set {MERMAID_CDN_ENV_VAR}=1 to load it from {MERMAID_CDN_URL} instead."
+    )
+
+
+async def _load_mermaid(page: "Page"):
+    await page.set_content('<!DOCTYPE html><html lang="en"><body></body></html>')
+    await page.add_script_tag(**_mermaid_script_tag())
+    await page.evaluate(
+        "(theme) => mermaid.initialize({ startOnLoad: false, theme })", MERMAID_THEME
+    )
+
+
+class PagePool:
+    """
+    Bounded pool of browser pages. Pages are opened on demand, at most `size` of them,
+    and reused for subsequent diagrams instead of opening a new page per diagram.
+    Every new page is prepared once with `setup`.
+    """
+
+    def __init__(
+        self,
+        browser: "Browser",
+        size: int = DEFAULT_SVG_CONCURRENCY,
+        setup: Optional[Callable[["Page"], Awaitable[None]]] = None,
+    ):
+        self._browser = browser
+        self._size = size
+        # Created on first use, as it is bound to the running event loop on Python 3.9.
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._setup = setup
+        self._idle_pages: List["Page"] = []
+
+    async def _new_page(self) -> "Page":
+        page = await self._browser.new_page(viewport={"width": 800, "height": 450})
+        if self._setup:
+            await self._setup(page)
+        return page
+
+    @asynccontextmanager
+    async def page(self):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self._size)
+        async with self._semaphore:
+            page = self._idle_pages.pop() if self._idle_pages else await self._new_page()
+            try:
+                yield page
+            except Exception:
+                # Don't hand out pages that might be left in a broken state.
+                await page.close()
+                raise
+            self._idle_pages.append(page)
+
+    async def close(self):
+        while self._idle_pages:
+            await self._idle_pages.pop().close()
+
+
+def mermaid_page_pool(browser: "Browser", size: int = DEFAULT_SVG_CONCURRENCY) -> PagePool:
+    """
+    Page pool with Mermaid loaded on every page. Hand it to the SVG writers to keep
+    pages warm across multiple render runs, like in watch mode.
+    """
+    return PagePool(browser, size, setup=_load_mermaid)
+
+
+@asynccontextmanager
+async def _provided_or_new_browser(provided_browser: Optional["Browser"]):
+    if provided_browser:
+        yield provided_browser
+    else:
+        async with get_browser() as browser:
+            yield browser
+
+
+async def _render_svg(page: "Page", diagram_id: str, mermaid_diagram: str) -> str:
+    """
+    Render a diagram on a page that already has Mermaid loaded. `mermaid.render`
+    returns the SVG markup directly, so nothing needs to be read back from the DOM.
+    """
+    svg_str: str = await page.evaluate(
+        "async ([id, diagram]) => (await mermaid.render(id, diagram)).svg",
+        [diagram_id, mermaid_diagram],
+    )
+    return svg_str
+
+
+DiagramKey = TypeVar("DiagramKey", bound=Hashable)
+
+
+async def _render_svgs(
+    mermaid_diagrams: Mapping[DiagramKey, str],
+    provided_browser: Optional["Browser"],
+    concurrency: int,
+    cache: Optional["SvgRenderCache"] = None,
+    page_pool: Optional[PagePool] = None,
+) -> Dict[DiagramKey, Tuple[str, Optional[float]]]:
+    """
+    Render all diagrams concurrently on a single browser. Returns the SVG and the
+    render time in seconds for every diagram. Diagrams found in `cache` have no
+    render time. In case all diagrams are cached, no browser is launched at all.
+    A provided `page_pool` is used instead of a browser and is left open.
+    """
+
+    async def _render(pool: PagePool, diagram_id: str, diagram: str) -> Tuple[str, float]:
+        async with pool.page() as page:
+            start = time.perf_counter()
+            svg_str = await _render_svg(page, diagram_id, diagram)
+            return svg_str, time.perf_counter() - start
+
+    rendered: Dict[DiagramKey, Tuple[str, Optional[float]]] = {}
+    to_render: Dict[DiagramKey, str] = {}
+    for diagram_name, diagram in mermaid_diagrams.items():
+        cached_svg = cache.get(diagram) if cache else None
+        if cached_svg is not None:
+            rendered[diagram_name] = (cached_svg, None)
+        else:
+            to_render[diagram_name] = diagram
+
+    async def _render_all(pool: PagePool) -> List[Tuple[str, float]]:
+        return await asyncio.gather(
+            *(
+                _render(pool, f"dbt-diagrams-{idx}", diagram)
+                for idx, diagram in enumerate(to_render.values())
+            )
         )
-        await svg.screenshot(path="screenshot.png")
-        svg_str = await svg.inner_html()
-        await page.close()
-        return svg_str
-
-    # Creating a temp file requires manually seeking to 0 again before passing around the
-    # open file handler to other functions. Creating a temp dir leaves us free to create
-    # file and close them in one context, while still benefiting from automatic cleanup
-    # after we're done.
-    with tempfile.TemporaryDirectory(prefix="dbt_diagrams") as tmp_dir:
-        tmp_html_path = f"{tmp_dir}/tmp.html"
-        with open(tmp_html_path, "w") as tmp_html:
-            html = """
-                        <!DOCTYPE html>
-                        <html lang="en">
-                        <body>
-                            <pre class="mermaid">
-                            {}
-                            </pre>
-
-                            <script type="module">
-                            import mermaid from 'https://cdn.jsdelivr.net/npm/mermaid@10/dist/mermaid.esm.min.mjs';
-                            </script>
-                        </body>
-                        </html>
-                        """.format(mermaid_diagram)
-            tmp_html.write(html)
-
-        if provided_browser:
-            return await _inner(tmp_html_path, provided_browser)
+
+    if to_render:
+        if page_pool:
+            with span("render_svgs"):
+                results = await _render_all(page_pool)
         else:
-            async with get_browser() as browser:
-                return await _inner(tmp_html_path, browser)
+            async with _provided_or_new_browser(provided_browser) as browser:
+                pool = mermaid_page_pool(browser, concurrency)
+                try:
+                    with span("render_svgs"):
+                        results = await _render_all(pool)
+                finally:
+                    await pool.close()
+
+        for (diagram_name, diagram), result in zip(to_render.items(), results):
+            rendered[diagram_name] = result
+            if cache:
+                cache.put(diagram, result[0])
+
+        if cache:
+            cache.evict()
+
+    return {diagram_name: rendered[diagram_name] for diagram_name in mermaid_diagrams}
+
+
+async def as_svg(mermaid_diagram: str, provided_browser: Optional["Browser"] = None) -> Any:
+    rendered = await _render_svgs({"diagram": mermaid_diagram}, provided_browser, 1)
+    return rendered["diagram"][0]
+
+
+async def as_svgs(
+    mermaid_diagrams: Dict[str, str],
+    provided_browser: Optional["Browser"] = None,
+    concurrency: int = DEFAULT_SVG_CONCURRENCY,
+    cache: Optional["SvgRenderCache"] = None,
+    page_pool: Optional[PagePool] = None,
+) -> Dict[str, str]:
+    """
+    Render all diagrams, as returned by `to_mermaid_erds_from_*`, as SVG. Mermaid is
+    loaded once per page and every diagram is rendered with `mermaid.render`, using a
+    single browser with at most `concurrency` pages rendering in parallel. Diagrams
+    that are in `cache` are not rendered again. Use `page_pool` (see
+    `mermaid_page_pool`) to render on already warmed up pages.
+    """
+    rendered = await _render_svgs(mermaid_diagrams, provided_browser, concurrency, cache, page_pool)
+    return {diagram_name: svg_str for diagram_name, (svg_str, _) in rendered.items()}
 
 
 async def write_as_svg(
-    mermaid_diagrams: Dict[str, str], out: Path, provided_browser: Optional["Browser"] = None
-):
-    for diagram_name, diagram in mermaid_diagrams.items():
-        svg_str = await as_svg(diagram, provided_browser)
-        with open(f"{out}/{diagram_name}.svg", "w") as f:
-            f.write(svg_str)
+    mermaid_diagrams: Dict[str, str],
+    out: Path,
+    provided_browser: Optional["Browser"] = None,
+    concurrency: int = DEFAULT_SVG_CONCURRENCY,
+    cache: Optional["SvgRenderCache"] = None,
+) -> Dict[str, Optional[float]]:
+    """
+    Same as `as_svgs` but writes every diagram to file. Returns the render time
+    in seconds per diagram, or None for diagrams that came from `cache`.
+    """
+    render_times = await write_many_as_svg(
+        {out: mermaid_diagrams}, provided_browser, concurrency, cache
+    )
+    return render_times[out]
+
+
+async def write_many_as_svg(
+    mermaid_diagrams_per_dir: Dict[Path, Dict[str, str]],
+    provided_browser: Optional["Browser"] = None,
+    concurrency: int = DEFAULT_SVG_CONCURRENCY,
+    cache: Optional["SvgRenderCache"] = None,
+    page_pool: Optional[PagePool] = None,
+) -> Dict[Path, Dict[str, Optional[float]]]:
+    """
+    Same as `write_as_svg` for the diagrams of many output directories at once. All
+    of them share a single browser and at most `concurrency` pages render in parallel.
+    Use `page_pool` (see `mermaid_page_pool`) to render on already warmed up pages.
+    """
+    rendered = await _render_svgs(
+        {
+            (out, diagram_name): diagram
+            for out, mermaid_diagrams in mermaid_diagrams_per_dir.items()
+            for diagram_name, diagram in mermaid_diagrams.items()
+        },
+        provided_browser,
+        concurrency,
+        cache,
+        page_pool,
+    )
+
+    render_times: Dict[Path, Dict[str, Optional[float]]] = {
+        out: {} for out in mermaid_diagrams_per_dir
+    }
+    with span("write_diagrams"):
+        for (out, diagram_name), (svg_str, render_time) in rendered.items():
+            with open(f"{out}/{diagram_name}.svg", "w") as f:
+                f.write(svg_str)
+            render_times[out][diagram_name] = render_time
+
+    return render_times
@@ -0,0 +1,145 @@
+"""
+Splitting of ERDs that are too large for Mermaid to lay out in reasonable time, as
+layout time grows much faster than the number of entities. A diagram is split into
+parts of at most `max_entities` entities, named `<diagram>__part<N>`. Groups of
+connected entities only share a part when they fit in it together, while groups
+that are too large are split into parts grown breadth first, so related entities
+end up in the same part. Relations between parts are kept in both, where the entity
+of the other part is shown as a stub without columns. Stubs don't count towards
+`max_entities`, as they are drawn without columns.
+"""
+
+from collections import deque
+from dataclasses import dataclass, field
+from itertools import chain
+from typing import TYPE_CHECKING, Container, Deque, Dict, Iterator, List, Set
+
+if TYPE_CHECKING:
+    from dbt_diagrams.domain import Relation
+
+PART_SEPARATOR = "__part"
+
+
+def part_name(diagram_name: str, number: int) -> str:
+    return f"{diagram_name}{PART_SEPARATOR}{number}"
+
+
+def part_names(diagram_name: str, diagram_names: Container[str]) -> Iterator[str]:
+    """Names of all parts of `diagram_name` in `diagram_names`, in order."""
+    number = 1
+    while (name := part_name(diagram_name, number)) in diagram_names:
+        yield name
+        number += 1
+
+
+def is_part_of(name: str, diagram_name: str) -> bool:
+    prefix = f"{diagram_name}{PART_SEPARATOR}"
+    return name.startswith(prefix) and name[len(prefix) :].isdigit()
+
+
+@dataclass
+class Partition:
+    # Model names of the entities in this part, with their columns.
+    entities: List[str] = field(default_factory=list)
+    # Relations between entities of this part and relations with entities of other parts.
+    relations: List["Relation"] = field(default_factory=list)
+    # Part number (starting at 1) of every entity of another part this one relates to.
+    stubs: Dict[str, int] = field(default_factory=dict)
+
+
+def partition_relations(relations: List["Relation"], max_entities: int) -> List[Partition]:
+    """
+    Split the relations of a diagram into parts of at most `max_entities` entities,
+    not counting stubs. Diagrams that are small enough come back as a single part.
+    """
+    # Entities in order of first mention, which is the order they are laid out in.
+    neighbours: Dict[str, List[str]] = {}
+    for relation in relations:
+        source, target = relation.source.model_name, relation.target.model_name
+        neighbours.setdefault(source, []).append(target)
+        neighbours.setdefault(target, []).append(source)
+
+    if len(neighbours) <= max_entities:
+        return [Partition(list(neighbours), list(relations))]
+
+    part_of: Dict[str, int] = {}
+    partitions: List[Partition] = []
+    # Parts that only hold whole groups of connected entities, and have room left.
+    packed: List[Partition] = []
+    for component in _connected_components(neighbours):
+        if len(component) > max_entities:
+            _split_component(component, neighbours, max_entities, part_of, partitions)
+            continue
+
+        partition = next(
+            (p for p in packed if len(p.entities) + len(component) <= max_entities), None
+        )
+        if partition is None:
+            partition = Partition()
+            partitions.append(partition)
+            packed.append(partition)
+        number = partitions.index(partition) + 1
+        partition.entities.extend(component)
+        part_of.update((entity, number) for entity in component)
+
+    for relation in relations:
+        source, target = relation.source.model_name, relation.target.model_name
+        source_part, target_part = part_of[source], part_of[target]
+        partitions[source_part - 1].relations.append(relation)
+        if source_part != target_part:
+            partitions[source_part - 1].stubs[target] = target_part
+            partitions[target_part - 1].relations.append(relation)
+            partitions[target_part - 1].stubs[source] = source_part
+    return partitions
+
+
+def _connected_components(neighbours: Dict[str, List[str]]) -> List[List[str]]:
+    """Groups of connected entities, each in breadth first order from its first entity."""
+    seen: Set[str] = set()
+    components = []
+    for start in neighbours:
+        if start in seen:
+            continue
+        seen.add(start)
+        component = [start]
+        for entity in component:
+            for neighbour in neighbours[entity]:
+                if neighbour not in seen:
+                    seen.add(neighbour)
+                    component.append(neighbour)
+        components.append(component)
+    return components
+
+
+def _split_component(
+    component: List[str],
+    neighbours: Dict[str, List[str]],
+    max_entities: int,
+    part_of: Dict[str, int],
+    partitions: List[Partition],
+):
+    """Split a group of connected entities into new parts, grown breadth first."""
+    unvisited = iter(component)
+    # Entities to start from, those next to the previous part first.
+    starts: Iterator[str] = unvisited
+    done = len(part_of) + len(component)
+    while len(part_of) < done:
+        partition = Partition()
+        partitions.append(partition)
+        queue: Deque[str] = deque()
+        while len(partition.entities) < max_entities:
+            if not queue:
+                start = next((e for e in starts if e not in part_of), None)
+                if start is None:
+                    break
+                part_of[start] = len(partitions)
+                partition.entities.append(start)
+                queue.append(start)
+                continue
+
+            for neighbour in neighbours[queue.popleft()]:
+                if neighbour not in part_of and len(partition.entities) < max_entities:
+                    part_of[neighbour] = len(partitions)
+                    partition.entities.append(neighbour)
+                    queue.append(neighbour)
+        starts = chain([e for entity in queue for e in neighbours[entity]], unvisited)
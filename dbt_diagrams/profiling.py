@@ -0,0 +1,173 @@
+"""
+Stage level timing of the render and docs pipelines. The pipeline stages (reading
+artifacts, building relations, generating Mermaid, injecting docs, rendering SVGs,
+...) run inside a `span`. Register a hook with `add_span_hook` to receive every
+span once it ends, or use `Profiler` to collect them into a table.
+
+Spans cost next to nothing while no hooks are registered.
+"""
+
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from pathlib import Path
+import time
+import tracemalloc
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, List, Optional
+
+if TYPE_CHECKING:
+    import cProfile
+
+
+@dataclass
+class Span:
+    name: str
+    # Number of spans this one is nested in.
+    depth: int
+    duration: float = 0.0
+    # Peak of the memory traced by `tracemalloc` while the span was open, in bytes.
+    # Only set while tracemalloc is tracing.
+    peak_memory: Optional[int] = None
+
+
+SpanHook = Callable[[Span], None]
+
+_span_hooks: List[SpanHook] = []
+_span_start_hooks: List[SpanHook] = []
+_open_spans: List[Span] = []
+
+
+def add_span_hook(hook: SpanHook):
+    """Call `hook` with every span that ends from now on."""
+    _span_hooks.append(hook)
+
+
+def remove_span_hook(hook: SpanHook):
+    _span_hooks.remove(hook)
+
+
+def _record_peak_memory():
+    # The tracemalloc peak is global, so it is folded into all open spans before
+    # being reset for the next span.
+    _, peak = tracemalloc.get_traced_memory()
+    for open_span in _open_spans:
+        open_span.peak_memory = max(open_span.peak_memory or 0, peak)
+    tracemalloc.reset_peak()
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """Time the code in this block as pipeline stage `name`."""
+    if not _span_hooks:
+        yield
+        return
+
+    tracing = tracemalloc.is_tracing()
+    if tracing:
+        _record_peak_memory()
+    current = Span(name, depth=len(_open_spans))
+    if tracing:
+        current.peak_memory = tracemalloc.get_traced_memory()[0]
+    for hook in _span_start_hooks:
+        hook(current)
+    _open_spans.append(current)
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        current.duration = time.perf_counter() - start
+        if tracing and tracemalloc.is_tracing():
+            _record_peak_memory()
+        _open_spans.remove(current)
+        for hook in list(_span_hooks):
+            hook(current)
+
+
+@dataclass
+class StageStats:
+    name: str
+    depth: int
+    calls: int = 0
+    total_time: float = 0.0
+    peak_memory: Optional[int] = None
+
+
+class Profiler:
+    """
+    Collect all spans into per stage statistics while running. Stages with the same
+    name are added up. Use `trace_memory` to record the peak memory per stage, at the
+    cost of slowing everything down, and `cprofile_path` to write the cProfile stats
+    of the slowest top level stage to that file.
+    """
+
+    def __init__(self, trace_memory: bool = True, cprofile_path: Optional[Path] = None):
+        self.trace_memory = trace_memory
+        self.cprofile_path = cprofile_path
+        self.stages: Dict[str, StageStats] = {}
+        self.slowest_stage: Optional[Span] = None
+        self._started_tracemalloc = False
+        self._cprofile: Optional["cProfile.Profile"] = None
+        self._slowest_cprofile: Optional["cProfile.Profile"] = None
+
+    def __enter__(self) -> "Profiler":
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        add_span_hook(self._span_ended)
+        _span_start_hooks.append(self._span_started)
+        return self
+
+    def __exit__(self, *exc_info):
+        remove_span_hook(self._span_ended)
+        _span_start_hooks.remove(self._span_started)
+        if self._cprofile is not None:
+            self._cprofile.disable()
+        if self.cprofile_path and self._slowest_cprofile is not None:
+            self._slowest_cprofile.dump_stats(self.cprofile_path)
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+
+    def _span_started(self, span: Span):
+        # Registered on start, so stages are listed in the order they started.
+        self.stages.setdefault(span.name, StageStats(span.name, span.depth))
+        if self.cprofile_path and span.depth == 0:
+            import cProfile
+
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+
+    def _span_ended(self, span: Span):
+        stats = self.stages[span.name]
+        stats.calls += 1
+        stats.total_time += span.duration
+        if span.peak_memory is not None:
+            stats.peak_memory = max(stats.peak_memory or 0, span.peak_memory)
+
+        if span.depth == 0:
+            if self._cprofile is not None:
+                self._cprofile.disable()
+            if self.slowest_stage is None or span.duration > self.slowest_stage.duration:
+                self.slowest_stage = span
+                self._slowest_cprofile = self._cprofile
+            self._cprofile = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "stages": [asdict(stats) for stats in self.stages.values()],
+            "slowest_stage": self.slowest_stage.name if self.slowest_stage else None,
+        }
+
+    def table(self) -> str:
+        name_width = max([len("stage"), *(2 * s.depth + len(s.name) for s in self.stages.values())])
+        lines = [
+            f"{'stage':<{name_width + 2}}{'calls':>7}{'total (s)':>11}{'peak memory (MB)':>18}"
+        ]
+        for stats in self.stages.values():
+            peak_memory = (
+                f"{stats.peak_memory / 1024**2:.1f}" if stats.peak_memory is not None else "-"
+            )
+            lines.append(
+                f"{'  ' * stats.depth + stats.name:<{name_width + 2}}{stats.calls:>7}"
+                f"{stats.total_time:>11.3f}{peak_memory:>18}"
+            )
+        return "\n".join(lines)
@@ -0,0 +1,129 @@
+from collections import OrderedDict
+import hashlib
+import os
+from pathlib import Path
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from dbt_diagrams.mermaid import strip_generation_timestamp
+from dbt_diagrams.output_writers import MERMAID_THEME, MERMAID_VERSION
+
+DEFAULT_CACHE_DIR = Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")) / "dbt-diagrams"
+DEFAULT_CACHE_MAX_BYTES = 100 * 1024**2
+
+
+class SvgRenderCache:
+    """
+    Content addressed on-disk cache of rendered SVGs. The key is a hash of the diagram
+    source (without generation timestamp), the Mermaid version and the Mermaid theme.
+    Entries are evicted least recently used first once the cache exceeds `max_bytes`.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Path = DEFAULT_CACHE_DIR,
+        max_bytes: int = DEFAULT_CACHE_MAX_BYTES,
+        mermaid_version: str = MERMAID_VERSION,
+        mermaid_theme: str = MERMAID_THEME,
+    ):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._key_prefix = f"{mermaid_version}\0{mermaid_theme}\0"
+
+    def key(self, mermaid_diagram: str) -> str:
+        return hashlib.sha256(
+            (self._key_prefix + strip_generation_timestamp(mermaid_diagram)).encode()
+        ).hexdigest()
+
+    def _path(self, mermaid_diagram: str) -> Path:
+        return self.cache_dir / f"{self.key(mermaid_diagram)}.svg"
+
+    def get(self, mermaid_diagram: str) -> Optional[str]:
+        path = self._path(mermaid_diagram)
+        try:
+            svg_str = path.read_text()
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+
+        # Modification time is used as last access time for LRU eviction.
+        os.utime(path)
+        self.hits += 1
+        return svg_str
+
+    def put(self, mermaid_diagram: str, svg_str: str):
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        path = self._path(mermaid_diagram)
+        # Write to a temp file and rename, so concurrent runs never read partial entries.
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_text(svg_str)
+        os.replace(tmp_path, path)
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits in `max_bytes`."""
+        if not self.cache_dir.exists():
+            return
+
+        entries = sorted(
+            ((p, p.stat()) for p in self.cache_dir.glob("*.svg")),
+            key=lambda entry: entry[1].st_mtime,
+        )
+        total_bytes = sum(stat.st_size for _, stat in entries)
+        for path, stat in entries:
+            if total_bytes <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total_bytes -= stat.st_size
+
+
+class MemoryLRUCache:
+    """
+    In-memory cache bounded by the total size in bytes of its values, as given to
+    `put`. Entries are evicted least recently used first. Values that are larger
+    than `max_bytes` by themselves are not cached at all.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[Hashable, Tuple[Any, int]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, key: Hashable, value: Any, size: int):
+        if key in self._entries:
+            self.bytes -= self._entries.pop(key)[1]
+        if size > self.max_bytes:
+            return
+
+        self._entries[key] = (value, size)
+        self.bytes += size
+        while self.bytes > self.max_bytes:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self.bytes -= evicted_size
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
@@ -1,50 +1,306 @@
-from playwright.async_api import Browser
-
-rest_api_browser: Browser | None = None
-
-
-# @asynccontextmanager
-# async def lifespan(app: FastAPI):
-#     global rest_api_browser
-#     async with get_browser() as _browser:
-#         rest_api_browser = _browser
-#         yield
-
-
-# app = FastAPI(lifespan=lifespan)
-
-# output_mime_types = {
-#     OutputFormat.MERMAID: "text/plain",
-#     OutputFormat.MARKDOWN: "text/plain",
-#     OutputFormat.SVG: "image/svg",
-# }
-
-
-# @app.post("/generate")
-# async def generate(
-#     manifest: Annotated[UploadFile, File()],
-#     catalog: Annotated[Union[UploadFile, None], File()] = None,
-#     output_format: Annotated[OutputFormat, Form()] = OutputFormat.MERMAID,
-#     as_json_response: Annotated[bool, Form()] = False,
-# ):
-#     try:
-#         manifest_json = verify_and_read_f(manifest.file, DbtArtifactType.MANIFEST)
-#         catalog_json = verify_and_read_f(catalog.file, DbtArtifactType.CATALOG) if catalog else {}
-#     except ValueError as ve:
-#         raise HTTPException(status_code=400, detail=str(ve))
-
-#     mermaid_diagram = mermaid_erds_from_manifest_and_catalog(manifest_json, catalog_json)
-
-#     if output_format == OutputFormat.MERMAID:
-#         result = mermaid_diagram
-#     elif output_format == OutputFormat.MARKDOWN:
-#         result = as_markdown(mermaid_diagram)
-#     else:
-#         result = await as_svg(mermaid_diagram, rest_api_browser)
-
-#     if as_json_response:
-#         return {"result": result}
-#     else:
-#         return Response(
-#             content=result, status_code=200, media_type=output_mime_types[output_format]
-#         )
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import AsyncExitStack, asynccontextmanager
+from enum import Enum
+import hashlib
+import io
+import os
+from typing import Annotated, Dict, Optional, Union
+import zipfile
+
+from fastapi import FastAPI, File, Form, HTTPException, Request, Response, UploadFile
+
+from dbt_diagrams import __version__, json_backend
+from dbt_diagrams.input_validators import DbtArtifactType, verify_and_read_subset_f
+from dbt_diagrams.json_scanner import locate_values
+from dbt_diagrams.mermaid import to_mermaid_erds_from_artifacts
+from dbt_diagrams.output_writers import (
+    DEFAULT_SVG_CONCURRENCY,
+    OutputFormat,
+    PagePool,
+    as_markdown,
+    as_svgs,
+    get_browser,
+    mermaid_page_pool,
+)
+from dbt_diagrams.render_cache import MemoryLRUCache
+
+DEFAULT_MAX_CONCURRENT_REQUESTS = 8
+DEFAULT_MAX_QUEUED_REQUESTS = 32
+DEFAULT_CACHE_MAX_BYTES = 256 * 1024**2
+# dbt writes `metadata` first, so the invocation id is found near the start.
+_INVOCATION_ID_SCAN_BYTES = 64 * 1024
+
+output_file_extensions = {
+    OutputFormat.MERMAID: "mmd",
+    OutputFormat.MARKDOWN: "md",
+    OutputFormat.SVG: "svg",
+}
+
+
+class ResponseFormat(Enum):
+    JSON = "json"
+    ZIP = "zip"
+
+
+class ServiceBusy(Exception):
+    pass
+
+
+class RequestLimiter:
+    """
+    Let at most `max_concurrent` requests in at the same time and `max_queued` more
+    wait for their turn. Requests beyond that are turned away right away, so clients
+    back off instead of piling up work the service can't keep up with.
+    """
+
+    def __init__(self, max_concurrent: int, max_queued: int):
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+        self.active = 0
+        self.queued = 0
+        self.rejected = 0
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+
+    @asynccontextmanager
+    async def slot(self):
+        if self.active >= self.max_concurrent and self.queued >= self.max_queued:
+            self.rejected += 1
+            raise ServiceBusy()
+
+        self.queued += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.queued -= 1
+
+        self.active += 1
+        try:
+            yield
+        finally:
+            self.active -= 1
+            self._semaphore.release()
+
+
+def _invocation_id(manifest: bytes) -> str:
+    head = manifest[:_INVOCATION_ID_SCAN_BYTES].decode(errors="ignore")
+    try:
+        spans = locate_values(head, [("metadata", "invocation_id")])
+    except ValueError:
+        return ""
+    if not spans:
+        return ""
+    start, end = spans[("metadata", "invocation_id")]
+    invocation_id = json_backend.loads(head[start:end].encode())
+    return invocation_id if isinstance(invocation_id, str) else ""
+
+
+def artifacts_key(manifest: bytes, catalog: Optional[bytes]) -> str:
+    """
+    Cache key of uploaded artifacts: the `invocation_id` of the dbt run that wrote the
+    manifest plus a hash of the manifest and catalog content. The hash makes sure
+    artifacts that were edited after the dbt run don't get stale results.
+    """
+    digest = hashlib.sha256(manifest)
+    if catalog is not None:
+        digest.update(b"\0")
+        digest.update(catalog)
+    return f"{_invocation_id(manifest)}:{digest.hexdigest()}"
+
+
+def _etag(*parts: str) -> str:
+    """
+    Weak ETag, as responses for the same upload are equivalent but not byte for byte
+    the same: diagrams embed the time they were generated at. Output can change
+    between versions of dbt-diagrams, so the version is part of the tag.
+    """
+    digest = hashlib.sha256("\0".join([__version__, *parts]).encode()).hexdigest()[:32]
+    return f'W/"{digest}"'
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    # `If-None-Match` uses weak comparison, which ignores the W/ prefix on both sides.
+    if not if_none_match:
+        return False
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*" or tag.removeprefix("W/") == etag.removeprefix("W/"):
+            return True
+    return False
+
+
+def _build_erds(
+    manifest: bytes, catalog: Optional[bytes], include_cols: bool = True
+) -> Dict[str, str]:
+    # Runs in a worker process, so parsing big artifacts doesn't block the event loop.
+    manifest_json = verify_and_read_subset_f(io.BytesIO(manifest), DbtArtifactType.MANIFEST)
+    catalog_json = (
+        verify_and_read_subset_f(io.BytesIO(catalog), DbtArtifactType.CATALOG) if catalog else None
+    )
+    return to_mermaid_erds_from_artifacts(manifest_json, catalog_json, include_cols)
+
+
+def _zip_diagrams(diagrams: Dict[str, str], extension: str) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zip_file:
+        for diagram_name, diagram in diagrams.items():
+            zip_file.writestr(f"{diagram_name}.{extension}", diagram)
+    return buffer.getvalue()
+
+
+def create_app(
+    max_concurrent_requests: int = DEFAULT_MAX_CONCURRENT_REQUESTS,
+    max_queued_requests: int = DEFAULT_MAX_QUEUED_REQUESTS,
+    parse_workers: Optional[int] = None,
+    svg_pages: int = DEFAULT_SVG_CONCURRENCY,
+    cache_max_bytes: int = DEFAULT_CACHE_MAX_BYTES,
+) -> FastAPI:
+    """
+    REST API that renders the ERDs of uploaded dbt artifacts.
+
+    Artifacts are parsed in a pool of `parse_workers` processes (CPU count by default).
+    SVGs are rendered on a single browser, launched on the first SVG request, with a
+    pool of `svg_pages` pages that have Mermaid loaded. See `RequestLimiter` for the
+    request limits.
+
+    Built ERDs and response bodies are kept in memory, up to `cache_max_bytes`, keyed
+    by `artifacts_key`. Responses carry an ETag, so clients that upload the same
+    artifacts again with `If-None-Match` get a 304 without any work being done.
+    """
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        async with AsyncExitStack() as stack:
+            app.state.exit_stack = stack
+            app.state.executor = stack.enter_context(ProcessPoolExecutor(max_workers=parse_workers))
+            app.state.limiter = RequestLimiter(max_concurrent_requests, max_queued_requests)
+            app.state.page_pool = None
+            app.state.page_pool_lock = asyncio.Lock()
+            app.state.cache = MemoryLRUCache(cache_max_bytes)
+            app.state.not_modified = 0
+            yield
+
+    app = FastAPI(title="dbt-diagrams", lifespan=lifespan)
+
+    async def page_pool() -> PagePool:
+        async with app.state.page_pool_lock:
+            if app.state.page_pool is None:
+                browser = await app.state.exit_stack.enter_async_context(get_browser())
+                app.state.page_pool = mermaid_page_pool(browser, svg_pages)
+                app.state.exit_stack.push_async_callback(app.state.page_pool.close)
+        pool: PagePool = app.state.page_pool
+        return pool
+
+    @app.get("/health")
+    async def health(request: Request):
+        limiter: RequestLimiter = request.app.state.limiter
+        return {
+            "status": "ok",
+            "active_requests": limiter.active,
+            "queued_requests": limiter.queued,
+        }
+
+    @app.get("/metrics")
+    async def metrics(request: Request):
+        limiter: RequestLimiter = request.app.state.limiter
+        cache: MemoryLRUCache = request.app.state.cache
+        return {
+            "cache": cache.stats(),
+            "requests": {
+                "active": limiter.active,
+                "queued": limiter.queued,
+                "rejected": limiter.rejected,
+                "not_modified": request.app.state.not_modified,
+            },
+        }
+
+    @app.post("/generate")
+    async def generate(
+        request: Request,
+        manifest: Annotated[UploadFile, File()],
+        catalog: Annotated[Union[UploadFile, None], File()] = None,
+        output_format: Annotated[OutputFormat, Form()] = OutputFormat.MERMAID,
+        response_format: Annotated[ResponseFormat, Form()] = ResponseFormat.JSON,
+        include_columns: Annotated[bool, Form()] = True,
+    ):
+        """
+        Render all ERDs defined in the uploaded manifest, with column types from the
+        optional catalog. Returns `{"diagrams": {<name>: <diagram>}}` or a zip archive
+        with a file per diagram. Responds with 304 when the `If-None-Match` header
+        matches and with 503 when the service is at capacity.
+        """
+        cache: MemoryLRUCache = request.app.state.cache
+        manifest_bytes = await manifest.read()
+        catalog_bytes = await catalog.read() if catalog else None
+        key = await asyncio.to_thread(artifacts_key, manifest_bytes, catalog_bytes)
+        etag = _etag(key, output_format.value, response_format.value, str(include_columns))
+        headers = {"ETag": etag}
+
+        if _etag_matches(request.headers.get("If-None-Match"), etag):
+            request.app.state.not_modified += 1
+            return Response(status_code=304, headers=headers)
+
+        cached_response = cache.get(("response", etag))
+        if cached_response is None:
+            try:
+                async with request.app.state.limiter.slot():
+                    diagrams: Optional[Dict[str, str]] = cache.get(("erds", key, include_columns))
+                    if diagrams is None:
+                        try:
+                            diagrams = await asyncio.get_running_loop().run_in_executor(
+                                request.app.state.executor,
+                                _build_erds,
+                                manifest_bytes,
+                                catalog_bytes,
+                                include_columns,
+                            )
+                        except Exception as e:
+                            raise HTTPException(status_code=400, detail=str(e))
+                        cache.put(
+                            ("erds", key, include_columns),
+                            diagrams,
+                            sum(len(name) + len(diagram) for name, diagram in diagrams.items()),
+                        )
+
+                    assert diagrams is not None
+                    if output_format == OutputFormat.MARKDOWN:
+                        diagrams = {
+                            name: as_markdown(diagram) for name, diagram in diagrams.items()
+                        }
+                    elif output_format == OutputFormat.SVG:
+                        diagrams = await as_svgs(diagrams, page_pool=await page_pool())
+            except ServiceBusy:
+                raise HTTPException(
+                    status_code=503,
+                    detail="Too many requests in progress. Try again later.",
+                    headers={"Retry-After": "1"},
+                )
+
+            if response_format == ResponseFormat.ZIP:
+                body = await asyncio.to_thread(
+                    _zip_diagrams, diagrams, output_file_extensions[output_format]
+                )
+                cached_response = (body, "application/zip")
+            else:
+                cached_response = (json_backend.dumps({"diagrams": diagrams}), "application/json")
+            cache.put(("response", etag), cached_response, len(cached_response[0]))
+
+        body, media_type = cached_response
+        if response_format == ResponseFormat.ZIP:
+            headers["Content-Disposition"] = 'attachment; filename="diagrams.zip"'
+        return Response(content=body, media_type=media_type, headers=headers)
+
+    return app
+
+
+app = create_app(
+    max_concurrent_requests=int(
+        os.environ.get("DBT_DIAGRAMS_API_MAX_CONCURRENT_REQUESTS", DEFAULT_MAX_CONCURRENT_REQUESTS)
+    ),
+    max_queued_requests=int(
+        os.environ.get("DBT_DIAGRAMS_API_MAX_QUEUED_REQUESTS", DEFAULT_MAX_QUEUED_REQUESTS)
+    ),
+    cache_max_bytes=int(
+        os.environ.get("DBT_DIAGRAMS_API_CACHE_MAX_BYTES", DEFAULT_CACHE_MAX_BYTES)
+    ),
+)
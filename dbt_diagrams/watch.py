@@ -0,0 +1,61 @@
+import asyncio
+import os
+from pathlib import Path
+from typing import AsyncIterator, Dict, Iterable, Optional, Set, Tuple
+
+DEFAULT_POLL_INTERVAL = 0.1
+DEFAULT_DEBOUNCE = 0.3
+
+FileStat = Optional[Tuple[int, int]]
+
+
+def _stat(path: Path) -> FileStat:
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class ArtifactWatcher:
+    """
+    Detect changes to dbt artifacts by polling their modification time and size, so
+    no file system notification daemon is needed. dbt writes artifacts in multiple
+    steps, so a change is only reported once none of the files changed for `debounce`
+    seconds. Files that don't exist (yet) are watched as well.
+    """
+
+    def __init__(
+        self,
+        paths: Iterable[Path],
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+        debounce: float = DEFAULT_DEBOUNCE,
+    ):
+        self.paths = list(paths)
+        self.poll_interval = poll_interval
+        self.debounce = debounce
+
+    def _snapshot(self) -> Dict[Path, FileStat]:
+        return {path: _stat(path) for path in self.paths}
+
+    async def changes(self) -> AsyncIterator[Set[Path]]:
+        """Yield the paths that changed, every time changes have settled."""
+        loop = asyncio.get_running_loop()
+        last = self._snapshot()
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            current = self._snapshot()
+            if current == last:
+                continue
+
+            settled_since = loop.time()
+            while loop.time() - settled_since < self.debounce:
+                await asyncio.sleep(self.poll_interval)
+                newer = self._snapshot()
+                if newer != current:
+                    current, settled_since = newer, loop.time()
+
+            changed = {path for path in self.paths if current[path] != last[path]}
+            last = current
+            if changed:
+                yield changed
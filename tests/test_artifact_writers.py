@@ -0,0 +1,82 @@
+import json
+from pathlib import Path
+import shutil
+
+import pytest
+
+from dbt_diagrams.artifact_writers import patch_json_file
+from dbt_diagrams.input_validators import DbtArtifacts
+from dbt_diagrams.mermaid import (
+    to_mermaid_erds_from_artifacts,
+    update_docs_with_rendered_mermaid_erds,
+)
+
+JAFFLE_SHOP = Path(__file__).parent / "fixtures" / "jaffle_shop"
+
+
+@pytest.mark.parametrize("indent", [None, 2])
+def test_patched_manifest_equals_full_dump(tmp_path, indent):
+    manifest_path = tmp_path / "manifest.json"
+    manifest = json.loads((JAFFLE_SHOP / "manifest.json").read_text())
+    manifest_path.write_text(json.dumps(manifest, indent=indent))
+    shutil.copy(JAFFLE_SHOP / "catalog.json", tmp_path / "catalog.json")
+
+    artifacts = DbtArtifacts.from_target_dir(tmp_path)
+    rendered_erds = to_mermaid_erds_from_artifacts(artifacts.manifest, artifacts.catalog)
+    changed_docs = update_docs_with_rendered_mermaid_erds(artifacts.manifest, rendered_erds)
+    patch_json_file(
+        manifest_path,
+        {
+            (section, unique_id, field): artifacts.manifest[section][unique_id][field]
+            for section, unique_id, field in changed_docs
+        },
+    )
+
+    assert len(changed_docs) == 3
+    assert json.loads(manifest_path.read_text()) == json.loads(json.dumps(artifacts.manifest))
+    assert not (tmp_path / "manifest.json.tmp").exists()
+
+
+def test_patch_only_touches_given_values(tmp_path):
+    json_path = tmp_path / "file.json"
+    json_path.write_text('{"a": {"b": "old", "c": [1, {"b": "old"}]},  "b" : "old"}')
+
+    patch_json_file(json_path, {("a", "b"): 'new "quoted"', ("b",): [None]})
+
+    assert json_path.read_text() == (
+        '{"a": {"b": "new \\"quoted\\"", "c": [1, {"b": "old"}]},  "b" : [null]}'
+    )
+
+
+def test_patch_missing_path(tmp_path):
+    json_path = tmp_path / "file.json"
+    json_path.write_text('{"a": {"b": "old"}}')
+
+    with pytest.raises(ValueError, match="Could not find a.c"):
+        patch_json_file(json_path, {("a", "c"): "new"})
+    assert json_path.read_text() == '{"a": {"b": "old"}}'
+
+
+def test_patch_non_ascii(tmp_path):
+    json_path = tmp_path / "file.json"
+    json_path.write_text('{"naïve": {"b": "öld", "c": "日本"}, "d": "🙂"}', encoding="utf-8")
+
+    patch_json_file(json_path, {("naïve", "b"): "new ünicode", ("d",): "x"})
+
+    assert json.loads(json_path.read_text(encoding="utf-8")) == {
+        "naïve": {"b": "new ünicode", "c": "日本"},
+        "d": "x",
+    }
+
+
+def test_patch_escaped_non_ascii_keys(tmp_path):
+    # dbt writes its artifacts with `ensure_ascii`, so non-ASCII keys are escaped.
+    manifest = {"nodes": {"model.shop.café": {"description": "öld"}, "model.shop.日本": {}}}
+    json_path = tmp_path / "manifest.json"
+    json_path.write_text(json.dumps(manifest, ensure_ascii=True))
+    assert "caf\\u00e9" in json_path.read_text()
+
+    patch_json_file(json_path, {("nodes", "model.shop.café", "description"): "nëw"})
+
+    manifest["nodes"]["model.shop.café"]["description"] = "nëw"
+    assert json.loads(json_path.read_text(encoding="utf-8")) == manifest
@@ -0,0 +1,52 @@
+from pathlib import Path
+import shutil
+
+import pytest
+
+from dbt_diagrams.batch import build_projects_erds, project_name
+
+JAFFLE_SHOP = Path(__file__).parent / "fixtures" / "jaffle_shop"
+
+
+def _project(root: Path, name: str) -> Path:
+    target_dir = root / name / "target"
+    target_dir.mkdir(parents=True)
+    for artifact in ["manifest.json", "catalog.json"]:
+        shutil.copy(JAFFLE_SHOP / artifact, target_dir / artifact)
+    return target_dir
+
+
+def test_project_name(tmp_path):
+    assert project_name(tmp_path / "shop" / "target") == "shop"
+    assert project_name(tmp_path / "shop" / "custom_target") == "custom_target"
+
+
+def test_build_projects_erds(tmp_path):
+    broken_target_dir = tmp_path / "broken" / "target"
+    broken_target_dir.mkdir(parents=True)
+
+    projects = build_projects_erds(
+        [_project(tmp_path, "shop_a"), broken_target_dir, _project(tmp_path, "shop_b")],
+        tmp_path / "out",
+        "mmd",
+        max_workers=2,
+    )
+
+    assert [p.name for p in projects] == ["shop_a", "broken", "shop_b"]
+    assert [p.output_dir for p in projects] == [
+        tmp_path / "out" / "shop_a",
+        tmp_path / "out" / "broken",
+        tmp_path / "out" / "shop_b",
+    ]
+    assert list(projects[0].diagrams) == list(projects[2].diagrams) == ["customer_erd"]
+    assert projects[0].error is None
+    assert "manifest.json doesn't exists" in projects[1].error  # type: ignore [operator]
+
+
+def test_build_projects_erds_with_duplicate_names(tmp_path):
+    with pytest.raises(ValueError, match="belong to a project named shop"):
+        build_projects_erds(
+            [_project(tmp_path, "shop"), _project(tmp_path / "other", "shop")],
+            tmp_path / "out",
+            "mmd",
+        )
@@ -0,0 +1,57 @@
+from pathlib import Path
+
+from click.testing import CliRunner
+
+from dbt_diagrams import cli as cli_module
+from dbt_diagrams.cli import cli
+from dbt_diagrams.watch import ArtifactWatcher
+
+JAFFLE_SHOP = Path(__file__).parent / "fixtures" / "jaffle_shop"
+
+
+def test_render_erds_incremental_with_parts(tmp_path):
+    args = [
+        "render-erds",
+        "--dbt-target-dir",
+        str(JAFFLE_SHOP),
+        "--output-dir",
+        str(tmp_path),
+        "--incremental",
+        "--max-entities",
+        "1",
+    ]
+
+    first = CliRunner().invoke(cli, args)
+    assert first.exit_code == 0, first.output
+    # Counts are per diagram, also when it is split into parts.
+    assert "1 changed, 0 unchanged and 0 removed diagrams." in first.output
+    assert sorted(p.name for p in tmp_path.glob("*.mmd")) == [
+        "customer_erd__part1.mmd",
+        "customer_erd__part2.mmd",
+    ]
+
+    second = CliRunner().invoke(cli, args)
+    assert second.exit_code == 0, second.output
+    assert "0 changed, 1 unchanged and 0 removed diagrams." in second.output
+
+
+def test_render_erds_watch_survives_write_errors(tmp_path, monkeypatch):
+    manifest_path = JAFFLE_SHOP / "manifest.json"
+
+    async def changes(self):
+        yield {manifest_path}
+
+    async def write_projects(*args, **kwargs):
+        raise RuntimeError("Parse error on line 2.")
+
+    monkeypatch.setattr(ArtifactWatcher, "changes", changes)
+    monkeypatch.setattr(cli_module, "_write_projects", write_projects)
+
+    result = CliRunner().invoke(
+        cli,
+        ["render-erds", "--manifest", str(manifest_path), "--output-dir", str(tmp_path), "--watch"],
+    )
+
+    assert result.exit_code == 0, result.output
+    # Both the initial render and the one after the change failed, without stopping.
+    assert result.output.count("Could not write ERDs: Parse error on line 2.") == 2
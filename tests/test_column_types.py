@@ -0,0 +1,43 @@
+import time
+
+import pytest
+
+from dbt_diagrams.column_types import normalize_column_type
+
+
+@pytest.mark.parametrize(
+    "adapter, column_type, expected",
+    [
+        (None, "INT64", "INT64"),
+        (None, "STRUCT<bar INT64>", "STRUCT[]"),
+        (None, "ARRAY<STRUCT<bar INT64>>", "ARRAY[STRUCT[]]"),
+        (None, "decimal(10, 2)", "decimal"),
+        ("bigquery", "ARRAY<STRUCT<a STRUCT<b INT64>, c ARRAY<STRING>>>", "ARRAY[STRUCT[]]"),
+        ("bigquery", "ARRAY<INT64>", "ARRAY[INT64]"),
+        ("bigquery", "NUMERIC(10, 2)", "NUMERIC"),
+        ("bigquery", "STRING(10)", "STRING(10)"),
+        ("snowflake", "NUMBER(38,0)", "NUMBER"),
+        ("snowflake", "OBJECT(city VARCHAR, zip NUMBER)", "OBJECT[]"),
+        ("snowflake", "VARCHAR(16777216)", "VARCHAR(16777216)"),
+        ("postgres", "character varying(255)", "varchar(255)"),
+        ("postgres", "timestamp with time zone", "timestamptz"),
+        ("postgres", "integer[]", "integer[]"),
+        ("duckdb", "STRUCT(a INTEGER, b MAP(VARCHAR, INTEGER))[]", "STRUCT[][]"),
+        ("duckdb", "TIMESTAMP WITH TIME ZONE", "TIMESTAMPTZ"),
+        ("duckdb", "DECIMAL(18,3)", "decimal"),
+        ("some_adapter", "some multi word type", "some_multi_word_type"),
+    ],
+)
+def test_normalize_column_type(adapter, column_type, expected):
+    assert normalize_column_type(column_type, adapter) == expected
+
+
+def test_deeply_nested_types_take_linear_time():
+    depth = 20_000
+    column_type = "ARRAY<STRUCT<a INT64, b " * depth + "STRING" + ">>" * depth
+
+    start = time.perf_counter()
+    normalized = normalize_column_type(column_type, "bigquery")
+
+    assert normalized == "ARRAY[STRUCT[]]"
+    assert time.perf_counter() - start < 1
@@ -0,0 +1,77 @@
+import copy
+from pathlib import Path
+import re
+
+import pytest
+
+from dbt_diagrams.input_validators import DbtArtifacts
+from dbt_diagrams.mermaid import (
+    insert_rendered_erds_in_doc_block,
+    to_mermaid_erds_from_artifacts,
+    update_docs_with_rendered_mermaid_erds,
+)
+
+JAFFLE_SHOP = Path(__file__).parent / "fixtures" / "jaffle_shop"
+RENDERED_ERDS = {"customer_erd": "erDiagram\n\tcustomers ||--|{ orders : creates", "b": "B"}
+
+
+def _split_based_insert(doc_block, rendered_erds):
+    """The original split and join based implementation, used as reference."""
+    erd_diagram_regex = re.compile(r"\[.*[,erd|erd]=[\"|']([^\"']*)[\"|'].*\]")
+    if len(splitted := doc_block.split("```mermaid[")) > 1:
+        return "".join(
+            x
+            if (erd_name := erd_diagram_regex.match(f"[{x}")) is None
+            else f"```mermaid\n{rendered_erds.get(erd_name.group(1), '')}\n```"
+            for x in splitted
+        )
+    return doc_block
+
+
+@pytest.mark.parametrize(
+    "doc_block",
+    [
+        "",
+        "No diagrams here",
+        "```mermaid\ngraph TD;\n  A-->B;\n```",
+        "Intro\n\n```mermaid[erd='customer_erd']```\n\nOutro",
+        '```mermaid[erd="customer_erd"]```',
+        "```mermaid[erd='b']``` and ```mermaid[erd='customer_erd']```\n```mermaid[erd='b']```",
+        "```mermaid[theme='dark', erd='b']``` `code` ``` ``fenced``",
+        "```mermaid[erd='unknown']```",
+        "```mermaid[no reference]``` ```mermaid[",
+        "erd='b'] before the first marker ```mermaid[erd='b']```",
+        "```mermaid[erd='b'\n]``` broken over lines",
+    ],
+)
+def test_insert_matches_split_based_implementation(doc_block):
+    assert insert_rendered_erds_in_doc_block(doc_block, RENDERED_ERDS) == _split_based_insert(
+        doc_block, RENDERED_ERDS
+    )
+
+
+def test_update_docs_matches_split_based_implementation_on_jaffle_shop():
+    artifacts = DbtArtifacts.from_target_dir(JAFFLE_SHOP)
+    rendered_erds = to_mermaid_erds_from_artifacts(artifacts.manifest, artifacts.catalog)
+    expected = copy.deepcopy(artifacts.manifest)
+    for node in expected["nodes"].values():
+        node["description"] = _split_based_insert(node["description"], rendered_erds)
+    for doc in expected["docs"].values():
+        doc["block_contents"] = _split_based_insert(doc["block_contents"], rendered_erds)
+
+    changed = update_docs_with_rendered_mermaid_erds(artifacts.manifest, rendered_erds)
+
+    assert artifacts.manifest == expected
+    assert sorted(changed) == [
+        ("docs", "doc.jaffle_shop.__overview__", "block_contents"),
+        ("nodes", "model.jaffle_shop.customers", "description"),
+        ("nodes", "model.jaffle_shop.orders", "description"),
+    ]
+
+
+def test_insert_all_parts_of_split_erds():
+    rendered_erds = {"erd__part1": "A", "erd__part2": "B", "other": "C"}
+
+    assert insert_rendered_erds_in_doc_block("```mermaid[erd='erd']```", rendered_erds) == (
+        "```mermaid\nA\n```\n\n```mermaid\nB\n```"
+    )
@@ -1,4 +1,6 @@
-from dbt_diagrams.domain import Column
+import pytest
+
+from dbt_diagrams.domain import Column, Table
 
 
 def test_column_type_mermaid_output():
@@ -17,3 +19,17 @@ def test_column_name_mermaid_output():
 
     assert col.as_mermaid_name() == "foo"
     assert nested_col.as_mermaid_name() == "foo[nested[bar]]"
+
+
+def test_table_strict_validation():
+    manifest_node = {
+        "name": "foo",
+        "alias": "foo",
+        "database": "db",
+        "schema": None,
+        "columns": {"bar": {"name": "bar", "data_type": "INT64"}},
+    }
+
+    assert Table.from_manifest_catalog_nodes(manifest_node).columns == [Column("bar", "INT64")]
+    with pytest.raises(ValueError, match="target_schema"):
+        Table.from_manifest_catalog_nodes(manifest_node, strict=True)
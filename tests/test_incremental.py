@@ -0,0 +1,73 @@
+from pathlib import Path
+
+from dbt_diagrams.incremental import IncrementalRenderState
+from dbt_diagrams.input_validators import DbtArtifacts
+from dbt_diagrams.mermaid import diagram_fingerprints, mermaid_erds_from_manifest_and_catalog
+
+JAFFLE_SHOP = Path(__file__).parent / "fixtures" / "jaffle_shop"
+
+
+def test_fingerprints_only_change_with_contributing_nodes():
+    artifacts = DbtArtifacts.from_target_dir(JAFFLE_SHOP)
+    fingerprints = diagram_fingerprints(artifacts.manifest, artifacts.catalog)
+
+    artifacts.manifest["nodes"]["model.jaffle_shop.stg_orders"]["alias"] = "other"
+    artifacts.manifest["nodes"]["model.jaffle_shop.orders"]["description"] = "other"
+    assert diagram_fingerprints(artifacts.manifest, artifacts.catalog) == fingerprints
+
+    artifacts.catalog["nodes"]["model.jaffle_shop.orders"]["columns"]["amount"]["type"] = "INT"  # type: ignore [index]
+    assert diagram_fingerprints(artifacts.manifest, artifacts.catalog) != fingerprints
+
+
+def test_erds_for_selected_diagrams_only():
+    artifacts = DbtArtifacts.from_target_dir(JAFFLE_SHOP)
+
+    assert (
+        mermaid_erds_from_manifest_and_catalog(artifacts.manifest, artifacts.catalog, diagrams=[])
+        == {}
+    )
+    assert list(
+        mermaid_erds_from_manifest_and_catalog(
+            artifacts.manifest, artifacts.catalog, diagrams=["customer_erd"]
+        ).keys()
+    ) == ["customer_erd"]
+
+
+def test_incremental_state_plan(tmp_path):
+    state = IncrementalRenderState.load(tmp_path)
+    assert state.plan("svg", {"a": "1", "b": "2"}) == (["a", "b"], [])
+
+    for diagram_name in ["a", "b"]:
+        (tmp_path / f"{diagram_name}.svg").write_text("<svg></svg>")
+    state.update("svg", {"a": "1", "b": "2"})
+    state.save()
+
+    state = IncrementalRenderState.load(tmp_path)
+    assert state.plan("svg", {"a": "1", "b": "2"}) == ([], [])
+    assert state.plan("svg", {"a": "changed", "c": "3"}) == (["a", "c"], ["b"])
+    assert state.plan("md", {"a": "1"}) == (["a"], [])
+
+    (tmp_path / "a.svg").unlink()
+    assert state.plan("svg", {"a": "1", "b": "2"}) == (["a"], [])
+
+    state.remove("svg", ["b"])
+    assert not (tmp_path / "b.svg").exists()
+
+
+def test_incremental_state_with_parts(tmp_path):
+    state = IncrementalRenderState.load(tmp_path)
+    for diagram_name in ["a__part1", "a__part2", "a__part3", "ab__part1"]:
+        (tmp_path / f"{diagram_name}.svg").write_text("<svg></svg>")
+    state.update("svg", {"a": "1", "ab": "2"})
+
+    assert state.plan("svg", {"a": "1", "ab": "2"}) == ([], [])
+
+    state.remove_stale_parts("svg", ["a"], {"a__part1", "a__part2"})
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        "a__part1.svg",
+        "a__part2.svg",
+        "ab__part1.svg",
+    ]
+
+    state.remove("svg", ["a"])
+    assert [p.name for p in tmp_path.iterdir()] == ["ab__part1.svg"]
@@ -0,0 +1,99 @@
+import io
+import json
+from pathlib import Path
+
+import pytest
+
+from dbt_diagrams import json_backend
+from dbt_diagrams.artifact_schemas import CatalogColumn, ManifestColumn
+from dbt_diagrams.input_validators import (
+    ARTIFACT_SUBSETS,
+    DbtArtifactType,
+    verify_and_read,
+    verify_and_read_subset,
+    verify_and_read_subset_f,
+)
+
+JAFFLE_SHOP = Path(__file__).parent / "fixtures" / "jaffle_shop"
+
+
+@pytest.fixture(params=list(json_backend.available_backends().keys()))
+def backend(request):
+    previous_backend = json_backend.current_backend()
+    yield json_backend.set_backend(request.param)
+    json_backend.set_backend(previous_backend.name)
+
+
+@pytest.mark.parametrize(
+    "file_name,artifact_type",
+    [("manifest.json", DbtArtifactType.MANIFEST), ("catalog.json", DbtArtifactType.CATALOG)],
+)
+def test_subset_read_matches_full_read(backend, file_name, artifact_type):
+    full = verify_and_read(JAFFLE_SHOP / file_name, artifact_type)
+    subset = verify_and_read_subset(JAFFLE_SHOP / file_name, artifact_type)
+
+    if backend.loads_typed is not None:
+        # Typed decoding drops unused column fields as well.
+        column_fields = {
+            DbtArtifactType.MANIFEST: ManifestColumn.__annotations__,
+            DbtArtifactType.CATALOG: CatalogColumn.__annotations__,
+        }[artifact_type]
+        for node in full["nodes"].values():
+            for column_id, column in node.get("columns", {}).items():
+                node["columns"][column_id] = {f: column[f] for f in column_fields if f in column}
+
+    assert subset["metadata"] == full["metadata"]
+    assert set(subset.keys()) == {"metadata"} | set(ARTIFACT_SUBSETS[artifact_type].keys())
+    for section, fields in ARTIFACT_SUBSETS[artifact_type].items():
+        assert subset[section] == {
+            entry_id: {f: entry[f] for f in fields if f in entry}
+            for entry_id, entry in full[section].items()
+        }
+
+
+def test_typed_read_checks_schema():
+    if "msgspec" not in json_backend.available_backends():
+        pytest.skip("Typed decoding requires msgspec.")
+
+    manifest = json.loads((JAFFLE_SHOP / "manifest.json").read_text())
+    manifest["nodes"]["model.jaffle_shop.orders"]["columns"]["order_id"]["data_type"] = 1
+    previous_backend = json_backend.current_backend()
+    json_backend.set_backend("msgspec")
+    try:
+        with pytest.raises(ValueError, match="doesn't match the supported schema"):
+            verify_and_read_subset_f(
+                io.BytesIO(json.dumps(manifest).encode()), DbtArtifactType.MANIFEST
+            )
+    finally:
+        json_backend.set_backend(previous_backend.name)
+
+
+def test_subset_read_checks_version_before_reading_nodes(backend):
+    # The nodes section is invalid JSON, which the stdlib reader never reaches because
+    # the version check on the preceding metadata section fails first.
+    if backend.name != json_backend.STDLIB_BACKEND:
+        pytest.skip("Fast backends decode the whole file at once.")
+
+    doc = (
+        '{"metadata": {"dbt_schema_version": "https://schemas.getdbt.com/dbt/manifest/v3.json"},'
+        ' "nodes": {not json}}'
+    )
+    with pytest.raises(ValueError, match="Got version 3 but expected a version between 4 and 12"):
+        verify_and_read_subset_f(io.StringIO(doc), DbtArtifactType.MANIFEST)
+
+
+def test_subset_read_rejects_invalid_json(backend):
+    with pytest.raises(ValueError, match="Provided manifest file is not valid JSON"):
+        verify_and_read_subset_f(io.BytesIO(b'{"metadata": {'), DbtArtifactType.MANIFEST)
+
+
+def test_subset_read_rejects_wrong_artifact_type(backend):
+    with pytest.raises(ValueError, match="unsupported version for catalog"):
+        verify_and_read_subset(JAFFLE_SHOP / "manifest.json", DbtArtifactType.CATALOG)
+
+
+def test_subset_read_without_metadata(backend):
+    with pytest.raises(ValueError, match="Could not extract version number"):
+        verify_and_read_subset_f(
+            io.BytesIO(json.dumps({"nodes": {}}).encode()), DbtArtifactType.MANIFEST
+        )
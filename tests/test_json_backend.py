@@ -0,0 +1,21 @@
+import pytest
+
+from dbt_diagrams import json_backend
+
+
+@pytest.mark.parametrize("name", list(json_backend.available_backends().keys()))
+def test_backends_round_trip(name):
+    backend = json_backend.get_backend(name)
+    obj = {"description": 'Some "quoted" ünicode\n', "columns": {}, "meta": [1, 2.5, None, True]}
+
+    assert backend.loads(backend.dumps(obj)) == obj
+    assert backend.loads(backend.dumps(obj).decode()) == obj
+
+
+def test_stdlib_backend_is_always_available():
+    assert json_backend.STDLIB_BACKEND in json_backend.available_backends()
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError, match="Unknown JSON backend simdjson"):
+        json_backend.get_backend("simdjson")
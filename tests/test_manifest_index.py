@@ -0,0 +1,69 @@
+import pytest
+
+from dbt_diagrams.manifest_index import ManifestIndex
+
+
+def _node(package, name, resource_type="model", alias=None, meta=None):
+    return {
+        "unique_id": f"{resource_type}.{package}.{name}",
+        "name": name,
+        "alias": alias or name,
+        "package_name": package,
+        "resource_type": resource_type,
+        "database": "db",
+        "schema": package,
+        "columns": {},
+        "meta": meta or {},
+    }
+
+
+@pytest.fixture
+def index():
+    nodes = [
+        _node("shop", "stg_orders", meta={"erd": {"connections": []}}),
+        _node("shop", "orders", alias="fct_orders"),
+        _node("billing", "stg_orders"),
+        _node("billing", "invoices"),
+        _node("marketing", "stg_orders"),
+        _node("shop", "raw_orders", resource_type="seed"),
+        _node("shop", "orders_snapshot", resource_type="snapshot"),
+        _node("shop", "not_null_orders_id", resource_type="test"),
+    ]
+    return ManifestIndex(
+        {"nodes": {n["unique_id"]: n for n in nodes}},
+        {"nodes": {"model.shop.orders": {"columns": {}}}},
+    )
+
+
+def test_index_contains_nodes_that_can_be_referred_to(index):
+    assert index.resolve("raw_orders") == "seed.shop.raw_orders"
+    assert index.resolve("shop.orders_snapshot") == "snapshot.shop.orders_snapshot"
+    assert "test.shop.not_null_orders_id" not in index.nodes
+    assert index.resolve("not_null_orders_id") is None
+    assert index.erd_node_ids == ["model.shop.stg_orders"]
+
+
+def test_resolve(index):
+    assert index.resolve("model.billing.stg_orders") == "model.billing.stg_orders"
+    assert index.resolve("billing.stg_orders") == "model.billing.stg_orders"
+    assert index.resolve("invoices") == "model.billing.invoices"
+    assert index.resolve("fct_orders") == "model.shop.orders"
+    assert index.resolve("unknown") is None
+
+
+def test_resolve_prefers_own_package(index):
+    assert index.resolve("stg_orders", "shop") == "model.shop.stg_orders"
+    assert index.resolve("stg_orders", "billing") == "model.billing.stg_orders"
+
+
+def test_resolve_ambiguous_name(index):
+    with pytest.raises(ValueError, match="Reference stg_orders is ambiguous"):
+        index.resolve("stg_orders", "finance")
+
+
+def test_tables_are_built_once(index):
+    table = index.table("model.shop.orders")
+
+    assert table.rendered_name == "fct_orders"
+    assert index.table("model.shop.orders") is table
+    assert index.catalog_node("model.shop.orders") == {"columns": {}}
@@ -0,0 +1,188 @@
+import json
+from pathlib import Path
+import shutil
+
+import pytest
+
+from dbt_diagrams.input_validators import DbtArtifacts
+from dbt_diagrams.mermaid import (
+    MERMAID_SNIPPET_PATH,
+    add_mermaid_lib_to_html,
+    strip_generation_timestamp,
+    to_mermaid_erds_from_artifacts,
+    to_mermaid_erds_from_dbt_target_dir,
+    write_static_index_html,
+)
+
+JAFFLE_SHOP = Path(__file__).parent / "fixtures" / "jaffle_shop"
+
+
+def _without_generation_timestamp(diagrams):
+    return {k: strip_generation_timestamp(v) for k, v in diagrams.items()}
+
+
+def test_erds_from_preloaded_artifacts_match_erds_from_disk():
+    artifacts = DbtArtifacts.from_target_dir(JAFFLE_SHOP)
+
+    from_artifacts = to_mermaid_erds_from_artifacts(artifacts.manifest, artifacts.catalog)
+    from_disk = to_mermaid_erds_from_dbt_target_dir(JAFFLE_SHOP)
+
+    assert list(from_artifacts.keys()) == ["customer_erd"]
+    assert _without_generation_timestamp(from_artifacts) == _without_generation_timestamp(from_disk)
+
+
+def test_erds_from_artifacts_with_different_invocation_ids():
+    artifacts = DbtArtifacts.from_target_dir(JAFFLE_SHOP)
+    artifacts.catalog["metadata"]["invocation_id"] = "other"  # type: ignore [index]
+
+    with pytest.raises(Exception, match="different invocation id's"):
+        to_mermaid_erds_from_artifacts(artifacts.manifest, artifacts.catalog)
+
+
+def test_write_static_index_html(tmp_path):
+    (tmp_path / "index.html").write_text(
+        '<script>var m = "MANIFEST.JSON INLINE DATA"; var c = "CATALOG.JSON INLINE DATA";</script>'
+    )
+    for artifact in ["manifest.json", "catalog.json"]:
+        shutil.copy(JAFFLE_SHOP / artifact, tmp_path / artifact)
+
+    write_static_index_html(tmp_path)
+
+    static_html = (tmp_path / "static_index.html").read_text()
+    manifest = (JAFFLE_SHOP / "manifest.json").read_text()
+    catalog = (JAFFLE_SHOP / "catalog.json").read_text()
+    assert static_html == f"<script>var m = {manifest}; var c = {catalog};</script>"
+    manifest_start = len("<script>var m = ")
+    assert json.loads(static_html[manifest_start : manifest_start + len(manifest)]) == (
+        json.loads(manifest)
+    )
+
+
+def test_write_static_index_html_without_catalog(tmp_path):
+    (tmp_path / "index.html").write_text('"MANIFEST.JSON INLINE DATA"')
+    shutil.copy(JAFFLE_SHOP / "manifest.json", tmp_path / "manifest.json")
+
+    with pytest.raises(ValueError, match="catalog.json is required for a static docs page"):
+        write_static_index_html(tmp_path)
+
+
+def test_add_mermaid_lib_to_html(tmp_path):
+    index_html = "<html><body><p>docs</p></body></html>\n<!-- </body> -->"
+    (tmp_path / "index.html").write_text(index_html)
+
+    add_mermaid_lib_to_html(tmp_path)
+    injected_html = (tmp_path / "index.html").read_text()
+    add_mermaid_lib_to_html(tmp_path)
+
+    assert (tmp_path / "index.html").read_text() == injected_html
+    assert injected_html.startswith("<html><body><p>docs</p></body></html>\n<!-- ")
+    assert injected_html.endswith(f"{MERMAID_SNIPPET_PATH.read_text()}</body> -->")
+    assert injected_html.count("mermaid.initialize") == 1
+    assert list(tmp_path.iterdir()) == [tmp_path / "index.html"]
+
+
+def test_add_mermaid_lib_to_html_without_body(tmp_path):
+    (tmp_path / "index.html").write_text("<html></html>")
+
+    add_mermaid_lib_to_html(tmp_path)
+
+    assert (tmp_path / "index.html").read_text() == "<html></html>"
+
+
+def _jaffle_shop_manifest_with_connections(*connections):
+    artifacts = DbtArtifacts.from_target_dir(JAFFLE_SHOP)
+    artifacts.manifest["nodes"]["model.jaffle_shop.stg_orders"]["meta"]["erd"] = {
+        "connections": list(connections)
+    }
+    return artifacts
+
+
+def test_erds_only_build_tables_for_connected_models():
+    artifacts = _jaffle_shop_manifest_with_connections()
+    # A broken node that is not part of any ERD should not be touched.
+    del artifacts.manifest["nodes"]["seed.jaffle_shop.raw_orders"]["alias"]
+
+    erds = to_mermaid_erds_from_artifacts(artifacts.manifest, artifacts.catalog)
+
+    assert "stg_orders" not in erds["customer_erd"]
+    assert "raw_orders" not in erds["customer_erd"]
+
+
+def test_erds_with_seed_target():
+    artifacts = _jaffle_shop_manifest_with_connections(
+        {
+            "diagram": "customer_erd",
+            "target": "raw_orders",
+            "source_cardinality": "one",
+            "target_cardinality": "one",
+        }
+    )
+
+    erds = to_mermaid_erds_from_artifacts(artifacts.manifest, artifacts.catalog)
+
+    assert "stg_orders ||--|| raw_orders" in erds["customer_erd"]
+    assert "\traw_orders {\n" in erds["customer_erd"]
+
+
+def test_erds_with_missing_target():
+    artifacts = _jaffle_shop_manifest_with_connections(
+        {"target": "unknown", "source_cardinality": "one", "target_cardinality": "one"}
+    )
+
+    with pytest.raises(
+        ValueError,
+        match="Target unknown in relation originating from table stg_orders does not exist",
+    ):
+        to_mermaid_erds_from_artifacts(artifacts.manifest, artifacts.catalog)
+
+
+def test_erds_group_all_relations_of_a_diagram():
+    artifacts = _jaffle_shop_manifest_with_connections(
+        {"target": "stg_customers", "source_cardinality": "one", "target_cardinality": "one"},
+        {
+            "diagram": "customer_erd",
+            "target": "orders",
+            "source_cardinality": "one",
+            "target_cardinality": "one",
+        },
+    )
+
+    erds = to_mermaid_erds_from_artifacts(artifacts.manifest, artifacts.catalog)
+
+    assert set(erds.keys()) == {"customer_erd", "default"}
+    assert "customers ||--|{ orders" in erds["customer_erd"]
+    assert "stg_orders ||--|| orders" in erds["customer_erd"]
+    assert "stg_orders ||--|| stg_customers" in erds["default"]
+
+
+def test_erds_split_into_parts():
+    artifacts = _jaffle_shop_manifest_with_connections(
+        {
+            "diagram": "customer_erd",
+            "target": "stg_customers",
+            "source_cardinality": "one",
+            "target_cardinality": "one",
+        },
+        {
+            "diagram": "customer_erd",
+            "target": "orders",
+            "source_cardinality": "one",
+            "target_cardinality": "one",
+        },
+    )
+
+    erds = to_mermaid_erds_from_artifacts(artifacts.manifest, artifacts.catalog, max_entities=2)
+
+    assert list(erds.keys()) == ["customer_erd__part1", "customer_erd__part2"]
+    assert "customers ||--|{ orders" in erds["customer_erd__part1"]
+    assert "stg_orders ||--|| stg_customers" in erds["customer_erd__part2"]
+    # The relation between both parts is in both, with the other table as stub.
+    for part, stub in [("customer_erd__part1", "stg_orders"), ("customer_erd__part2", "orders")]:
+        assert "stg_orders ||--|| orders" in erds[part]
+        assert f"{stub} is part of" in erds[part]
+        assert f"\t{stub}\n" in erds[part]
+    assert "\tstg_customers {\n" in erds["customer_erd__part2"]
+
+    assert list(
+        to_mermaid_erds_from_artifacts(artifacts.manifest, artifacts.catalog, max_entities=4)
+    ) == ["customer_erd"]
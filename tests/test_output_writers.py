@@ -0,0 +1,121 @@
+import asyncio
+
+import pytest
+
+from dbt_diagrams import output_writers
+from dbt_diagrams.output_writers import PagePool
+
+
+class FakePage:
+    def __init__(self):
+        self.closed = False
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeBrowser:
+    def __init__(self):
+        self.pages = []
+
+    async def new_page(self, **kwargs):
+        self.pages.append(FakePage())
+        return self.pages[-1]
+
+
+def test_page_pool_is_bounded_and_reuses_pages():
+    browser = FakeBrowser()
+    pool = PagePool(browser, size=2)
+    in_use = []
+    max_in_use = 0
+
+    async def render():
+        nonlocal max_in_use
+        async with pool.page() as page:
+            in_use.append(page)
+            max_in_use = max(max_in_use, len(in_use))
+            await asyncio.sleep(0.01)
+            in_use.remove(page)
+
+    async def run():
+        await asyncio.gather(*(render() for _ in range(10)))
+        await pool.close()
+
+    asyncio.run(run())
+
+    assert max_in_use == 2
+    assert len(browser.pages) == 2
+    assert all(p.closed for p in browser.pages)
+
+
+def test_page_pool_sets_up_new_pages_once():
+    browser = FakeBrowser()
+    set_up_pages = []
+
+    async def setup(page):
+        set_up_pages.append(page)
+
+    async def run():
+        pool = PagePool(browser, size=1, setup=setup)
+        for _ in range(3):
+            async with pool.page():
+                pass
+
+    asyncio.run(run())
+
+    assert set_up_pages == browser.pages
+    assert len(set_up_pages) == 1
+
+
+def test_mermaid_script_tag_prefers_bundled_runtime(tmp_path, monkeypatch):
+    bundle = tmp_path / "mermaid.min.js"
+    bundle.write_text("window.mermaid = {};")
+    monkeypatch.setattr(output_writers, "MERMAID_BUNDLE_PATH", bundle)
+    output_writers._mermaid_script_tag.cache_clear()
+
+    assert output_writers._mermaid_script_tag() == {"content": "window.mermaid = {};"}
+
+    bundle.unlink()
+    output_writers._mermaid_script_tag.cache_clear()
+    monkeypatch.delenv(output_writers.MERMAID_CDN_ENV_VAR, raising=False)
+
+    with pytest.raises(FileNotFoundError, match="make vendor-mermaid"):
+        output_writers._mermaid_script_tag()
+
+    monkeypatch.setenv(output_writers.MERMAID_CDN_ENV_VAR, "1")
+
+    assert output_writers._mermaid_script_tag() == {"url": output_writers.MERMAID_CDN_URL}
+    output_writers._mermaid_script_tag.cache_clear()
+
+
+def test_write_many_as_svg_shares_one_browser(tmp_path, monkeypatch):
+    browser = FakeBrowser()
+
+    async def load_mermaid(page):
+        pass
+
+    async def render_svg(page, diagram_id, diagram):
+        await asyncio.sleep(0.01)
+        return f"<svg>{diagram}</svg>"
+
+    monkeypatch.setattr(output_writers, "_load_mermaid", load_mermaid)
+    monkeypatch.setattr(output_writers, "_render_svg", render_svg)
+    (tmp_path / "a").mkdir()
+    (tmp_path / "b").mkdir()
+
+    render_times = asyncio.run(
+        output_writers.write_many_as_svg(
+            {tmp_path / "a": {"erd": "a"}, tmp_path / "b": {"erd": "b", "other": "c"}},
+            provided_browser=browser,
+            concurrency=2,
+        )
+    )
+
+    assert {out: set(times) for out, times in render_times.items()} == {
+        tmp_path / "a": {"erd"},
+        tmp_path / "b": {"erd", "other"},
+    }
+    assert (tmp_path / "a" / "erd.svg").read_text() == "<svg>a</svg>"
+    assert (tmp_path / "b" / "erd.svg").read_text() == "<svg>b</svg>"
+    assert (tmp_path / "b" / "other.svg").read_text() == "<svg>c</svg>"
+    assert len(browser.pages) == 2
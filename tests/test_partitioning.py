@@ -0,0 +1,83 @@
+from types import SimpleNamespace
+
+from dbt_diagrams.partitioning import is_part_of, part_names, partition_relations
+
+
+def _relation(source, target):
+    return SimpleNamespace(
+        source=SimpleNamespace(model_name=source), target=SimpleNamespace(model_name=target)
+    )
+
+
+def test_small_diagrams_are_not_split():
+    relations = [_relation("a", "b"), _relation("b", "c")]
+
+    partitions = partition_relations(relations, max_entities=3)
+
+    assert len(partitions) == 1
+    assert partitions[0].entities == ["a", "b", "c"]
+    assert partitions[0].relations == relations
+    assert partitions[0].stubs == {}
+
+
+def test_partitions_keep_related_entities_together():
+    chain = [_relation(f"c{i}", f"c{i + 1}") for i in range(9)]
+    relations = [*chain, _relation("x", "y"), _relation("p", "q")]
+
+    partitions = partition_relations(relations, max_entities=4)
+
+    assert [p.entities for p in partitions] == [
+        ["c0", "c1", "c2", "c3"],
+        ["c4", "c5", "c6", "c7"],
+        ["c8", "c9"],
+        # Unrelated groups only share a part when they fit in it together.
+        ["x", "y", "p", "q"],
+    ]
+    # Relations between parts are kept in both, with the other entity as stub.
+    assert partitions[0].stubs == {"c4": 2}
+    assert partitions[1].stubs == {"c3": 1, "c8": 3}
+    assert chain[3] in partitions[0].relations and chain[3] in partitions[1].relations
+    assert sum(len(p.relations) for p in partitions) == len(relations) + 2
+
+
+def test_partitions_do_not_split_groups_that_fit():
+    relations = [
+        *[_relation("a", f"a{i}") for i in range(3)],
+        *[_relation("b", f"b{i}") for i in range(3)],
+        _relation("x", "y"),
+    ]
+
+    partitions = partition_relations(relations, max_entities=6)
+
+    assert [p.entities for p in partitions] == [
+        ["a", "a0", "a1", "a2", "x", "y"],
+        ["b", "b0", "b1", "b2"],
+    ]
+    assert all(p.stubs == {} for p in partitions)
+
+
+def test_partitions_of_large_diagrams():
+    # A star around a hub, with every spoke connected to a leaf.
+    relations = [_relation("hub", f"s{i}") for i in range(100)]
+    relations += [_relation(f"s{i}", f"l{i}") for i in range(100)]
+
+    partitions = partition_relations(relations, max_entities=25)
+
+    entities = [e for p in partitions for e in p.entities]
+    assert len(entities) == len(set(entities)) == 201
+    assert all(len(p.entities) <= 25 for p in partitions)
+    for partition in partitions:
+        mentioned = {
+            name for r in partition.relations for name in [r.source.model_name, r.target.model_name]
+        }
+        assert mentioned == set(partition.entities) | set(partition.stubs)
+
+
+def test_part_names():
+    diagrams = {"erd__part1": "", "erd__part2": "", "erd__part4": "", "erd__partial": ""}
+
+    assert list(part_names("erd", diagrams)) == ["erd__part1", "erd__part2"]
+    assert list(part_names("other", diagrams)) == []
+    assert is_part_of("erd__part12", "erd")
+    assert not is_part_of("erd__partial", "erd")
+    assert not is_part_of("other__part1", "erd")
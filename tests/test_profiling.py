@@ -0,0 +1,49 @@
+from pathlib import Path
+import pstats
+
+from dbt_diagrams.mermaid import to_mermaid_erds_from_dbt_target_dir
+from dbt_diagrams.profiling import Profiler, add_span_hook, remove_span_hook, span
+
+JAFFLE_SHOP = Path(__file__).parent / "fixtures" / "jaffle_shop"
+
+
+def test_span_hooks_receive_pipeline_stages():
+    spans = []
+    add_span_hook(spans.append)
+    try:
+        to_mermaid_erds_from_dbt_target_dir(JAFFLE_SHOP)
+    finally:
+        remove_span_hook(spans.append)
+
+    assert [s.name for s in spans] == [
+        "read_manifest",
+        "read_catalog",
+        "verify_versions",
+        "build_relations",
+        "generate_mermaid",
+    ]
+    assert all(s.duration > 0 and s.depth == 0 for s in spans)
+
+
+def test_profiler_adds_up_nested_stages(tmp_path):
+    cprofile_path = tmp_path / "slowest.prof"
+    with Profiler(cprofile_path=cprofile_path) as profiler:
+        with span("outer"):
+            for _ in range(2):
+                with span("inner"):
+                    data = [0] * 1_000_000
+                    del data
+        with span("other"):
+            pass
+
+    assert [(s.name, s.depth, s.calls) for s in profiler.stages.values()] == [
+        ("outer", 0, 1),
+        ("inner", 1, 2),
+        ("other", 0, 1),
+    ]
+    outer, inner, other = profiler.stages.values()
+    assert outer.total_time >= inner.total_time
+    assert inner.peak_memory is not None and inner.peak_memory >= 8_000_000
+    assert outer.peak_memory is not None and outer.peak_memory >= inner.peak_memory
+    assert profiler.as_dict()["slowest_stage"] == "outer"
+    assert pstats.Stats(str(cprofile_path)).total_calls > 0
@@ -0,0 +1,73 @@
+import asyncio
+import os
+
+from dbt_diagrams.mermaid import _add_generation_header
+from dbt_diagrams.output_writers import as_svgs
+from dbt_diagrams.render_cache import MemoryLRUCache, SvgRenderCache
+
+
+def test_cache_key_ignores_generation_timestamp():
+    cache = SvgRenderCache()
+    diagram = 'erDiagram\n\ta ||--|| b : ""\n'
+
+    assert cache.key(_add_generation_header("erd", diagram)) == cache.key(
+        _add_generation_header("erd", diagram)
+    )
+    assert cache.key(diagram) != cache.key(diagram + "\tc {}\n")
+    assert cache.key(diagram) != SvgRenderCache(mermaid_theme="dark").key(diagram)
+
+
+def test_cache_hits_and_misses(tmp_path):
+    cache = SvgRenderCache(tmp_path)
+
+    assert cache.get("diagram") is None
+    cache.put("diagram", "<svg></svg>")
+    assert cache.get("diagram") == "<svg></svg>"
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cache = SvgRenderCache(tmp_path, max_bytes=20)
+    for idx, diagram in enumerate(["a", "b", "c"]):
+        cache.put(diagram, "x" * 10)
+        os.utime(tmp_path / f"{cache.key(diagram)}.svg", (idx, idx))
+
+    cache.evict()
+
+    assert cache.get("a") is None
+    assert cache.get("b") is not None
+    assert cache.get("c") is not None
+
+
+def test_all_cached_diagrams_skip_the_browser(tmp_path):
+    cache = SvgRenderCache(tmp_path)
+    cache.put("diagram_a", "<svg>a</svg>")
+    cache.put("diagram_b", "<svg>b</svg>")
+
+    # No browser is provided, so anything that is not cached would launch one.
+    svgs = asyncio.run(as_svgs({"a": "diagram_a", "b": "diagram_b"}, cache=cache))
+
+    assert svgs == {"a": "<svg>a</svg>", "b": "<svg>b</svg>"}
+
+
+def test_memory_cache_evicts_least_recently_used():
+    cache = MemoryLRUCache(max_bytes=10)
+    cache.put("a", "aaaa", 4)
+    cache.put("b", "bbbb", 4)
+    assert cache.get("a") == "aaaa"
+
+    cache.put("c", "cccc", 4)
+    cache.put("too big", "x" * 11, 11)
+
+    assert cache.get("b") is None
+    assert cache.get("too big") is None
+    assert cache.get("a") == "aaaa"
+    assert cache.get("c") == "cccc"
+    assert cache.stats() == {
+        "entries": 2,
+        "bytes": 8,
+        "max_bytes": 10,
+        "hits": 3,
+        "misses": 2,
+        "evictions": 1,
+    }
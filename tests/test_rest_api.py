@@ -0,0 +1,149 @@
+import asyncio
+import io
+import json
+from pathlib import Path
+import zipfile
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from dbt_diagrams import rest_api  # noqa: E402
+from dbt_diagrams.rest_api import (  # noqa: E402
+    RequestLimiter,
+    ServiceBusy,
+    artifacts_key,
+    create_app,
+)
+
+JAFFLE_SHOP = Path(__file__).parent / "fixtures" / "jaffle_shop"
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(create_app(parse_workers=1)) as client:
+        yield client
+
+
+def _artifacts():
+    return {
+        "manifest": ("manifest.json", (JAFFLE_SHOP / "manifest.json").read_bytes()),
+        "catalog": ("catalog.json", (JAFFLE_SHOP / "catalog.json").read_bytes()),
+    }
+
+
+def test_generate_json(client):
+    response = client.post("/generate", files=_artifacts(), data={"output_format": "markdown"})
+
+    assert response.status_code == 200
+    diagrams = response.json()["diagrams"]
+    assert list(diagrams) == ["customer_erd"]
+    assert diagrams["customer_erd"].startswith("```mermaid\n")
+
+
+def test_generate_zip(client):
+    response = client.post("/generate", files=_artifacts(), data={"response_format": "zip"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/zip"
+    with zipfile.ZipFile(io.BytesIO(response.content)) as zip_file:
+        assert zip_file.namelist() == ["customer_erd.mmd"]
+        assert "erDiagram" in zip_file.read("customer_erd.mmd").decode()
+
+
+def test_generate_invalid_artifact(client):
+    response = client.post("/generate", files={"manifest": ("manifest.json", b'{"nodes": {}}')})
+
+    assert response.status_code == 400
+    assert "Could not extract version number" in response.json()["detail"]
+
+
+@pytest.mark.parametrize("manifest", [b"", b"{", b'{"metadata": ', b'{"metadata": {"invocation'])
+def test_generate_empty_or_truncated_manifest(client, manifest):
+    response = client.post("/generate", files={"manifest": ("manifest.json", manifest)})
+
+    assert response.status_code == 400
+
+
+def test_request_limiter_turns_requests_away_when_full():
+    async def run():
+        limiter = RequestLimiter(max_concurrent=1, max_queued=1)
+        release = asyncio.Event()
+        entered = []
+
+        async def request(idx):
+            async with limiter.slot():
+                entered.append(idx)
+                await release.wait()
+
+        first = asyncio.create_task(request(1))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(request(2))
+        await asyncio.sleep(0)
+        assert (limiter.active, limiter.queued) == (1, 1)
+
+        with pytest.raises(ServiceBusy):
+            await request(3)
+
+        release.set()
+        await asyncio.gather(first, second)
+        return entered
+
+    assert asyncio.run(run()) == [1, 2]
+
+
+def test_generate_etag_and_cache(client):
+    first = client.post("/generate", files=_artifacts())
+    etag = first.headers["etag"]
+    cached = client.post("/generate", files=_artifacts())
+    not_modified = client.post("/generate", files=_artifacts(), headers={"If-None-Match": etag})
+    # Weak comparison, so a tag without the W/ prefix matches as well.
+    not_modified_strong = client.post(
+        "/generate", files=_artifacts(), headers={"If-None-Match": etag.removeprefix("W/")}
+    )
+    other_format = client.post("/generate", files=_artifacts(), data={"response_format": "zip"})
+
+    assert etag.startswith('W/"')
+    assert cached.status_code == 200
+    assert cached.headers["etag"] == etag
+    assert cached.json() == first.json()
+    assert not_modified.status_code == 304
+    assert not_modified.headers["etag"] == etag
+    assert not_modified_strong.status_code == 304
+    assert other_format.headers["etag"] != etag
+
+    metrics = client.get("/metrics").json()
+    assert metrics["cache"]["hits"] >= 2
+    assert metrics["cache"]["entries"] >= 3
+    assert metrics["requests"]["not_modified"] == 2
+
+
+def test_artifacts_key_uses_invocation_id_and_content():
+    manifest = (JAFFLE_SHOP / "manifest.json").read_bytes()
+    catalog = (JAFFLE_SHOP / "catalog.json").read_bytes()
+    invocation_id = json.loads(manifest)["metadata"]["invocation_id"]
+
+    key = artifacts_key(manifest, catalog)
+
+    assert key.startswith(f"{invocation_id}:")
+    assert key != artifacts_key(manifest, None)
+    assert key != artifacts_key(manifest.replace(b"customers", b"clients"), catalog)
+
+
+def test_etag_changes_with_version(monkeypatch):
+    etag = rest_api._etag("key", "mermaid")
+
+    monkeypatch.setattr(rest_api, "__version__", "999.0.0")
+
+    assert rest_api._etag("key", "mermaid") != etag
+
+
+def test_cli_defaults_match_rest_api():
+    from dbt_diagrams import cli
+
+    assert cli.DEFAULT_MAX_CONCURRENT_REQUESTS == rest_api.DEFAULT_MAX_CONCURRENT_REQUESTS
+    assert cli.DEFAULT_MAX_QUEUED_REQUESTS == rest_api.DEFAULT_MAX_QUEUED_REQUESTS
+    assert cli.DEFAULT_API_CACHE_MAX_BYTES == rest_api.DEFAULT_CACHE_MAX_BYTES
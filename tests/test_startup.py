@@ -0,0 +1,47 @@
+import subprocess
+import sys
+
+from dbt_diagrams import cli, output_writers, render_cache
+
+# Importing the CLI takes about 25ms. The threshold leaves room for slow CI machines,
+# while importing pydantic, yaml or asyncio along with it would take well over it.
+CLI_IMPORT_TIME_THRESHOLD_MS = 100
+
+
+def _cli_import():
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-X",
+            "importtime",
+            "-c",
+            "import sys, dbt_diagrams.cli; print(' '.join(sys.modules))",
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    cumulative_us = next(
+        int(line.split("|")[1])
+        for line in result.stderr.splitlines()
+        if line.split("|")[-1].strip() == "dbt_diagrams.cli"
+    )
+    return cumulative_us / 1000, set(result.stdout.split())
+
+
+def test_cli_imports_only_what_it_needs():
+    _, modules = _cli_import()
+
+    assert not {"pydantic", "yaml", "playwright", "asyncio", "msgspec", "orjson"} & modules
+
+
+def test_cli_import_time():
+    # Best of a few runs, to rule out a busy machine.
+    import_time_ms = min(_cli_import()[0] for _ in range(3))
+
+    assert import_time_ms < CLI_IMPORT_TIME_THRESHOLD_MS
+
+
+def test_cli_defaults_match_modules():
+    assert cli.DEFAULT_SVG_CONCURRENCY == output_writers.DEFAULT_SVG_CONCURRENCY
+    assert cli.DEFAULT_CACHE_DIR == render_cache.DEFAULT_CACHE_DIR
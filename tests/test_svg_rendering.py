@@ -0,0 +1,108 @@
+"""
+End to end smoke tests of SVG rendering. These need Playwright with Chromium and
+a Mermaid runtime (bundled, or from the CDN), and are skipped otherwise.
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+import os
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("playwright")
+
+from playwright.async_api import async_playwright  # noqa: E402
+
+from dbt_diagrams import output_writers  # noqa: E402
+from dbt_diagrams.input_validators import DbtArtifacts  # noqa: E402
+from dbt_diagrams.mermaid import to_mermaid_erds_from_artifacts  # noqa: E402
+from dbt_diagrams.output_writers import (  # noqa: E402
+    as_svgs,
+    mermaid_page_pool,
+    write_many_as_svg,
+)
+
+JAFFLE_SHOP = Path(__file__).parent / "fixtures" / "jaffle_shop"
+
+
+@asynccontextmanager
+async def _chromium():
+    # Unlike get_browser, don't try to install Chromium when it can't be launched.
+    async with async_playwright() as p:
+        browser = await p.chromium.launch()
+        try:
+            yield browser
+        finally:
+            await browser.close()
+
+
+@pytest.fixture(scope="module", autouse=True)
+def require_chromium_and_mermaid():
+    if not (
+        output_writers.MERMAID_BUNDLE_PATH.exists()
+        or os.environ.get(output_writers.MERMAID_CDN_ENV_VAR)
+    ):
+        pytest.skip("Mermaid is not bundled, run `make vendor-mermaid`.")
+
+    async def launch():
+        async with _chromium():
+            pass
+
+    try:
+        asyncio.run(launch())
+    except Exception as e:
+        pytest.skip(f"Chromium can't be launched: {str(e).splitlines()[0]}")
+
+
+@pytest.fixture(scope="module")
+def erds():
+    artifacts = DbtArtifacts.from_target_dir(JAFFLE_SHOP)
+    return to_mermaid_erds_from_artifacts(artifacts.manifest, artifacts.catalog)
+
+
+def test_as_svgs(erds):
+    async def run():
+        async with _chromium() as browser:
+            return await as_svgs(erds, provided_browser=browser)
+
+    svgs = asyncio.run(run())
+
+    assert list(svgs) == list(erds)
+    assert all(svg.startswith("<svg") for svg in svgs.values())
+    assert "customers" in svgs["customer_erd"]
+
+
+def test_write_many_as_svg_on_a_shared_browser(erds, tmp_path):
+    out_dirs = [tmp_path / "shop_a", tmp_path / "shop_b"]
+    for out in out_dirs:
+        out.mkdir()
+
+    async def run():
+        async with _chromium() as browser:
+            return await write_many_as_svg(
+                {out: erds for out in out_dirs}, provided_browser=browser, concurrency=2
+            )
+
+    render_times = asyncio.run(run())
+
+    for out in out_dirs:
+        assert list(render_times[out]) == list(erds)
+        for diagram_name in erds:
+            assert (out / f"{diagram_name}.svg").read_text().startswith("<svg")
+
+
+def test_page_pool_after_failed_render(erds):
+    async def run():
+        async with _chromium() as browser:
+            pool = mermaid_page_pool(browser, size=1)
+            try:
+                with pytest.raises(Exception):
+                    await as_svgs({"broken": "erDiagram\n\tnot ||--|| "}, page_pool=pool)
+                return await as_svgs(erds, page_pool=pool)
+            finally:
+                await pool.close()
+
+    svgs = asyncio.run(run())
+
+    assert all(svg.startswith("<svg") for svg in svgs.values())
@@ -0,0 +1,48 @@
+import asyncio
+
+from dbt_diagrams.watch import ArtifactWatcher
+
+
+def test_watcher_reports_settled_changes(tmp_path):
+    manifest_path = tmp_path / "manifest.json"
+    catalog_path = tmp_path / "catalog.json"
+    manifest_path.write_text("{}")
+    watcher = ArtifactWatcher([manifest_path, catalog_path], poll_interval=0.01, debounce=0.2)
+
+    async def write_artifacts():
+        await asyncio.sleep(0.05)
+        # Written in multiple steps, like dbt does, which should be reported once.
+        for idx in range(3):
+            manifest_path.write_text(f'{{"step": {idx}}}')
+            await asyncio.sleep(0.02)
+        catalog_path.write_text("{}")
+
+    async def run():
+        writer = asyncio.create_task(write_artifacts())
+        changes = watcher.changes()
+        changed = await asyncio.wait_for(changes.__anext__(), timeout=2)
+        await writer
+        await changes.aclose()
+        return changed
+
+    assert asyncio.run(run()) == {manifest_path, catalog_path}
+
+
+def test_watcher_ignores_unwatched_files(tmp_path):
+    manifest_path = tmp_path / "manifest.json"
+    manifest_path.write_text("{}")
+    watcher = ArtifactWatcher([manifest_path], poll_interval=0.01, debounce=0.05)
+
+    async def run():
+        changes = watcher.changes()
+        next_change = asyncio.ensure_future(changes.__anext__())
+        await asyncio.sleep(0.05)
+        catalog_path = tmp_path / "catalog.json"
+        catalog_path.write_text("{}")
+        await asyncio.sleep(0.2)
+        changed_early = next_change.done()
+        manifest_path.write_text('{"a": 1}')
+        changed = await asyncio.wait_for(next_change, timeout=2)
+        return changed_early, changed
+
+    assert asyncio.run(run()) == (False, {manifest_path})